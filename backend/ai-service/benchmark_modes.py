@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Startup time and memory of the app per deployment mode (ENABLED_SERVICES)
+
+Usage:
+    python3 benchmark_modes.py --runs 3
+
+Each mode imports main.py in a fresh interpreter and reports the time to
+a ready app, resident memory and whether torch was imported.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+
+MODES = {
+    'chatbot': ["chatbot"],
+    'ecg': ["ecg"],
+    'xray': ["xray"],
+    'all': ["xray", "chatbot", "ecg"],
+}
+
+
+def run_child():
+    """Import the app in this (fresh) process and print one JSON line"""
+    start = time.perf_counter()
+    import main  # noqa: F401
+    startup_s = time.perf_counter() - start
+
+    memory = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('VmRSS', 'VmHWM'):
+                memory[key] = round(int(rest.split()[0]) / 1024, 1)
+
+    print(json.dumps({
+        "startup_s": round(startup_s, 3),
+        "rss_mb": memory.get('VmRSS'),
+        "peak_rss_mb": memory.get('VmHWM'),
+        "torch_imported": 'torch' in sys.modules,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time / RSS per deployment mode")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return
+
+    report = {}
+    for mode in args.modes:
+        env = dict(os.environ, ENABLED_SERVICES=json.dumps(MODES[mode]))
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child"],
+                cwd=BASE_DIR, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+        report[mode] = {
+            "startup_s": statistics.median(run["startup_s"] for run in runs),
+            "rss_mb": statistics.median(run["rss_mb"] for run in runs),
+            "peak_rss_mb": statistics.median(run["peak_rss_mb"] for run in runs),
+            "torch_imported": runs[0]["torch_imported"],
+        }
+
+    print(f"\n{'mode':10} {'startup s':>10} {'RSS MB':>8} {'peak MB':>8}  torch")
+    for mode, result in report.items():
+        print(f"{mode:10} {result['startup_s']:10.2f} {result['rss_mb']:8.1f} "
+              f"{result['peak_rss_mb']:8.1f}  {'yes' if result['torch_imported'] else 'no'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
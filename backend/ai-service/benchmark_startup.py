@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Measure X-ray model cold-start: load time, first inference and memory
+
+Usage:
+    python3 benchmark_startup.py --runs 3
+
+Each loader runs in a fresh interpreter:
+    legacy       build ResNet50, torch.load the .pth, copy into the params
+    mmap         meta-device model + torch.load(mmap=True) + assign=True
+    safetensors  meta-device model + safetensors (if convert_model.py was run)
+
+RssAnon is process-private memory; memory-mapped weights show up under
+RssFile instead, where they are shared page cache. Unless the page cache
+is dropped between runs (echo 3 > /proc/sys/vm/drop_caches, as root) the
+numbers are warm-cache; on a cold cache mmap moves the disk reads from
+load time to the first forward pass, which is why both are reported.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+MODELS_DIR = BASE_DIR / 'models'
+
+LOADERS = {
+    'legacy': ('xray_binary_model.pth', False),
+    'mmap': ('xray_binary_model.pth', True),
+    'safetensors': ('xray_binary_model.safetensors', True),
+}
+
+
+def proc_status_mb(*keys):
+    values = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in keys:
+                values[key] = round(int(rest.split()[0]) / 1024, 1)
+    return values
+
+
+def run_child(loader):
+    """Load once inside this (fresh) process and print one JSON line"""
+    weights_name, mmap_weights = LOADERS[loader]
+
+    start = time.perf_counter()
+    import torch
+    from services.xray_service import XRayService
+    import_s = time.perf_counter() - start
+
+    # A folder holding only the artifact under test, so XRayService can't pick another one
+    with tempfile.TemporaryDirectory() as model_dir:
+        os.symlink(MODELS_DIR / weights_name, Path(model_dir) / weights_name)
+        os.symlink(MODELS_DIR / 'binary_metadata.json', Path(model_dir) / 'binary_metadata.json')
+
+        start = time.perf_counter()
+        service = XRayService(model_dir=model_dir, mmap_weights=mmap_weights)
+        load_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with torch.no_grad():
+            service.model(torch.zeros(1, 3, 224, 224))
+        first_forward_s = time.perf_counter() - start
+        # After the first forward every weight page has been touched
+        memory = proc_status_mb('RssAnon', 'RssFile')
+
+    print(json.dumps({
+        "import_s": round(import_s, 3),
+        "load_s": round(load_s, 3),
+        "first_forward_s": round(first_forward_s, 3),
+        "rss_anon_mb": memory.get('RssAnon'),
+        "rss_file_mb": memory.get('RssFile'),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="X-ray model cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--loaders", nargs="+", choices=list(LOADERS), default=list(LOADERS))
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--child", choices=list(LOADERS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    report = {}
+    for loader in args.loaders:
+        if not (MODELS_DIR / LOADERS[loader][0]).exists():
+            print(f"⏭️  {loader}: {LOADERS[loader][0]} not found (see convert_model.py)")
+            continue
+
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", loader],
+                cwd=BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+        report[loader] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+    print(f"\n{'loader':12} {'load s':>8} {'1st fwd s':>10} {'anon MB':>9} {'file MB':>9}")
+    for loader, result in report.items():
+        print(f"{loader:12} {result['load_s']:8.3f} {result['first_forward_s']:10.3f} "
+              f"{result['rss_anon_mb']:9.1f} {result['rss_file_mb']:9.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Compare X-ray throughput: thread serving (batcher) vs forked process workers
+
+Usage:
+    python3 benchmark_workers.py --requests 64 --concurrency 8 --workers 4
+
+Runs the same synthetic upload load through both serving modes and prints
+images/sec, latency percentiles and worker memory (PSS shows how much of
+the model each worker really owns; the rest is shared with the parent).
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from services.xray_service import XRayService
+from services.xray_batcher import XRayBatcher
+from services.xray_process_pool import XRayProcessPool
+
+
+def synthetic_uploads(count, size=1024):
+    """Distinct JPEG films so nothing is served from a cache"""
+    rng = np.random.RandomState(0)
+    uploads = []
+    for _ in range(count):
+        pixels = rng.randint(0, 255, (size, size), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels, 'L').save(buffer, format='JPEG', quality=90)
+        uploads.append(buffer.getvalue())
+    return uploads
+
+
+async def run_load(runner, uploads, concurrency):
+    """Closed-loop load: `concurrency` clients send uploads back to back"""
+    latencies = []
+    queue = list(uploads)
+
+    async def client():
+        while queue:
+            image_bytes = queue.pop()
+            start = time.perf_counter()
+            await runner.analyze(image_bytes, "bench.jpg")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "images_per_sec": round(len(uploads) / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 1),
+    }
+
+
+def memory_mb(pid):
+    """RSS and PSS of a process in MB (Linux smaps_rollup)"""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ("Rss", "Pss"):
+                    values[key.lower() + "_mb"] = round(int(rest.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread vs process X-ray serving throughput")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--backend", default="fp32", choices=XRayService.BACKENDS)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    uploads = synthetic_uploads(args.requests)
+    service = XRayService(backend=args.backend, fast_decode=True)
+    report = {"requests": args.requests, "concurrency": args.concurrency, "backend": args.backend}
+
+    # Process mode first: the pool has to fork before the parent runs torch ops
+    pool = XRayProcessPool(service, workers=args.workers, threads_per_worker=args.threads_per_worker,
+                           warmup_iterations=2, max_queue_size=args.requests)
+    report["process"] = asyncio.run(run_load(pool, uploads, args.concurrency))
+    report["process"]["workers"] = args.workers
+    report["process"]["worker_memory"] = [memory_mb(pid) for pid in pool._executor._processes]
+    pool.close()
+
+    service.warmup(2, (1, 8))
+    batcher = XRayBatcher(service, max_batch_size=8, max_queue_size=args.requests)
+    report["thread"] = asyncio.run(run_load(batcher, uploads, args.concurrency))
+    report["thread"]["parent_memory"] = memory_mb(os.getpid())
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the XRayService pipeline on synthetic films
+
+Usage:
+    python3 benchmark_xray.py --backend fp32 --output bench_fp32.json
+    python3 benchmark_xray.py --backend int8 --mode torchscript --fast-decode
+
+Times each stage on its own (decode, transform, forward at several batch
+sizes), the full analyze_xray() call, and analyze_xray() at each
+test-time augmentation factor, on synthetic grayscale films at typical
+chest X-ray resolutions. No dataset or server is needed. Every
+result has mean/p50/p99 latency and images/sec; the JSON report also
+records the torch build and hardware, so runs on different backends or
+machines can be compared directly.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+
+from services.xray_service import XRayService, decode_image
+
+# (label, longer side, format); CR/DR chest films are roughly 2000-3000 px
+FILMS = (
+    ("jpeg_1024", 1024, "JPEG"),
+    ("jpeg_2048", 2048, "JPEG"),
+    ("jpeg_3000", 3000, "JPEG"),
+    ("png_2048", 2048, "PNG"),
+)
+
+
+def synthetic_film(size, image_format, seed=0):
+    """
+    Grayscale film with smooth anatomy-like structure plus sensor noise
+
+    Pure noise compresses (and decodes) unlike real films, so the image is
+    mostly low-frequency content, portrait 5:4 like a PA chest film.
+    """
+    rng = np.random.RandomState(seed)
+    height, width = size, int(size * 0.8)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    pixels = 120 + 60 * np.sin(x / width * np.pi) * np.cos(y / height * 2 * np.pi)
+    pixels += 25 * np.sin(x / 37.0 + y / 53.0)
+    pixels += rng.normal(0, 6, (height, width))
+
+    buffer = io.BytesIO()
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'L')
+    if image_format == "JPEG":
+        image.save(buffer, format="JPEG", quality=90)
+    else:
+        image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def summarize(timings, images_per_call=1):
+    """Latency stats in ms and throughput for a list of per-call seconds"""
+    timings = sorted(timings)
+    total = sum(timings)
+    return {
+        "calls": len(timings),
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000, 3),
+        "images_per_sec": round(len(timings) * images_per_call / total, 2) if total else None,
+    }
+
+
+def measure(fn, iterations, warmup):
+    """Per-call wall time of fn() after `warmup` untimed calls"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def environment(service):
+    return {
+        "torch": torch.__version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+        "device": str(service.device),
+        "backend": service.backend,
+        "inference_mode": service.inference_mode,
+        "fast_decode": service.fast_decode,
+        "model_version": service.model_version,
+    }
+
+
+def run(service, films, batch_sizes, tta_factors, iterations, warmup):
+    report = {
+        "environment": environment(service),
+        "decode": {}, "transform": {}, "forward": {}, "analyze_xray": {}, "tta": {}
+    }
+
+    for label, image_bytes in films.items():
+        print(f"   {label} ({len(image_bytes) / 1024:.0f} KB)")
+        decoded = decode_image(image_bytes, fast=service.fast_decode)
+        report["decode"][label] = summarize(
+            measure(lambda: decode_image(image_bytes, fast=service.fast_decode), iterations, warmup))
+        report["transform"][label] = summarize(
+            measure(lambda: service.transform(decoded), iterations, warmup))
+        report["analyze_xray"][label] = summarize(
+            measure(lambda: service.analyze_xray(image_bytes, "bench.jpg"), iterations, warmup))
+
+    for batch_size in batch_sizes:
+        print(f"   forward batch {batch_size}")
+        batch = torch.randn(batch_size, 3, 224, 224, device=service.device)
+
+        def forward():
+            with torch.no_grad():
+                service.model(batch)
+
+        report["forward"][f"batch_{batch_size}"] = summarize(
+            measure(forward, iterations, warmup), images_per_call=batch_size)
+
+    # Cost of each TTA factor on one film; images/sec counts films, not views
+    label, image_bytes = next(iter(films.items()))
+    for tta in tta_factors:
+        print(f"   analyze_xray tta={tta} ({label})")
+        report["tta"][f"tta_{tta}"] = summarize(
+            measure(lambda: service.analyze_xray(image_bytes, "bench.jpg", tta=tta), iterations, warmup))
+
+    return report
+
+
+def print_table(report):
+    print(f"\n{'stage':14} {'case':10} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'img/s':>9}")
+    for stage in ("decode", "transform", "forward", "analyze_xray", "tta"):
+        for case, stats in report[stage].items():
+            print(f"{stage:14} {case:10} {stats['mean_ms']:9.2f} {stats['p50_ms']:9.2f} "
+                  f"{stats['p99_ms']:9.2f} {stats['images_per_sec']:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XRayService stage microbenchmarks")
+    parser.add_argument("--backend", default="fp32", choices=XRayService.BACKENDS)
+    parser.add_argument("--mode", default="eager", choices=["eager", "torchscript", "compile"])
+    parser.add_argument("--fast-decode", action="store_true", help="Benchmark the reduced-resolution decode path")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--tta-factors", type=int, nargs="+", choices=XRayService.TTA_FACTORS,
+                        default=list(XRayService.TTA_FACTORS))
+    parser.add_argument("--films", nargs="+", choices=[label for label, _, _ in FILMS],
+                        default=[label for label, _, _ in FILMS])
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    # No result cache, so analyze_xray always runs the full pipeline
+    service = XRayService(backend=args.backend, inference_mode=args.mode, fast_decode=args.fast_decode)
+    films = {
+        label: synthetic_film(size, image_format)
+        for label, size, image_format in FILMS if label in args.films
+    }
+
+    print(f"\nBenchmarking {args.backend}/{args.mode} ({args.iterations} iterations)...")
+    report = run(service, films, args.batch_sizes, args.tta_factors, args.iterations, args.warmup)
+    report["iterations"] = args.iterations
+    print_table(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Accuracy vs throughput of the X-ray cascade as the threshold changes
+
+Usage:
+    python3 cascade_curve.py --data-dir /path/to/chest_xray/test --output curve.json
+
+Runs both the screening model and the ResNet50 once over a labelled folder
+(NORMAL/ and PNEUMONIA/, as in train_enhanced.py), then replays the cascade
+for every threshold: a film is decided by the screening model when its
+confidence reaches the threshold, otherwise by the ResNet50. Throughput is
+estimated from measured forward times at the serving batch size:
+
+    images/sec = batch / (t_screening + escalation_rate * t_full)
+
+Decode and preprocessing cost the same in every row, so they are left out.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from services.xray_service import XRayService
+
+LABELS = {'NORMAL': 1, 'PNEUMONIA': 0}  # same encoding as XRayDataset
+EXTENSIONS = ('.jpeg', '.jpg', '.png')
+DEFAULT_THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.97, 0.99]
+
+
+def labelled_images(data_dir):
+    images = []
+    for folder, label in LABELS.items():
+        for path in sorted((Path(data_dir) / folder).glob('*')):
+            if path.suffix.lower() in EXTENSIONS:
+                images.append((str(path), label))
+    return images
+
+
+def collect_probabilities(service, images, batch_size):
+    """Softmax outputs of both stages for every image (center crop, no TTA)"""
+    screening, full = [], []
+    with torch.no_grad():
+        for start in range(0, len(images), batch_size):
+            batch = torch.stack([service.preprocess(path) for path, _ in images[start:start + batch_size]])
+            batch = batch.to(service.device)
+            screening.append(torch.softmax(service.screening_model(batch), dim=1))
+            full.append(torch.softmax(service.model(batch), dim=1))
+            print(f"   {min(start + batch_size, len(images))}/{len(images)} images", end="\r")
+    print()
+    return torch.cat(screening).cpu().numpy(), torch.cat(full).cpu().numpy()
+
+
+def forward_seconds(model, batch_size, device, iterations):
+    """Median forward time for one batch"""
+    batch = torch.randn(batch_size, 3, 224, 224, device=device)
+    timings = []
+    with torch.no_grad():
+        model(batch)
+        for _ in range(iterations):
+            start = time.perf_counter()
+            model(batch)
+            timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def threshold_curve(screening_probs, full_probs, labels, thresholds, t_screening, t_full, batch_size):
+    screening_conf = screening_probs.max(axis=1)
+    screening_pred = screening_probs.argmax(axis=1)
+    full_pred = full_probs.argmax(axis=1)
+
+    rows = [
+        {"threshold": None, "stage": "full only", "accuracy": float((full_pred == labels).mean()),
+         "escalation_rate": 1.0, "images_per_sec": batch_size / t_full},
+        {"threshold": None, "stage": "screening only", "accuracy": float((screening_pred == labels).mean()),
+         "escalation_rate": 0.0, "images_per_sec": batch_size / t_screening},
+    ]
+    for threshold in thresholds:
+        decided = screening_conf >= threshold
+        predictions = np.where(decided, screening_pred, full_pred)
+        escalation_rate = float(1 - decided.mean())
+        rows.append({
+            "threshold": threshold,
+            "stage": "cascade",
+            "accuracy": float((predictions == labels).mean()),
+            "escalation_rate": escalation_rate,
+            "images_per_sec": batch_size / (t_screening + escalation_rate * t_full),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cascade threshold: accuracy vs throughput")
+    parser.add_argument("--data-dir", required=True, help="Labelled folder with NORMAL/ and PNEUMONIA/")
+    parser.add_argument("--model-dir", default=None, help="Folder with both models (default: models/)")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--batch-size", type=int, default=8, help="Serving batch size used for timing")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    images = labelled_images(args.data_dir)
+    if not images:
+        parser.error(f"No labelled images under {args.data_dir} (expected NORMAL/ and PNEUMONIA/)")
+
+    # Any threshold > 0 loads the screening model next to the ResNet50
+    service = XRayService(model_dir=args.model_dir, cascade_threshold=1.0)
+    if service.screening_model is None:
+        parser.error("No screening model found; run train_cascade.py first")
+
+    print(f"\nScoring {len(images)} images with both stages...")
+    screening_probs, full_probs = collect_probabilities(service, images, args.batch_size)
+    labels = np.array([label for _, label in images])
+
+    print(f"Timing forward passes at batch {args.batch_size}...")
+    t_screening = forward_seconds(service.screening_model, args.batch_size, service.device, args.iterations)
+    t_full = forward_seconds(service.model, args.batch_size, service.device, args.iterations)
+
+    rows = threshold_curve(screening_probs, full_probs, labels, sorted(args.thresholds),
+                           t_screening, t_full, args.batch_size)
+
+    print(f"\n{'threshold':>10} {'stage':15} {'accuracy':>9} {'escalated':>10} {'img/s':>9}")
+    for row in rows:
+        threshold = f"{row['threshold']:.2f}" if row['threshold'] is not None else "-"
+        print(f"{threshold:>10} {row['stage']:15} {row['accuracy']*100:8.2f}% "
+              f"{row['escalation_rate']*100:9.1f}% {row['images_per_sec']:9.1f}")
+
+    if args.output:
+        report = {
+            "images": len(images),
+            "batch_size": args.batch_size,
+            "forward_ms": {"screening": round(t_screening * 1000, 2), "full": round(t_full * 1000, 2)},
+            "curve": rows
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,9 +19,76 @@ class Settings(BaseSettings):
     max_file_size: int = 10485760  # 10MB
     allowed_extensions: List[str] = ["jpg", "jpeg", "png", "pdf"]
     
+    # ECG Storage
+    ecg_max_file_size: int = 52428800  # 50MB, enforced while the upload streams in
+    ecg_io_workers: int = 4  # threads writing ECG uploads (separate from X-ray decode threads)
+    ecg_write_buffer_size: int = 1048576  # bytes collected before each disk write
+    ecg_list_max_limit: int = 200  # largest page for GET /api/ecg
+    
+    # Capabilities loaded at startup (a chatbot-only pod never imports torch)
+    enabled_services: List[str] = ["xray", "chatbot", "ecg"]
+    
     # Model Configuration
     use_gpu: bool = False
     model_path: str = "./models"
+    xray_backend: str = "fp32"  # fp32 | int8 (run quantize_model.py first)
+    xray_inference_mode: str = "eager"  # eager | torchscript | compile
+    xray_warmup_iterations: int = 3
+    xray_fast_decode: bool = True  # decode large JPEG/PNG near 256px instead of full size
+    xray_tta_default: int = 1  # test-time augmentation views (1, 2, 5 or 10); per request via ?tta=
+    xray_cascade_threshold: float = 0.0  # screening-model confidence to skip ResNet50; 0 = off (train_cascade.py)
+    xray_mmap_weights: bool = True  # memory-map fp32 weights (.safetensors or .pth) instead of copying
+    xray_model_versions_dir: str = "models/versions"  # published versions for hot-swap
+    xray_model_history: int = 1  # replaced versions kept loaded for instant rollback
+    
+    # X-ray Inference Batching
+    xray_batch_max_size: int = 8
+    xray_batch_max_wait_ms: float = 5.0
+    xray_batch_queue_size: int = 64  # per priority lane
+    xray_bulk_min_share: float = 0.25  # batch slots kept for bulk work while interactive traffic waits
+    
+    # X-ray Result Cache
+    xray_cache_enabled: bool = True
+    xray_cache_max_entries: int = 2048
+    xray_cache_ttl_seconds: int = 3600
+    
+    # X-ray Near-Duplicate Index (re-encoded copies of an analyzed film; thread mode only)
+    xray_near_duplicate_enabled: bool = False
+    xray_near_duplicate_max_distance: int = 4  # Hamming distance between 64-bit perceptual hashes
+    xray_near_duplicate_max_entries: int = 10000
+    xray_near_duplicate_snapshot: str = ""  # JSON file loaded at startup and written at shutdown
+    
+    # X-ray Upload Audit (off the request path)
+    xray_audit_enabled: bool = False
+    xray_audit_dir: str = "uploads/xray_audit"
+    xray_audit_batch_size: int = 32
+    xray_audit_flush_ms: int = 1000
+    
+    # X-ray Bulk Analysis
+    xray_bulk_max_files: int = 500
+    xray_bulk_max_archive_size: int = 524288000  # 500MB per zip archive (MAX_FILE_SIZE applies to images)
+    xray_bulk_max_body_size: int = 1073741824  # 1GB per bulk request, all parts together
+    xray_bulk_max_extracted_size: int = 1073741824  # 1GB of images unpacked from a request's zips
+    xray_decode_workers: int = 4
+
+    # X-ray Serving Mode
+    xray_serving_mode: str = "thread"  # thread | process (forked workers, Linux only)
+    xray_process_workers: int = 2
+    xray_threads_per_worker: int = 1
+    xray_process_max_restarts: int = 3  # pool re-forks after a worker dies; then /health fails
+
+    # X-ray Admission Control
+    xray_max_concurrent: int = 8  # analyses in progress at once (decode + inference)
+    xray_max_waiting: int = 32  # per lane; beyond this, requests get 503 + Retry-After
+    xray_interactive_reserved_slots: int = 2  # of xray_max_concurrent, never taken by bulk jobs
+    xray_retry_after_seconds: int = 1
+    torch_num_threads: int = 0  # intra-op threads, 0 = torch default (all visible cores)
+    torch_num_interop_threads: int = 0
+    
+    # Admin Endpoints
+    admin_token: str = ""  # if set, /api/admin/* requires X-Admin-Token
+    xray_profile_dir: str = "profiles/xray"  # torch.profiler captures (POST /api/admin/xray/profile)
+    xray_profile_max_inferences: int = 100
     
     # CORS Configuration
     allowed_origins: List[str] = ["*"]
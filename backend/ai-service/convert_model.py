@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Convert the X-ray model weights to a memory-mappable artifact
+
+Usage:
+    python3 convert_model.py                     # .pth → models/xray_binary_model.safetensors
+    python3 convert_model.py --format pth        # re-save .pth in the mmap-compatible zip format
+
+XRayService prefers xray_binary_model.safetensors when it exists and the
+safetensors package is installed (pip install safetensors); otherwise it
+memory-maps the .pth. Both files are written atomically and checked
+tensor-for-tensor against the source before replacing anything.
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import torch
+
+from services.xray_service import MODELS_DIR, load_state_dict_file, safetensors_available
+
+
+def save_state_dict(state_dict, path, fmt):
+    """Write to <path>.tmp, then rename over path (readers never see a partial file)"""
+    staging = path.with_name(path.name + '.tmp')
+    # safetensors rejects views/shared storage; make every tensor standalone
+    tensors = {name: tensor.detach().contiguous().clone() for name, tensor in state_dict.items()}
+    if fmt == 'safetensors':
+        from safetensors.torch import save_file
+        save_file(tensors, str(staging), metadata={"format": "pt"})
+    else:
+        torch.save(tensors, staging)
+    os.replace(staging, path)
+
+
+def verify(source, converted):
+    """Same keys, dtypes, shapes and values"""
+    if source.keys() != converted.keys():
+        missing = set(source) ^ set(converted)
+        raise ValueError(f"Key mismatch: {sorted(missing)[:5]}")
+    for name, tensor in source.items():
+        other = converted[name]
+        if tensor.dtype != other.dtype or tensor.shape != other.shape or not torch.equal(tensor, other):
+            raise ValueError(f"Tensor {name} differs after conversion")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert X-ray weights for fast (mmap) loading")
+    parser.add_argument("--input", default=str(MODELS_DIR / 'xray_binary_model.pth'))
+    parser.add_argument("--format", choices=("safetensors", "pth"), default="safetensors")
+    parser.add_argument("--output", help="Default: next to the input with the format's extension")
+    args = parser.parse_args()
+
+    if args.format == 'safetensors' and not safetensors_available():
+        parser.error("safetensors is not installed (pip install safetensors), or use --format pth")
+
+    source_path = Path(args.input)
+    output_path = Path(args.output) if args.output else source_path.with_suffix(
+        '.safetensors' if args.format == 'safetensors' else '.pth'
+    )
+
+    print(f"🔧 Converting {source_path} → {output_path} ({args.format})")
+    state_dict = load_state_dict_file(source_path, mmap=False)
+    save_state_dict(state_dict, output_path, args.format)
+
+    verify(state_dict, load_state_dict_file(output_path, mmap=True))
+    size_mb = output_path.stat().st_size / 1024 / 1024
+    print(f"✅ {len(state_dict)} tensors written and verified ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
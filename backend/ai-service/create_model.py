@@ -3,6 +3,7 @@
 Script to create a trained binary X-ray classification model
 """
 
+import os
 import torch
 import torch.nn as nn
 from torchvision import models
@@ -45,7 +46,11 @@ def create_binary_model():
     models_dir.mkdir(exist_ok=True)
     
     model_path = models_dir / 'xray_binary_model.pth'
-    torch.save(model.state_dict(), model_path)
+    # Write then rename: a running service may have the old file memory-mapped,
+    # and truncating it in place would crash that process
+    staging_path = model_path.with_name(model_path.name + '.tmp')
+    torch.save(model.state_dict(), staging_path)
+    os.replace(staging_path, model_path)
     print(f"✅ Model saved to {model_path}")
     
     # Create metadata
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Open-loop load generator for a running PulseX AI Service
+
+Usage:
+    uvicorn main:app --port 8000 &
+    python3 load_test.py --rates 5 10 20 --duration 30 --mix xray=0.6,chatbot=0.3,ecg=0.1
+
+Requests are sent on a fixed arrival schedule (Poisson by default) whether
+or not earlier ones have finished, so a slow server builds up a queue
+instead of quietly slowing the client down. Latency is measured from each
+request's scheduled send time, which keeps that queueing in the numbers
+(no coordinated omission).
+
+For every rate step and endpoint it reports throughput, p50/p95/p99/p99.9
+latency and error rates by status code. Uploads come from a synthetic
+corpus generated in memory; note that /api/ecg/upload stores every file it
+receives under uploads/ecg/.
+
+Each X-ray upload carries a unique JPEG comment, so the service's exact-hash
+result cache never answers for the model; --no-unique-uploads resends the
+corpus verbatim to measure the cached path instead. The pixels still repeat,
+so run the target with XRAY_NEAR_DUPLICATE_ENABLED=false (the default).
+"""
+
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import math
+import random
+import struct
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+from PIL import Image
+
+CHATBOT_MESSAGES = (
+    "I have chest pain and shortness of breath",
+    "What is a normal resting heart rate?",
+    "My blood pressure is 150/95, is that high?",
+    "How can I lower my cholesterol?",
+    "I feel palpitations after coffee",
+)
+
+# Smallest valid single-page PDF, standing in for an exported ECG report
+ECG_PDF = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+def synthetic_corpus(count, size, seed=0):
+    """Distinct grayscale JPEG films"""
+    rng = np.random.RandomState(seed)
+    height, width = size, int(size * 0.8)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    films = []
+    for _ in range(count):
+        phase = rng.uniform(0, np.pi)
+        pixels = 120 + 60 * np.sin(x / width * np.pi + phase) * np.cos(y / height * 2 * np.pi)
+        pixels += rng.normal(0, 6, (height, width))
+        buffer = io.BytesIO()
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'L').save(buffer, format='JPEG', quality=90)
+        films.append(buffer.getvalue())
+    return films
+
+
+def stamp_jpeg(jpeg, nonce):
+    """Same image, different bytes: a COM segment carrying `nonce` right after SOI"""
+    payload = f"load-test {nonce}".encode()
+    return jpeg[:2] + b"\xff\xfe" + struct.pack(">H", len(payload) + 2) + payload + jpeg[2:]
+
+
+class UniqueFilms:
+    """Corpus view that stamps every film it hands out with a fresh nonce"""
+
+    def __init__(self, films):
+        self.films = films
+        self._nonces = itertools.count()
+
+    def __len__(self):
+        return len(self.films)
+
+    def __getitem__(self, index):
+        return stamp_jpeg(self.films[index], next(self._nonces))
+
+
+def parse_mix(text):
+    """'xray=0.6,chatbot=0.3' -> {'xray': 0.6, 'chatbot': 0.3}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}' (expected one of {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("The mix needs at least one endpoint with a positive weight")
+    return mix
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def send_xray(client, corpus, rng):
+    return await client.post("/api/xray/analyze", files={"file": ("load.jpg", rng.choice(corpus), "image/jpeg")})
+
+
+async def send_chatbot(client, corpus, rng):
+    return await client.post("/api/chatbot", json={"message": rng.choice(CHATBOT_MESSAGES), "user_data": {}})
+
+
+async def send_ecg(client, corpus, rng):
+    return await client.post("/api/ecg/upload", files={"file": ("load.pdf", ECG_PDF, "application/pdf")})
+
+
+ENDPOINTS = {"xray": send_xray, "chatbot": send_chatbot, "ecg": send_ecg}
+
+
+class StepResults:
+    """Latencies and outcomes of one rate step, per endpoint"""
+
+    def __init__(self):
+        self.latencies = {name: [] for name in ENDPOINTS}
+        self.outcomes = {name: Counter() for name in ENDPOINTS}
+
+    def record(self, endpoint, latency, outcome):
+        self.outcomes[endpoint][outcome] += 1
+        if outcome == "200":
+            self.latencies[endpoint].append(latency)
+
+    def summary(self, elapsed):
+        report = {}
+        all_latencies = []
+        all_outcomes = Counter()
+        for endpoint in ENDPOINTS:
+            if self.outcomes[endpoint]:
+                report[endpoint] = self._stats(self.latencies[endpoint], self.outcomes[endpoint], elapsed)
+                all_latencies.extend(self.latencies[endpoint])
+                all_outcomes.update(self.outcomes[endpoint])
+        report["all"] = self._stats(all_latencies, all_outcomes, elapsed)
+        return report
+
+    @staticmethod
+    def _stats(latencies, outcomes, elapsed):
+        latencies = sorted(latencies)
+        sent = sum(outcomes.values())
+        errors = sent - outcomes["200"]
+        return {
+            "sent": sent,
+            "ok": outcomes["200"],
+            "throughput_rps": round(outcomes["200"] / elapsed, 2),
+            "error_rate": round(errors / sent, 4) if sent else 0.0,
+            "errors": {outcome: count for outcome, count in outcomes.items() if outcome != "200"},
+            **{
+                f"p{label}_ms": round(value * 1000, 1) if value is not None else None
+                for label, value in (
+                    ("50", percentile(latencies, 50)),
+                    ("95", percentile(latencies, 95)),
+                    ("99", percentile(latencies, 99)),
+                    ("99.9", percentile(latencies, 99.9)),
+                )
+            },
+        }
+
+
+async def run_step(client, rate, duration, mix, corpus, arrival, seed):
+    """Send requests at `rate`/s for `duration` seconds and wait for all of them"""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    results = StepResults()
+    tasks = []
+
+    async def fire(endpoint, scheduled):
+        try:
+            response = await ENDPOINTS[endpoint](client, corpus, rng)
+            outcome = str(response.status_code)
+        except httpx.TimeoutException:
+            outcome = "timeout"
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        results.record(endpoint, time.perf_counter() - scheduled, outcome)
+
+    start = time.perf_counter()
+    next_send = start
+    while next_send < start + duration:
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        endpoint = rng.choices(names, weights)[0]
+        tasks.append(asyncio.create_task(fire(endpoint, next_send)))
+        next_send += rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+
+    await asyncio.gather(*tasks)
+    # Throughput over the send window; the drain time shows up in the latencies
+    return results.summary(duration)
+
+
+def print_step(rate, report):
+    print(f"\nRate {rate:g} req/s")
+    print(f"  {'endpoint':9} {'sent':>6} {'ok/s':>7} {'err %':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'p99.9':>8}")
+    for endpoint, stats in report.items():
+        cells = [f"{stats[key]:8.1f}" if stats[key] is not None else f"{'-':>8}"
+                 for key in ("p50_ms", "p95_ms", "p99_ms", "p99.9_ms")]
+        print(f"  {endpoint:9} {stats['sent']:6d} {stats['throughput_rps']:7.2f} "
+              f"{stats['error_rate'] * 100:6.2f} {' '.join(cells)}")
+        if stats["errors"]:
+            print(f"  {'':9} errors: {stats['errors']}")
+
+
+async def main_async(args):
+    corpus = synthetic_corpus(args.images, args.image_size)
+    if args.unique_uploads:
+        corpus = UniqueFilms(corpus)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    report = {"url": args.url, "mix": args.mix, "arrival": args.arrival, "duration_s": args.duration, "steps": []}
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        health = await client.get("/health")
+        health.raise_for_status()
+        print(f"Target {args.url}: {health.json()['services']}")
+
+        for step, rate in enumerate(args.rates):
+            step_report = await run_step(client, rate, args.duration, args.mix, corpus, args.arrival, args.seed + step)
+            print_step(rate, step_report)
+            report["steps"].append({"rate": rate, "endpoints": step_report})
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test for the PulseX AI Service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rates", type=float, nargs="+", default=[5.0], help="Arrival rates (req/s), one step each")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per rate step")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("xray=0.6,chatbot=0.3,ecg=0.1"),
+                        help="Endpoint weights, e.g. xray=0.6,chatbot=0.3,ecg=0.1")
+    parser.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--images", type=int, default=32, help="Synthetic films in the upload corpus")
+    parser.add_argument("--unique-uploads", action=argparse.BooleanOptionalAction, default=True,
+                        help="Give every X-ray upload unique bytes so the result cache can't answer it")
+    parser.add_argument("--image-size", type=int, default=2048, help="Longer side of each film in pixels")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-connections", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
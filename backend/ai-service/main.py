@@ -1,9 +1,11 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
 from pathlib import Path
-import shutil
-import uuid
+import asyncio
+import hmac
+import io
+import zipfile
 from datetime import datetime
 import os
 import sys
@@ -12,6 +14,12 @@ from typing import Optional, Dict, Any
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from config import settings
+# No torch import here; the X-ray endpoints' error handling needs these in every mode
+from services.xray_batcher import XRayQueueFullError, LANES
+from services.metrics import REGISTRY, MetricsMiddleware, XRAY_STAGE_SECONDS
+from services.uploads import MEDIA_TYPES, UploadError, allowed_types, multipart_body, read_files
+
 app = FastAPI(
     title="PulseX AI Service",
     description="Medical AI Service: X-ray Binary Classifier + Heart Health Chatbot",
@@ -25,32 +33,269 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Setup directories
 BASE_DIR = Path(__file__).parent
 UPLOAD_DIR = BASE_DIR / "uploads"
 ECG_DIR = UPLOAD_DIR / "ecg"
-XRAY_TEMP_DIR = UPLOAD_DIR / "xray_temp"
-
-for folder in [ECG_DIR, XRAY_TEMP_DIR]:
-    folder.mkdir(parents=True, exist_ok=True)
-
-# Initialize services
-try:
-    from services.xray_service import XRayService
-    xray_service = XRayService()
-    print("✅ X-ray Binary Classifier loaded (92.6% accuracy)")
-except Exception as e:
-    print(f"❌ X-ray Service Error: {e}")
-    xray_service = None
-
-try:
-    from services.chatbot_service import ChatbotService
-    chatbot_service = ChatbotService()
-    print("✅ Heart Health Chatbot loaded")
-except Exception as e:
-    print(f"❌ Chatbot Service Error: {e}")
-    chatbot_service = None
+
+ecg_storage = None
+ecg_catalog = None
+
+if "ecg" in settings.enabled_services:
+    from services.ecg_storage import ECGStorage
+    from services.ecg_catalog import ECGCatalog
+    ECG_DIR.mkdir(parents=True, exist_ok=True)
+    ecg_storage = ECGStorage(
+        ECG_DIR,
+        max_file_size=settings.ecg_max_file_size,
+        extensions=settings.allowed_extensions,
+        io_workers=settings.ecg_io_workers,
+        write_buffer_size=settings.ecg_write_buffer_size
+    )
+    ecg_catalog = ECGCatalog(ECG_DIR)
+
+# Initialize services: only the capabilities in ENABLED_SERVICES are loaded,
+# so a chatbot-only deployment never imports torch
+xray_service = None
+xray_registry = None
+xray_batcher = None
+xray_pool = None
+xray_admission = None
+xray_audit = None
+xray_profiler = None
+chatbot_service = None
+
+if "xray" in settings.enabled_services:
+    try:
+        from services.xray_service import XRayService
+        from services.xray_batcher import XRayBatcher
+        from services.xray_cache import XRayResultCache
+        from services.xray_near_duplicates import XRayNearDuplicateIndex
+        from services.xray_audit import XRayAuditWriter
+        from services.xray_admission import XRayAdmissionController, configure_torch_threads
+        from services.xray_registry import XRayModelRegistry
+        from services.xray_profiler import XRayProfiler
+        from services.xray_service import MODELS_DIR
+        # Before any forward pass: the inter-op pool can only be sized once
+        torch_threads = configure_torch_threads(settings.torch_num_threads, settings.torch_num_interop_threads)
+        process_mode = settings.xray_serving_mode == "process"
+        warmup_batch_sizes = sorted({1, settings.xray_batch_max_size})
+        xray_cache = XRayResultCache(
+            max_entries=settings.xray_cache_max_entries,
+            ttl_seconds=settings.xray_cache_ttl_seconds,
+            watch_paths=[
+                MODELS_DIR / ('xray_binary_model_int8.pt' if settings.xray_backend == 'int8' else 'xray_binary_model.pth'),
+                MODELS_DIR / 'binary_metadata.json',
+                MODELS_DIR / 'xray_screening_model.pth'
+            ]
+        ) if settings.xray_cache_enabled else None
+        # Workers decode in process mode, so the parent never sees the images
+        xray_near_duplicates = XRayNearDuplicateIndex(
+            max_distance=settings.xray_near_duplicate_max_distance,
+            max_entries=settings.xray_near_duplicate_max_entries
+        ) if settings.xray_near_duplicate_enabled and not process_mode else None
+        # Entries are keyed by model version, which includes the weights' hash, so
+        # a snapshot taken with other weights never matches and just ages out
+        if xray_near_duplicates and settings.xray_near_duplicate_snapshot:
+            snapshot_path = BASE_DIR / settings.xray_near_duplicate_snapshot
+            if snapshot_path.exists():
+                print(f"✓ X-ray near-duplicate index: {xray_near_duplicates.load(snapshot_path)} entries restored")
+        # Forward passes run in the workers in process mode, out of the parent's reach
+        xray_profiler = None if process_mode else XRayProfiler(
+            BASE_DIR / settings.xray_profile_dir,
+            max_inferences=settings.xray_profile_max_inferences
+        )
+
+        def load_xray_service(model_dir, version, defer_warmup=False):
+            # In process mode the parent must not run torch ops before forking, and
+            # workers share its weights, so it stays eager and the workers warm up
+            return XRayService(
+                backend=settings.xray_backend,
+                inference_mode="eager" if process_mode else settings.xray_inference_mode,
+                warmup_iterations=0 if process_mode else settings.xray_warmup_iterations,
+                warmup_batch_sizes=warmup_batch_sizes,
+                result_cache=xray_cache,
+                near_duplicates=xray_near_duplicates,
+                fast_decode=settings.xray_fast_decode,
+                model_dir=model_dir,
+                version=None if version == "default" else version,
+                mmap_weights=settings.xray_mmap_weights,
+                profiler=xray_profiler,
+                cascade_threshold=settings.xray_cascade_threshold,
+                defer_warmup=defer_warmup
+            )
+
+        xray_registry = XRayModelRegistry(
+            BASE_DIR / settings.xray_model_versions_dir,
+            load_xray_service,
+            default_dir=MODELS_DIR,
+            history=settings.xray_model_history
+        )
+        # Thread mode warms up in a startup task (warm_up_xray), once the port is
+        # open; hot-swapped versions are warmed by activate() before the swap
+        xray_service = xray_registry.load_active(defer_warmup=not process_mode)
+        if process_mode:
+            from services.xray_process_pool import XRayProcessPool
+            xray_pool = XRayProcessPool(
+                xray_service,
+                workers=settings.xray_process_workers,
+                threads_per_worker=settings.xray_threads_per_worker,
+                warmup_iterations=settings.xray_warmup_iterations,
+                warmup_batch_sizes=warmup_batch_sizes,
+                max_queue_size=settings.xray_batch_queue_size,
+                max_restarts=settings.xray_process_max_restarts
+            )
+        xray_batcher = XRayBatcher(
+            xray_service,
+            max_batch_size=settings.xray_batch_max_size,
+            max_wait_ms=settings.xray_batch_max_wait_ms,
+            max_queue_size=settings.xray_batch_queue_size,
+            bulk_min_share=settings.xray_bulk_min_share
+        )
+        xray_admission = XRayAdmissionController(
+            max_concurrent=settings.xray_max_concurrent,
+            max_waiting=settings.xray_max_waiting,
+            retry_after_seconds=settings.xray_retry_after_seconds,
+            interactive_reserved=settings.xray_interactive_reserved_slots
+        )
+        xray_audit = XRayAuditWriter(
+            BASE_DIR / settings.xray_audit_dir,
+            max_batch=settings.xray_audit_batch_size,
+            flush_interval_ms=settings.xray_audit_flush_ms
+        ) if settings.xray_audit_enabled else None
+
+        def on_xray_model_swap(service):
+            # New requests pick up the new model; running ones keep the old object
+            global xray_service
+            xray_service = service
+            xray_batcher.service = service
+
+        xray_registry.add_listener(on_xray_model_swap)
+        print("✅ X-ray Binary Classifier loaded (92.6% accuracy)")
+    except Exception as e:
+        print(f"❌ X-ray Service Error: {e}")
+        xray_service = None
+        xray_registry = None
+        xray_batcher = None
+        xray_pool = None
+        xray_admission = None
+        xray_audit = None
+        xray_profiler = None
+
+if "chatbot" in settings.enabled_services:
+    try:
+        from services.chatbot_service import ChatbotService
+        chatbot_service = ChatbotService()
+        print("✅ Heart Health Chatbot loaded")
+    except Exception as e:
+        print(f"❌ Chatbot Service Error: {e}")
+        chatbot_service = None
+
+
+# Scrape-time gauges; they read the current globals, so a model swap or a
+# failed X-ray load is reflected without re-registering anything
+def xray_queue_depth():
+    if xray_pool:
+        # The executor queue is shared by both lanes
+        return {("all",): xray_pool.queue_depth}
+    return {(lane,): stats["queue_depth"] for lane, stats in xray_batcher.stats().items()} if xray_batcher else None
+
+
+def xray_cache_stat(key):
+    cache = xray_service.result_cache if xray_service else None
+    return cache.stats()[key] if cache else None
+
+
+def xray_near_duplicate_stat(key):
+    index = xray_service.near_duplicates if xray_service else None
+    return index.stats()[key] if index else None
+
+
+REGISTRY.gauge("pulsex_xray_queue_depth", "X-ray requests waiting for inference", xray_queue_depth, ("lane",))
+REGISTRY.gauge("pulsex_xray_in_flight", "X-ray requests holding an admission slot",
+               lambda: xray_admission.in_flight if xray_admission else None)
+REGISTRY.gauge("pulsex_xray_waiting", "X-ray requests waiting for an admission slot",
+               lambda: xray_admission.waiting if xray_admission else None)
+REGISTRY.gauge("pulsex_xray_rejected_total", "X-ray requests rejected with 503 (queue full)",
+               lambda: xray_admission.rejected if xray_admission else None, kind="counter")
+REGISTRY.gauge("pulsex_xray_cache_hits_total", "X-ray result cache hits",
+               lambda: xray_cache_stat("hits"), kind="counter")
+REGISTRY.gauge("pulsex_xray_cache_misses_total", "X-ray result cache misses",
+               lambda: xray_cache_stat("misses"), kind="counter")
+REGISTRY.gauge("pulsex_xray_cache_hit_rate", "X-ray result cache hit rate since startup",
+               lambda: xray_cache_stat("hit_rate"))
+REGISTRY.gauge("pulsex_xray_near_duplicate_hits_total", "X-ray results reused from a near-duplicate film",
+               lambda: xray_near_duplicate_stat("hits"), kind="counter")
+REGISTRY.gauge("pulsex_xray_near_duplicate_misses_total", "X-ray near-duplicate index misses",
+               lambda: xray_near_duplicate_stat("misses"), kind="counter")
+REGISTRY.gauge("pulsex_xray_cascade_decisions_total", "X-ray images decided by each cascade stage",
+               lambda: {(stage,): count for stage, count in xray_service.cascade_decisions.items()}
+               if xray_service else None, ("stage",), kind="counter")
+REGISTRY.gauge("pulsex_xray_model_info", "Active X-ray model version (value is always 1)",
+               lambda: {(xray_service.model_version,): 1} if xray_service else None, ("version",))
+
+ZIP_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+# Sniffed upload types, limited to ALLOWED_EXTENSIONS
+XRAY_UPLOAD_TYPES = allowed_types(settings.allowed_extensions) & {'jpeg', 'png'}
+
+
+def extract_zip_images(zip_bytes, max_total_size):
+    """
+    Return (name, bytes) for every image inside a zip archive
+
+    Checked against the sizes declared in the archive before anything is
+    decompressed (zipfile fails a member that inflates past its declared
+    size), so a zip bomb is refused without being unpacked.
+    """
+    members = []
+    total = 0
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or Path(info.filename).suffix.lower() not in ZIP_IMAGE_EXTENSIONS:
+                continue
+            if len(members) >= settings.xray_bulk_max_files:
+                raise ValueError(f"Too many images (max {settings.xray_bulk_max_files})")
+            if info.file_size > settings.max_file_size:
+                raise ValueError(f"{info.filename} exceeds the maximum file size")
+            total += info.file_size
+            if total > max_total_size:
+                raise ValueError(f"Images in the upload exceed {settings.xray_bulk_max_extracted_size} bytes unpacked")
+            members.append(info)
+        return [(info.filename, archive.read(info)) for info in members]
+
+
+def resolve_lane(priority, default):
+    """Priority lane from the X-Priority header, or the endpoint's default"""
+    if priority is None:
+        return default
+    lane = priority.strip().lower()
+    if lane not in LANES:
+        raise HTTPException(status_code=400, detail=f"X-Priority must be one of: {', '.join(LANES)}")
+    return lane
+
+
+def resolve_tta(tta):
+    """TTA factor from the ?tta= query parameter, or XRAY_TTA_DEFAULT"""
+    tta = settings.xray_tta_default if tta is None else tta
+    if tta not in xray_service.TTA_FACTORS:
+        raise HTTPException(status_code=400, detail=f"tta must be one of: {', '.join(map(str, xray_service.TTA_FACTORS))}")
+    return tta
+
+
+def service_status(name, service):
+    """active / inactive (failed to load) / disabled (not in ENABLED_SERVICES)"""
+    if name not in settings.enabled_services:
+        return "disabled"
+    return "active" if service else "inactive"
+
+
+def require_admin(token):
+    """Check X-Admin-Token when ADMIN_TOKEN is configured"""
+    if settings.admin_token and not hmac.compare_digest(token or "", settings.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid or missing X-Admin-Token")
+
 
 # Pydantic models for chatbot
 class ChatbotRequest(BaseModel):
@@ -58,6 +303,10 @@ class ChatbotRequest(BaseModel):
     user_data: Optional[Dict[str, Any]] = None
 
 
+class ProfileRequest(BaseModel):
+    inferences: int = 10
+
+
 # ENDPOINTS
 @app.get("/", tags=["System"])
 async def root():
@@ -74,46 +323,90 @@ async def root():
 
 @app.get("/health", tags=["System"])
 async def health_check():
-    return {
-        "status": "healthy",
+    """
+    503 while the X-ray model is still warming up, so readiness probes hold
+    traffic back, and once process-mode workers can't be brought back
+    """
+    if "xray" not in settings.enabled_services:
+        xray_status = "disabled"
+    elif not xray_service:
+        xray_status = "inactive"
+    elif not xray_service.ready:
+        xray_status = "warming_up"
+    elif xray_pool:
+        # degraded: lost workers are being re-forked; failed: restarts used up
+        xray_status = {"ok": "active", "restarting": "degraded", "failed": "failed"}[xray_pool.state]
+    else:
+        xray_status = "active"
+
+    body = {
+        "status": {"warming_up": "warming_up", "failed": "unhealthy"}.get(xray_status, "healthy"),
         "timestamp": datetime.now().isoformat(),
         "services": {
-            "xray_binary": "active" if xray_service else "inactive",
-            "chatbot": "active" if chatbot_service else "inactive",
-            "ecg_storage": "active"
-        }
+            "xray_binary": xray_status,
+            "chatbot": service_status("chatbot", chatbot_service),
+            "ecg_storage": service_status("ecg", True)
+        },
+        "xray_inference": {
+            "backend": xray_service.backend,
+            "mode": xray_service.inference_mode,
+            "serving": f"process x{xray_pool.workers}" if xray_pool else "thread",
+            "workers": xray_pool.status() if xray_pool else None,
+            "admission": xray_admission.stats(),
+            "lanes": (xray_pool or xray_batcher).stats(),
+            "torch_threads": {"intra_op": torch_threads[0], "inter_op": torch_threads[1]},
+            "model_version": xray_service.model_version,
+            "cascade": xray_service.cascade_status(),
+            "registry": xray_registry.status(),
+            "cache": xray_service.result_cache.stats() if xray_service.result_cache else None,
+            "near_duplicates": xray_service.near_duplicates.stats() if xray_service.near_duplicates else None
+        } if xray_service else None
     }
+    if xray_status in ("warming_up", "failed"):
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
+@app.get("/metrics", tags=["System"], include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
-@app.post("/api/xray/analyze", tags=["X-ray Analysis"])
-async def analyze_xray(file: UploadFile = File(...)):
+@app.post("/api/xray/analyze", tags=["X-ray Analysis"], openapi_extra=multipart_body("file"))
+async def analyze_xray(request: Request, x_priority: Optional[str] = Header(None),
+                       tta: Optional[int] = Query(None)):
     """
     Binary X-ray Classification: Normal vs Abnormal (92.6% accuracy)
     Replaces old DenseNet121 multi-class classifier
+    Runs in the interactive lane unless sent with X-Priority: bulk
+    ?tta=2|5|10 averages the logits of flipped/cropped views (one forward pass)
+    The upload is read as a stream: 413 once it passes MAX_FILE_SIZE, 400
+    as soon as its first bytes are not a JPEG or PNG
     """
     if not xray_service:
         raise HTTPException(status_code=503, detail="X-ray service not initialized")
-    
-    if not file.content_type.startswith('image/'):
-        raise HTTPException(status_code=400, detail="Invalid file type")
 
-    file_id = str(uuid.uuid4())
-    file_ext = Path(file.filename).suffix.lower()
-    temp_path = XRAY_TEMP_DIR / f"{file_id}{file_ext}"
+    lane = resolve_lane(x_priority, "interactive")
+    tta = resolve_tta(tta)
 
     try:
-        await file.seek(0)
-        image_bytes = await file.read()
-        
-        with open(temp_path, "wb") as buffer:
-            buffer.write(image_bytes)
-        
-        # Run synchronous ML inference in thread pool to avoid blocking event loop
-        import asyncio
-        result = await asyncio.to_thread(xray_service.analyze_xray, image_bytes, file.filename)
+        # The same bytes object is hashed, decoded (BytesIO shares it) and,
+        # if enabled, queued for audit
+        with XRAY_STAGE_SECONDS.time('upload_read'):
+            file = (await read_files(request, "file", settings.max_file_size, XRAY_UPLOAD_TYPES, strict=True))[0]
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    image_bytes = file.data
+
+    try:
+        # Process mode: decode + forward in a forked worker. Thread mode:
+        # decode in the thread pool, then share a batched forward pass
+        async with xray_admission.slot(lane):
+            result = await (xray_pool or xray_batcher).analyze(image_bytes, file.filename, lane=lane, tta=tta)
         
-        if temp_path.exists():
-            temp_path.unlink()
+        if xray_audit:
+            xray_audit.submit(image_bytes, file.filename, result)
 
         return {
             "success": True,
@@ -121,44 +414,312 @@ async def analyze_xray(file: UploadFile = File(...)):
             "timestamp": datetime.now().isoformat()
         }
     
+    except XRayQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(xray_admission.retry_after_seconds)}
+        )
     except Exception as e:
-        if temp_path.exists(): 
-            temp_path.unlink()
         raise HTTPException(status_code=500, detail=f"Analysis Error: {str(e)}")
 
 
-@app.post("/api/ecg/upload", tags=["ECG Storage"])
-async def upload_ecg(file: UploadFile = File(...)):
-    """Upload ECG file for secure storage"""
-    allowed_extensions = {'.png', '.jpg', '.jpeg', '.pdf'}
-    file_ext = Path(file.filename).suffix.lower()
-    
-    if file_ext not in allowed_extensions:
-        raise HTTPException(status_code=400, detail="Only PNG, JPG, JPEG, PDF allowed")
+@app.post("/api/xray/analyze/batch", tags=["X-ray Analysis"], openapi_extra=multipart_body("files", multiple=True))
+async def analyze_xray_batch(request: Request, x_priority: Optional[str] = Header(None),
+                             tta: Optional[int] = Query(None)):
+    """
+    Bulk X-ray Classification for PACS exports
+    Accepts many image files and/or zip archives of images; returns one
+    result per image in upload order
+    Runs in the bulk lane unless sent with X-Priority: interactive
+    """
+    if not xray_service:
+        raise HTTPException(status_code=503, detail="X-ray service not initialized")
 
-    file_id = str(uuid.uuid4())
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_filename = f"ecg_{timestamp}_{file_id}{file_ext}"
-    save_path = ECG_DIR / unique_filename
+    lane = resolve_lane(x_priority, "bulk")
+    tta = resolve_tta(tta)
+
+    try:
+        with XRAY_STAGE_SECONDS.time('upload_read'):
+            files = await read_files(
+                request, "files", settings.max_file_size, XRAY_UPLOAD_TYPES | {'zip'},
+                max_files=settings.xray_bulk_max_files,
+                size_limits={'zip': settings.xray_bulk_max_archive_size},
+                max_body_size=settings.xray_bulk_max_body_size
+            )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
 
     try:
-        with open(save_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        filenames = []
+        images = []
+        # Shared by every archive in the upload
+        unpack_budget = settings.xray_bulk_max_extracted_size
+        for upload in files:
+            if upload.kind == 'zip':
+                extracted = await asyncio.to_thread(extract_zip_images, upload.data, unpack_budget)
+                for name, image_bytes in extracted:
+                    filenames.append(name)
+                    images.append(image_bytes)
+                    unpack_budget -= len(image_bytes)
+            else:
+                filenames.append(upload.filename)
+                # Files that are not JPEG/PNG come back as per-file failures
+                images.append(upload.data)
+
+            if len(images) > settings.xray_bulk_max_files:
+                raise HTTPException(status_code=400, detail=f"Too many images (max {settings.xray_bulk_max_files})")
+
+        if not images:
+            raise HTTPException(status_code=400, detail="No images found in upload")
+
+        # A bulk job holds one slot for its whole run; XRAY_INTERACTIVE_RESERVED_SLOTS
+        # of them are out of its reach, so interactive uploads still get in
+        async with xray_admission.slot(lane):
+            if xray_pool:
+                results = await xray_pool.analyze_batch(
+                    images, batch_size=settings.xray_batch_max_size, lane=lane, tta=tta
+                )
+            else:
+                # Shares forward passes with interactive uploads via the batcher lanes
+                results = await xray_batcher.analyze_many(
+                    images, lane=lane, decode_workers=settings.xray_decode_workers, tta=tta
+                )
+
+        if xray_audit:
+            for name, image_bytes, result in zip(filenames, images, results):
+                if image_bytes is not None:
+                    xray_audit.submit(image_bytes, name, result)
+
+        return {
+            "success": True,
+            "count": len(results),
+            "results": [
+                {"filename": name, "result": result}
+                for name, result in zip(filenames, results)
+            ],
+            "timestamp": datetime.now().isoformat()
+        }
+
+    except HTTPException:
+        raise
+    except XRayQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(xray_admission.retry_after_seconds)}
+        )
+    except (zipfile.BadZipFile, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch upload: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis Error: {str(e)}")
+
+
+@app.post("/api/ecg/upload", tags=["ECG Storage"], openapi_extra=multipart_body("file"))
+async def upload_ecg(request: Request, patient_ref: Optional[str] = Query(None, max_length=128)):
+    """
+    Upload ECG file for secure storage
+    Streamed to a temp file off the event loop (sha256, size and magic-byte
+    check in the same pass), then stored once per distinct content under
+    uploads/ecg/blobs/; "filename" stays the per-upload name, "path" is the blob
+    ?patient_ref= files it under a patient in the catalog (GET /api/ecg)
+    """
+    if "ecg" not in settings.enabled_services:
+        raise HTTPException(status_code=503, detail="ECG storage is not enabled in this deployment")
+
+    try:
+        stored = await ecg_storage.ingest(request, patient_ref=patient_ref)
         
         return {
             "success": True,
             "message": "ECG uploaded successfully",
             "file_info": {
-                "filename": unique_filename,
-                "path": f"uploads/ecg/{unique_filename}",
-                "size_mb": round(save_path.stat().st_size / (1024 * 1024), 2),
+                "id": stored.id,
+                "filename": stored.filename,
+                "path": stored.path.relative_to(BASE_DIR).as_posix(),
+                "size_mb": round(stored.size / (1024 * 1024), 2),
+                "sha256": stored.sha256,
+                "deduplicated": stored.deduplicated,
+                "download_url": f"/api/ecg/{stored.id}/file",
                 "timestamp": datetime.now().isoformat()
             }
         }
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload Error: {str(e)}")
 
 
+@app.get("/api/ecg", tags=["ECG Storage"])
+async def list_ecgs(patient_ref: Optional[str] = Query(None, max_length=128),
+                    limit: int = Query(50, ge=1), cursor: Optional[str] = Query(None)):
+    """
+    Stored ECGs, newest first, optionally for one patient
+    Keyset-paginated: pass next_cursor back as ?cursor= for the next page
+    Uploads are listed as soon as they are stored
+    """
+    if "ecg" not in settings.enabled_services:
+        raise HTTPException(status_code=503, detail="ECG storage is not enabled in this deployment")
+
+    try:
+        items, next_cursor = await ecg_catalog.list(
+            limit=min(limit, settings.ecg_list_max_limit), cursor=cursor, patient_ref=patient_ref
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "success": True,
+        "count": len(items),
+        "items": items,
+        "next_cursor": next_cursor
+    }
+
+
+@app.get("/api/ecg/{upload_id}", tags=["ECG Storage"])
+async def get_ecg(upload_id: str):
+    """Catalog entry for one stored ECG"""
+    if "ecg" not in settings.enabled_services:
+        raise HTTPException(status_code=503, detail="ECG storage is not enabled in this deployment")
+
+    entry = await ecg_catalog.get(upload_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="ECG not found")
+    return {"success": True, "ecg": entry}
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@app.api_route("/api/ecg/{upload_id}/file", methods=["GET", "HEAD"], tags=["ECG Storage"])
+async def download_ecg(upload_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Stored ECG file, inline
+    The ETag is the content's sha256, so If-None-Match gets a 304 whenever
+    the client already has these bytes; Range requests (206) let viewers
+    page through large PDFs
+    """
+    if "ecg" not in settings.enabled_services:
+        raise HTTPException(status_code=503, detail="ECG storage is not enabled in this deployment")
+
+    stored = await ecg_storage.find(upload_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="ECG not found")
+
+    # Clients may keep the file but must revalidate, so a removed upload stops being served
+    headers = {"ETag": f'"{stored.sha256}"', "Cache-Control": "private, no-cache"}
+    if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    # Starlette handles Range/If-Range, and hands the path to the server
+    # for zero-copy sending where it supports the ASGI pathsend extension
+    return FileResponse(
+        stored.path,
+        media_type=MEDIA_TYPES.get(stored.kind),
+        filename=stored.filename,
+        content_disposition_type="inline",
+        headers=headers
+    )
+
+
+@app.get("/api/admin/xray/models", tags=["Admin"])
+async def list_xray_models(x_admin_token: Optional[str] = Header(None)):
+    """Published X-ray model versions and the active/rollback state"""
+    require_admin(x_admin_token)
+    if not xray_registry:
+        raise HTTPException(status_code=503, detail="X-ray service not initialized")
+
+    versions = await asyncio.to_thread(xray_registry.versions)
+    return {"status": xray_registry.status(), "versions": versions}
+
+
+@app.post("/api/admin/xray/models/publish", tags=["Admin"])
+async def publish_xray_model(x_admin_token: Optional[str] = Header(None)):
+    """
+    Snapshot models/xray_binary_model.pth + binary_metadata.json (as left
+    by train_enhanced.py) into a new immutable version
+    """
+    require_admin(x_admin_token)
+    if not xray_registry:
+        raise HTTPException(status_code=503, detail="X-ray service not initialized")
+
+    try:
+        version = await asyncio.to_thread(xray_registry.publish, MODELS_DIR)
+    except (FileNotFoundError, FileExistsError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"success": True, "version": version}
+
+
+@app.post("/api/admin/xray/models/{version}/activate", tags=["Admin"])
+async def activate_xray_model(version: str, x_admin_token: Optional[str] = Header(None)):
+    """Load and warm a version in the background, then swap it in"""
+    require_admin(x_admin_token)
+    if not xray_registry:
+        raise HTTPException(status_code=503, detail="X-ray service not initialized")
+    if xray_pool:
+        raise HTTPException(status_code=409, detail="Hot-swap is not available in process serving mode")
+
+    try:
+        service = await xray_registry.activate(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model load failed, still serving {xray_registry.current_version}: {str(e)}")
+
+    return {"success": True, "model_version": service.model_version, "status": xray_registry.status()}
+
+
+@app.post("/api/admin/xray/models/rollback", tags=["Admin"])
+async def rollback_xray_model(x_admin_token: Optional[str] = Header(None)):
+    """Swap back to the previously active version (kept loaded)"""
+    require_admin(x_admin_token)
+    if not xray_registry:
+        raise HTTPException(status_code=503, detail="X-ray service not initialized")
+    if xray_pool:
+        raise HTTPException(status_code=409, detail="Hot-swap is not available in process serving mode")
+
+    try:
+        xray_registry.rollback()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {"success": True, "model_version": xray_registry.current.model_version, "status": xray_registry.status()}
+
+
+@app.get("/api/admin/xray/profile", tags=["Admin"])
+async def xray_profile_status(x_admin_token: Optional[str] = Header(None)):
+    """Profiler window state and the last finished capture"""
+    require_admin(x_admin_token)
+    if not xray_profiler:
+        raise HTTPException(status_code=503, detail="X-ray profiler not available")
+    return xray_profiler.status()
+
+
+@app.post("/api/admin/xray/profile", tags=["Admin"])
+async def start_xray_profile(request: ProfileRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Profile the next N X-ray forward passes with torch.profiler
+    Writes a Chrome trace per pass plus summary.txt under XRAY_PROFILE_DIR
+    """
+    require_admin(x_admin_token)
+    if xray_pool:
+        raise HTTPException(status_code=409, detail="Profiling is not available in process serving mode")
+    if not xray_profiler:
+        raise HTTPException(status_code=503, detail="X-ray profiler not available")
+
+    try:
+        return xray_profiler.arm(request.inferences)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @app.post("/api/chatbot", tags=["Heart Health Chatbot"])
 async def chatbot(request: ChatbotRequest):
     """
@@ -183,19 +744,50 @@ async def not_found(request: Request, exc):
         status_code=404,
         content={
             "error": "Not Found",
-            "available": ["/api/xray/analyze", "/api/ecg/upload", "/api/chatbot"]
+            "available": ["/api/xray/analyze", "/api/xray/analyze/batch", "/api/ecg/upload", "/api/ecg", "/api/chatbot"]
         }
     )
 
+async def warm_up_xray():
+    """Warm-up passes for the service loaded at import; it reports ready when they finish"""
+    try:
+        await asyncio.to_thread(xray_service.warmup, settings.xray_warmup_iterations, warmup_batch_sizes)
+    except Exception as e:
+        # Never ready, so /health keeps failing and the orchestrator restarts the pod
+        print(f"❌ X-ray warm-up failed: {e}")
+
+
+xray_warmup = None
+
+
 @app.on_event("startup")
 async def startup():
+    global xray_warmup
     print("=" * 70)
     print("PulseX AI Service v3.0.0")
     print("=" * 70)
-    print(f"✓ X-ray Binary Classifier: {'Active' if xray_service else 'Inactive'}")
-    print(f"✓ Heart Health Chatbot: {'Active' if chatbot_service else 'Inactive'}")
-    print(f"✓ ECG Storage: Active")
+    print(f"✓ X-ray Binary Classifier: {service_status('xray', xray_service).title()}")
+    print(f"✓ Heart Health Chatbot: {service_status('chatbot', chatbot_service).title()}")
+    print(f"✓ ECG Storage: {service_status('ecg', True).title()}")
     print("=" * 70)
+    if xray_service and not xray_service.ready:
+        xray_warmup = asyncio.create_task(warm_up_xray())
+
+@app.on_event("shutdown")
+async def shutdown():
+    if xray_batcher:
+        await xray_batcher.close()
+    if xray_pool:
+        xray_pool.close()
+    if xray_audit:
+        await xray_audit.close()
+    if ecg_catalog:
+        ecg_catalog.close()
+    if ecg_storage:
+        ecg_storage.close()
+    if xray_service and xray_service.near_duplicates and settings.xray_near_duplicate_snapshot:
+        saved = xray_service.near_duplicates.save(BASE_DIR / settings.xray_near_duplicate_snapshot)
+        print(f"✓ X-ray near-duplicate index: {saved} entries saved")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Build the INT8 X-ray model and report its latency and agreement with fp32
+
+Usage:
+    python3 quantize_model.py --calibration-dir data/calib --holdout-dir data/test
+
+Writes models/xray_binary_model_int8.pt (TorchScript) and
+models/xray_binary_model_int8.json (engine, latency, agreement report).
+Enable it with XRAY_BACKEND=int8.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import torch
+
+from services.xray_service import XRayService, MODELS_DIR
+from services.xray_quantization import (
+    find_images, load_image_tensors, quantize_model, save_quantized_model
+)
+
+
+def measure_latency(model, batch, runs):
+    """Median and mean wall time (ms) of model(batch)"""
+    timings = []
+    with torch.no_grad():
+        model(batch)  # warm-up
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(batch)
+            timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean_ms": round(statistics.mean(timings), 2),
+        "p50_ms": round(statistics.median(timings), 2),
+    }
+
+
+def predict(model, tensors, batch_size=16):
+    """Softmax probabilities for a list of preprocessed images"""
+    outputs = []
+    with torch.no_grad():
+        for start in range(0, len(tensors), batch_size):
+            logits = model(torch.stack(tensors[start:start + batch_size]))
+            outputs.append(torch.softmax(logits, dim=1))
+    return torch.cat(outputs)
+
+
+def label_for(path):
+    """Ground truth from XRayDataset folder layout (NORMAL=1, PNEUMONIA=0), if present"""
+    parts = {part.upper() for part in path.parts}
+    if 'NORMAL' in parts:
+        return 1
+    if 'PNEUMONIA' in parts:
+        return 0
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 post-training quantization for the X-ray model")
+    parser.add_argument("--calibration-dir", required=True, help="Folder of representative X-ray images")
+    parser.add_argument("--holdout-dir", help="Folder of held-out images for the agreement report")
+    parser.add_argument("--num-calibration", type=int, default=200)
+    parser.add_argument("--num-holdout", type=int, default=500)
+    parser.add_argument("--engine", default=torch.backends.quantized.engine,
+                        help="Quantized backend: x86, fbgemm or qnnpack")
+    parser.add_argument("--latency-runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print("🔧 INT8 Quantization for X-ray Classifier")
+    print("=" * 60)
+
+    service = XRayService(backend='fp32')
+    fp32_model = service.model.cpu().eval()
+
+    calibration_paths = find_images(args.calibration_dir, args.num_calibration)
+    print(f"\n📁 Calibrating on {len(calibration_paths)} images from {args.calibration_dir}")
+    calibration = load_image_tensors(calibration_paths, service.transform)
+
+    int8_model = quantize_model(fp32_model, calibration, engine=args.engine)
+
+    model_path = MODELS_DIR / 'xray_binary_model_int8.pt'
+    save_quantized_model(int8_model, model_path, calibration[0].unsqueeze(0))
+    print(f"✅ INT8 model saved to {model_path}")
+
+    report = {
+        "engine": args.engine,
+        "calibration_images": len(calibration),
+        "created": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "latency": {},
+    }
+
+    # Latency: batch of 1 (interactive) and 8 (batched serving)
+    for batch_size in (1, 8):
+        batch = torch.stack([calibration[i % len(calibration)] for i in range(batch_size)])
+        report["latency"][f"batch_{batch_size}"] = {
+            "fp32": measure_latency(fp32_model, batch, args.latency_runs),
+            "int8": measure_latency(int8_model, batch, args.latency_runs),
+        }
+
+    # Agreement with fp32 on held-out images
+    if args.holdout_dir:
+        holdout_paths = find_images(args.holdout_dir, args.num_holdout)
+        holdout = load_image_tensors(holdout_paths, service.transform)
+        fp32_probs = predict(fp32_model, holdout)
+        int8_probs = predict(int8_model, holdout)
+
+        fp32_pred = fp32_probs.argmax(dim=1)
+        int8_pred = int8_probs.argmax(dim=1)
+        report["holdout_images"] = len(holdout)
+        report["agreement"] = (fp32_pred == int8_pred).float().mean().item()
+        report["mean_abs_prob_diff"] = (fp32_probs - int8_probs).abs().mean().item()
+
+        labels = [label_for(path) for path in holdout_paths]
+        if all(label is not None for label in labels):
+            truth = torch.tensor(labels)
+            report["accuracy"] = {
+                "fp32": (fp32_pred == truth).float().mean().item(),
+                "int8": (int8_pred == truth).float().mean().item(),
+            }
+
+    report_path = MODELS_DIR / 'xray_binary_model_int8.json'
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n📊 LATENCY (ms)")
+    print("-" * 60)
+    for name, result in report["latency"].items():
+        fp32, int8 = result["fp32"], result["int8"]
+        speedup = fp32["p50_ms"] / int8["p50_ms"] if int8["p50_ms"] else 0
+        print(f"{name:10} fp32 {fp32['p50_ms']:8.1f}   int8 {int8['p50_ms']:8.1f}   ({speedup:.2f}x)")
+
+    if "agreement" in report:
+        print(f"\n🎯 Agreement with fp32: {report['agreement']*100:.2f}% "
+              f"({report['holdout_images']} images, mean |Δp| {report['mean_abs_prob_diff']:.4f})")
+    if "accuracy" in report:
+        print(f"   Accuracy fp32 {report['accuracy']['fp32']*100:.2f}%  "
+              f"int8 {report['accuracy']['int8']*100:.2f}%")
+
+    print(f"\n✅ Report saved to {report_path}")
+    print("   Set XRAY_BACKEND=int8 to serve the quantized model")
+
+
+if __name__ == "__main__":
+    main()
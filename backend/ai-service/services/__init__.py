@@ -1,8 +1,30 @@
 """
 PulseX AI Services Module
+
+Services are imported lazily (PEP 562), so importing one submodule such as
+services.chatbot_service doesn't pull in torch/torchvision for the X-ray
+service.
 """
 
-from .xray_service import XRayService
-from .chatbot_service import ChatbotService
+import importlib
+
+_EXPORTS = {
+    'XRayService': '.xray_service',
+    'XRayBatcher': '.xray_batcher',
+    'XRayQueueFullError': '.xray_batcher',
+    'ChatbotService': '.chatbot_service',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ['XRayService', 'ChatbotService']
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,109 @@
+"""
+Searchable catalog of stored ECGs
+Keyset-paginated listing over the ECG store's own index, so the catalog is
+always exactly what the store holds
+"""
+
+import asyncio
+import base64
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .ecg_storage import INDEX_FILE
+
+# One catalog row: the upload (patient, filenames, timestamp) and its blob (size, hash, type)
+_SELECT = (
+    "SELECT u.id, u.patient_ref, u.filename, u.original_filename, b.size, u.sha256, b.kind, u.uploaded_at "
+    "FROM uploads u JOIN blobs b ON b.sha256 = u.sha256"
+)
+
+
+def encode_cursor(row):
+    """Opaque cursor for the position after `row` (newest first ordering)"""
+    return base64.urlsafe_b64encode(json.dumps([row["uploaded_at"], row["id"]]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        uploaded_at, upload_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(uploaded_at), str(upload_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class ECGCatalog:
+    """
+    Keyset-paginated reader for the ECG store
+
+    The catalog is the store's uploads table (ECGStorage writes the
+    patient reference with the upload, in the same transaction), so an
+    upload is listed as soon as it is stored and disappears with
+    ECGStorage.remove(); there is no second copy to keep in sync.
+
+    Queries run on a single catalog thread with their own connection (WAL
+    lets it read while uploads are committed), never asyncio's default
+    executor, which X-ray decoding uses. Listing walks the (uploaded_at,
+    id) or (patient_ref, uploaded_at, id) index from the cursor, so every
+    page costs O(log n) however large the archive is.
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Root of the ECG store (opened by ECGStorage first, which creates the index)
+        """
+        self.path = Path(directory) / INDEX_FILE
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ecg-catalog")
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+
+    async def get(self, upload_id):
+        """Catalog row for an upload id, or None"""
+        return await self._run(self._get, upload_id)
+
+    async def list(self, limit=50, cursor=None, patient_ref=None):
+        """
+        One page of uploads, newest first
+
+        Args:
+            limit: Rows per page
+            cursor: next_cursor from the previous page
+            patient_ref: Only this patient's uploads
+
+        Returns:
+            (rows, next_cursor) - next_cursor is None on the last page
+
+        Raises:
+            ValueError: Malformed cursor
+        """
+        after = decode_cursor(cursor) if cursor else None
+        rows = await self._run(self._list, limit + 1, after, patient_ref)
+        if len(rows) > limit:
+            return rows[:limit], encode_cursor(rows[limit - 1])
+        return rows, None
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+    def _run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _get(self, upload_id):
+        row = self._db.execute(f"{_SELECT} WHERE u.id = ?", (upload_id,)).fetchone()
+        return dict(row) if row else None
+
+    def _list(self, limit, after, patient_ref):
+        conditions, params = [], []
+        if patient_ref is not None:
+            conditions.append("u.patient_ref = ?")
+            params.append(patient_ref)
+        if after is not None:
+            conditions.append("(u.uploaded_at, u.id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"{_SELECT} {where} ORDER BY u.uploaded_at DESC, u.id DESC LIMIT ?"
+        return [dict(row) for row in self._db.execute(query, (*params, limit))]
@@ -0,0 +1,306 @@
+"""
+ECG file storage
+Uploads are streamed to disk chunk by chunk on a dedicated I/O thread pool,
+hashed and type-checked in the same pass, and renamed into place only once
+complete, so the event loop never blocks on a large PDF.
+
+Files are stored content-addressed: blobs/<h[0:2]>/<h[2:4]>/<sha256>, one
+copy per distinct content however often it is uploaded. A SQLite index maps
+each upload id to its blob and keeps a reference count per blob; its uploads
+table is also the catalog that ECGCatalog lists.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from .uploads import MULTIPART_OVERHEAD, SNIFF_BYTES, TYPE_EXTENSIONS, UploadError, multipart_events, sniff_type
+
+
+INDEX_FILE = "index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    refcount INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS uploads (
+    id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL REFERENCES blobs (sha256),
+    filename TEXT NOT NULL,
+    original_filename TEXT,
+    uploaded_at TEXT NOT NULL,
+    patient_ref TEXT
+) WITHOUT ROWID;
+"""
+
+# Keyset pagination for ECGCatalog, newest first, overall or per patient
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS uploads_time ON uploads (uploaded_at, id);
+CREATE INDEX IF NOT EXISTS uploads_patient ON uploads (patient_ref, uploaded_at, id);
+"""
+
+
+class StoredECG:
+    """One upload: its logical id/filename and the blob holding its content"""
+
+    def __init__(self, id, filename, path, size, sha256, kind, original_filename, uploaded_at, deduplicated=False,
+                 patient_ref=None):
+        self.id = id
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.kind = kind
+        self.original_filename = original_filename
+        self.uploaded_at = uploaded_at
+        self.deduplicated = deduplicated
+        self.patient_ref = patient_ref
+
+
+class ECGStorage:
+    """
+    Streams multipart ECG uploads into a content-addressed, deduplicating store
+
+    File I/O runs on its own small thread pool rather than asyncio's default
+    executor, which X-ray decoding uses: many slow ECG uploads in flight
+    only ever occupy io_workers threads and never queue ahead of a decode.
+
+    Two-level hash-prefix shards keep every directory small (65536 shards),
+    so lookups and renames don't slow down as the archive grows.
+    """
+
+    def __init__(self, directory, max_file_size, extensions, io_workers=4, write_buffer_size=1024 * 1024):
+        """
+        Args:
+            directory: Root of the store (blobs/, tmp/ and the index live here)
+            max_file_size: Largest accepted file, in bytes
+            extensions: Accepted extensions (settings.allowed_extensions)
+            io_workers: Threads writing uploads to disk
+            write_buffer_size: Bytes collected from the stream before each write
+        """
+        self.directory = Path(directory)
+        self.blob_dir = self.directory / "blobs"
+        self.temp_dir = self.directory / "tmp"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.temp_dir.mkdir(exist_ok=True)
+        self.max_file_size = max_file_size
+        self.extensions = {extension.lower().lstrip('.') for extension in extensions}
+        self.write_buffer_size = max(SNIFF_BYTES, write_buffer_size)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, io_workers), thread_name_prefix="ecg-io")
+
+        # One connection shared by the I/O threads; the lock makes each
+        # blob check + rename + refcount update atomic
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.directory / INDEX_FILE, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        if "patient_ref" not in {row[1] for row in self._db.execute("PRAGMA table_info(uploads)")}:
+            # Index written before uploads carried the patient reference
+            self._db.execute("ALTER TABLE uploads ADD COLUMN patient_ref TEXT")
+        self._db.executescript(_INDEXES)
+
+    async def ingest(self, request, field="file", patient_ref=None):
+        """
+        Store the file part `field` of a multipart request, filed under patient_ref
+
+        Returns:
+            StoredECG
+
+        Raises:
+            UploadError: 400 for a disallowed extension or content that does
+                         not match it, 413 past max_file_size, 422 when the
+                         field is missing
+        """
+        stored = None
+        writer = None
+        events = multipart_events(request, self.max_file_size + MULTIPART_OVERHEAD)
+        try:
+            async for event in events:
+                if event[0] == 'begin':
+                    _, name, filename, _ = event
+                    if name == field and filename is not None:
+                        writer = _ECGWriter(self, filename, patient_ref)
+                elif writer is not None:
+                    if event[0] == 'data':
+                        await writer.write(event[1])
+                    else:
+                        # Anything after the file is not needed
+                        stored = await writer.finish()
+                        break
+        finally:
+            await events.aclose()
+            if writer is not None and stored is None:
+                await self._run(writer.discard)
+
+        if stored is None:
+            raise UploadError(f"Field '{field}' is required", 422)
+        return stored
+
+    def blob_path(self, sha256):
+        return self.blob_dir / sha256[:2] / sha256[2:4] / sha256
+
+    def get(self, upload_id):
+        """StoredECG for an upload id, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT u.id, u.filename, u.sha256, b.size, b.kind, u.original_filename, u.uploaded_at, u.patient_ref "
+                "FROM uploads u JOIN blobs b ON b.sha256 = u.sha256 WHERE u.id = ?", (upload_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        upload_id, filename, sha256, size, kind, original_filename, uploaded_at, patient_ref = row
+        return StoredECG(upload_id, filename, self.blob_path(sha256), size, sha256, kind, original_filename, uploaded_at,
+                         patient_ref=patient_ref)
+
+    async def find(self, upload_id):
+        """get() on the I/O pool, for use from request handlers"""
+        return await self._run(self.get, upload_id)
+
+    def remove(self, upload_id):
+        """
+        Drop an upload; its blob is deleted with the last reference
+
+        Returns:
+            False if the id is unknown
+        """
+        with self._lock:
+            row = self._db.execute("SELECT sha256 FROM uploads WHERE id = ?", (upload_id,)).fetchone()
+            if row is None:
+                return False
+            sha256 = row[0]
+            with self._db:
+                self._db.execute("DELETE FROM uploads WHERE id = ?", (upload_id,))
+                self._db.execute("UPDATE blobs SET refcount = refcount - 1 WHERE sha256 = ?", (sha256,))
+                orphaned = self._db.execute("DELETE FROM blobs WHERE sha256 = ? AND refcount <= 0", (sha256,)).rowcount
+            if orphaned:
+                self.blob_path(sha256).unlink(missing_ok=True)
+        return True
+
+    def _commit(self, temp_path, sha256, size, kind, upload_id, filename, original_filename, uploaded_at,
+                patient_ref=None):
+        """Move a finished temp file to its blob (or drop it as a duplicate) and index the upload"""
+        blob_path = self.blob_path(sha256)
+        with self._lock:
+            known = self._db.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            # A blob file without a row is left over from a crash mid-commit; renaming replaces it
+            if known and blob_path.exists():
+                os.unlink(temp_path)
+            else:
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temp_path, blob_path)
+
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO blobs (sha256, size, kind, refcount) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (sha256) DO UPDATE SET refcount = refcount + 1",
+                    (sha256, size, kind)
+                )
+                self._db.execute(
+                    "INSERT INTO uploads (id, sha256, filename, original_filename, uploaded_at, patient_ref) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (upload_id, sha256, filename, original_filename, uploaded_at, patient_ref)
+                )
+        return blob_path, bool(known)
+
+    def _run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+
+class _ECGWriter:
+    """One upload in progress: buffered writes to a temp file, hashed as they go"""
+
+    def __init__(self, storage, original_filename, patient_ref=None):
+        extension = Path(original_filename).suffix.lower()
+        if extension.lstrip('.') not in storage.extensions:
+            allowed = ", ".join(sorted(storage.extensions)).upper()
+            raise UploadError(f"Only {allowed} allowed")
+
+        self.storage = storage
+        self.original_filename = original_filename
+        self.patient_ref = patient_ref
+        self.extension = extension
+        self.kind = None
+        self.size = 0
+        self.buffer = []
+        self.buffered = 0
+        self.hasher = hashlib.sha256()
+        # Same filesystem as the blobs, so the rename is atomic
+        self.temp_path = storage.temp_dir / f"{uuid.uuid4()}.part"
+        self.handle = None
+
+    async def write(self, data):
+        self.size += len(data)
+        if self.size > self.storage.max_file_size:
+            raise UploadError(f"{self.original_filename} exceeds the maximum file size", 413)
+
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.kind is None and self.size >= SNIFF_BYTES:
+            self._check_type()
+        if self.buffered >= self.storage.write_buffer_size:
+            await self._flush()
+
+    async def finish(self):
+        """Flush, fsync and move into the store"""
+        if self.kind is None:
+            self._check_type()
+        await self._flush()
+        await self.storage._run(self._close)
+
+        # Same logical filename format as the old flat layout
+        uploaded_at = datetime.now()
+        upload_id = str(uuid.uuid4())
+        filename = f"ecg_{uploaded_at.strftime('%Y%m%d_%H%M%S')}_{upload_id}{self.extension}"
+        sha256 = self.hasher.hexdigest()
+        path, deduplicated = await self.storage._run(
+            self.storage._commit, self.temp_path, sha256, self.size, self.kind,
+            upload_id, filename, self.original_filename, uploaded_at.isoformat(), self.patient_ref
+        )
+        return StoredECG(upload_id, filename, path, self.size, sha256, self.kind,
+                         self.original_filename, uploaded_at.isoformat(), deduplicated, self.patient_ref)
+
+    def _check_type(self):
+        kind = sniff_type(b''.join(self.buffer)[:SNIFF_BYTES])
+        if kind is None or self.extension.lstrip('.') not in TYPE_EXTENSIONS[kind]:
+            raise UploadError(f"{self.original_filename} content does not match its extension")
+        self.kind = kind
+
+    async def _flush(self):
+        if not self.buffer:
+            return
+        data = b''.join(self.buffer)
+        self.buffer, self.buffered = [], 0
+        await self.storage._run(self._write, data)
+
+    def _write(self, data):
+        # Runs on the I/O pool; hashlib releases the GIL on large buffers
+        if self.handle is None:
+            self.handle = open(self.temp_path, 'xb')
+        self.hasher.update(data)
+        self.handle.write(data)
+
+    def _close(self):
+        if self.handle is None:
+            self.handle = open(self.temp_path, 'xb')
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+        self.handle.close()
+
+    def discard(self):
+        """Remove the partial temp file of a rejected or aborted upload"""
+        if self.handle is not None:
+            self.handle.close()
+        self.temp_path.unlink(missing_ok=True)
@@ -0,0 +1,206 @@
+"""
+Lightweight Prometheus metrics
+Histograms and callback gauges rendered in the Prometheus text format,
+without an extra dependency; observe() is a bisect plus two increments
+"""
+
+import bisect
+import os
+import threading
+import time
+
+
+# Seconds; covers sub-millisecond stages up to slow bulk requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+        # A process forked while another thread held the lock would inherit it locked
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *labels):
+        """Context manager observing the elapsed wall time of its block"""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+
+        for labels, counts, total in snapshot:
+            base = dict(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**base, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", base, total
+            yield f"{self.name}_count", base, cumulative
+
+
+class CallbackMetric:
+    """
+    Gauge or counter whose value is read at scrape time
+
+    callback() returns a number, None (no sample), or a dict mapping label
+    value tuples to numbers.
+    """
+
+    def __init__(self, name, documentation, callback, label_names=(), kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.label_names = tuple(label_names)
+        self.kind = kind
+
+    def samples(self):
+        value = self.callback()
+        if value is None:
+            return
+        if not isinstance(value, dict):
+            value = {(): value}
+        for labels, sample in value.items():
+            yield self.name, dict(zip(self.label_names, labels)), sample
+
+
+class MetricsRegistry:
+    """Named metrics rendered together by render()"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        """Create a histogram, or return the existing one with this name"""
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, label_names, buckets)
+        return self._metrics[name]
+
+    def gauge(self, name, documentation, callback, label_names=(), kind='gauge'):
+        """Register (or replace) a metric computed by callback at scrape time"""
+        self._metrics[name] = CallbackMetric(name, documentation, callback, label_names, kind)
+        return self._metrics[name]
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                # A failing callback must not break the whole scrape
+                continue
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                if labels:
+                    label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                    lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request
+
+    Labels use the matched route template (e.g. /api/xray/analyze), not the
+    raw path, so path parameters don't explode the series count.
+    """
+
+    def __init__(self, app, histogram=None):
+        self.app = app
+        self.histogram = histogram or HTTP_REQUEST_SECONDS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            self.histogram.observe(time.perf_counter() - start, scope["method"], endpoint, str(status["code"]))
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Process-wide registry served by GET /metrics
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "pulsex_http_request_duration_seconds",
+    "HTTP request latency by route and status",
+    ("method", "endpoint", "status")
+)
+XRAY_STAGE_SECONDS = REGISTRY.histogram(
+    "pulsex_xray_stage_seconds",
+    "Time spent in each X-ray pipeline stage (forward/postprocess are per batch)",
+    ("stage",)
+)
+XRAY_BATCH_SIZE = REGISTRY.histogram(
+    "pulsex_xray_batch_size",
+    "Images per X-ray forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
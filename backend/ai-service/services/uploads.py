@@ -0,0 +1,229 @@
+"""
+Streaming multipart uploads
+The request body is parsed as it arrives, so the size limit and the
+magic-byte type check reject a bad upload after its first chunks -
+Starlette's UploadFile would spool the whole body before the endpoint runs
+"""
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Leading bytes of every type the service accepts
+MAGIC_BYTES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'%PDF-', 'pdf'),
+    (b'PK\x03\x04', 'zip'),
+)
+SNIFF_BYTES = max(len(magic) for magic, _ in MAGIC_BYTES)
+TYPE_EXTENSIONS = {'jpeg': ('jpg', 'jpeg'), 'png': ('png',), 'pdf': ('pdf',), 'zip': ('zip',)}
+MEDIA_TYPES = {'jpeg': 'image/jpeg', 'png': 'image/png', 'pdf': 'application/pdf', 'zip': 'application/zip'}
+# Boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class UploadError(ValueError):
+    """Upload rejected by the streaming reader; status_code is the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_type(head):
+    """File type from its first bytes ('jpeg', 'png', 'pdf', 'zip'), or None"""
+    for magic, kind in MAGIC_BYTES:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def allowed_types(extensions):
+    """Sniffed types matching a list of extensions like settings.allowed_extensions"""
+    extensions = {extension.lower().lstrip('.') for extension in extensions}
+    return {kind for kind, kind_extensions in TYPE_EXTENSIONS.items() if extensions & set(kind_extensions)}
+
+
+def multipart_body(field, multiple=False):
+    """
+    OpenAPI requestBody for an endpoint that streams `field` itself
+
+    Endpoints that take a Request instead of UploadFile parameters pass this
+    as openapi_extra, so /docs still shows the file picker.
+    """
+    file_schema = {"type": "string", "format": "binary"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"multipart/form-data": {"schema": {
+                "type": "object",
+                "properties": {field: {"type": "array", "items": file_schema} if multiple else file_schema},
+                "required": [field]
+            }}}
+        }
+    }
+
+
+class StreamedFile:
+    """One file part of a multipart upload"""
+
+    def __init__(self, filename, content_type):
+        self.filename = filename
+        self.content_type = content_type
+        self.kind = None  # sniffed type; stays None when the type is not accepted
+        self.size = 0
+        self.data = None
+
+
+async def multipart_events(request, max_body_size=None):
+    """
+    Parse a multipart/form-data body while it streams in
+
+    Yields ('begin', field, filename, content_type) at the start of every
+    part, ('data', bytes) for its content and ('end',) after it. Nothing is
+    buffered beyond the chunk being parsed, so a consumer that stops
+    iterating stops reading the body.
+
+    Raises:
+        UploadError: Not multipart, malformed, or larger than max_body_size (413)
+    """
+    media_type, params = parse_options_header(request.headers.get('content-type', ''))
+    if media_type != b'multipart/form-data' or b'boundary' not in params:
+        raise UploadError("Expected a multipart/form-data upload")
+
+    # Refuse before reading anything when the client announces the size
+    declared = request.headers.get('content-length', '')
+    if max_body_size and declared.isdigit() and int(declared) > max_body_size:
+        raise UploadError(f"Upload exceeds the maximum size ({max_body_size} bytes)", 413)
+
+    events = []
+    headers = {}
+    header = {'field': b'', 'value': b''}
+
+    def on_header_field(data, start, end):
+        header['field'] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header['value'] += data[start:end]
+
+    def on_header_end():
+        headers[header['field'].lower()] = header['value']
+        header['field'] = header['value'] = b''
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(headers.get(b'content-disposition', b''))
+        filename = disposition.get(b'filename')
+        events.append((
+            'begin',
+            disposition.get(b'name', b'').decode('latin-1'),
+            filename.decode('utf-8', 'replace') if filename is not None else None,
+            headers.get(b'content-type', b'').decode('latin-1')
+        ))
+        headers.clear()
+
+    parser = MultipartParser(params[b'boundary'], {
+        'on_header_field': on_header_field,
+        'on_header_value': on_header_value,
+        'on_header_end': on_header_end,
+        'on_headers_finished': on_headers_finished,
+        'on_part_data': lambda data, start, end: events.append(('data', data[start:end])),
+        'on_part_end': lambda: events.append(('end',)),
+    })
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if max_body_size and received > max_body_size:
+                raise UploadError(f"Upload exceeds the maximum size ({max_body_size} bytes)", 413)
+            parser.write(chunk)
+            parsed, events[:] = events[:], []
+            for event in parsed:
+                yield event
+        parser.finalize()
+    except Exception as e:
+        if isinstance(e, UploadError):
+            raise
+        raise UploadError(f"Malformed multipart upload: {e}")
+    for event in events:
+        yield event
+
+
+async def read_files(request, field, max_file_size, types, max_files=1, size_limits=None, strict=False,
+                     max_body_size=None):
+    """
+    Read the file parts named `field` into memory, checking each one as it streams
+
+    A part's type is sniffed from its first SNIFF_BYTES. A part of any other
+    type fails the upload right there with strict=True; otherwise it is
+    drained without being kept and comes back with kind None and no data.
+    Other form fields are ignored.
+
+    Args:
+        request: Starlette Request (anything with headers and async stream())
+        field: Multipart field name holding the files
+        max_file_size: Largest accepted file, in bytes
+        types: Sniffed types to keep (see allowed_types)
+        max_files: Most file parts accepted in one upload
+        size_limits: Optional per-type overrides of max_file_size (e.g. zip archives)
+        strict: Reject the whole upload on the first file of another type
+        max_body_size: Limit on the whole request body; a single-file upload
+                       defaults to its largest file plus MULTIPART_OVERHEAD
+
+    Returns:
+        List of StreamedFile in upload order
+
+    Raises:
+        UploadError: 413 for an oversized file or body, 400 for too many files, a
+                     malformed body or (strict) a file of another type,
+                     422 when the field is missing
+    """
+    size_limits = size_limits or {}
+    if max_body_size is None and max_files == 1:
+        # A single-file upload can't legitimately be much bigger than its file
+        max_body_size = max([max_file_size, *size_limits.values()]) + MULTIPART_OVERHEAD
+
+    files = []
+    current = chunks = None
+    async for event in multipart_events(request, max_body_size):
+        if event[0] == 'begin':
+            _, name, filename, content_type = event
+            if name != field or filename is None:
+                current = None
+                continue
+            if len(files) >= max_files:
+                raise UploadError(f"Too many files (max {max_files})")
+            current = StreamedFile(filename, content_type)
+            chunks = []
+            files.append(current)
+
+        elif event[0] == 'data' and current is not None:
+            current.size += len(event[1])
+            if chunks is None:
+                continue  # rejected type, drained
+            chunks.append(event[1])
+            if current.kind is None and current.size >= SNIFF_BYTES:
+                chunks = _check_type(current, chunks, types, strict)
+            if current.kind is not None and current.size > size_limits.get(current.kind, max_file_size):
+                raise UploadError(f"{current.filename} exceeds the maximum file size", 413)
+
+        elif event[0] == 'end' and current is not None:
+            if chunks is not None and current.kind is None:
+                chunks = _check_type(current, chunks, types, strict)
+            if chunks is not None:
+                current.data = b''.join(chunks)
+            current = chunks = None
+
+    if not files:
+        raise UploadError(f"Field '{field}' is required", 422)
+    return files
+
+
+def _check_type(upload, chunks, types, strict):
+    """Set upload.kind from the buffered head; None (stop buffering) when not accepted"""
+    kind = sniff_type(b''.join(chunks)[:SNIFF_BYTES])
+    if kind not in types:
+        if strict:
+            raise UploadError("Invalid file type")
+        return None
+    upload.kind = kind
+    return chunks
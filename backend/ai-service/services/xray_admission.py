@@ -0,0 +1,147 @@
+"""
+Admission control for X-ray inference
+Caps how many analyses run at once and how many may wait, so a burst is
+rejected early instead of slowing every request down together
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+import torch
+
+from .xray_batcher import LANES, XRayQueueFullError
+
+
+def configure_torch_threads(num_threads=0, num_interop_threads=0):
+    """
+    Set torch's intra-op / inter-op thread pools (0 keeps torch's default)
+
+    Must run before the first forward pass: the inter-op pool can only be
+    sized once, and an intra-op count above the cores actually available
+    to the container oversubscribes them.
+    """
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads > 0:
+        torch.set_num_interop_threads(num_interop_threads)
+    return torch.get_num_threads(), torch.get_num_interop_threads()
+
+
+class XRayAdmissionController:
+    """
+    Concurrency limit with a bounded FIFO wait queue per priority lane
+
+    Bulk jobs hold their slot for the whole job, so interactive_reserved
+    slots are kept out of the bulk lane's reach and interactive requests
+    have their own wait queue: a doctor's upload never queues behind (or
+    is rejected because of) bulk jobs, only behind other interactive ones.
+    Freed slots go to waiting interactive requests first.
+    """
+
+    def __init__(self, max_concurrent=8, max_waiting=32, retry_after_seconds=1, interactive_reserved=2):
+        """
+        Args:
+            max_concurrent: Analyses allowed to run at the same time
+            max_waiting: Requests allowed to wait for a slot, per lane; further ones are rejected
+            retry_after_seconds: Retry-After hint returned with rejections
+            interactive_reserved: Slots bulk work may never take (at least one is always left to bulk)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_waiting = max(0, max_waiting)
+        self.retry_after_seconds = max(1, retry_after_seconds)
+        self.interactive_reserved = min(max(0, interactive_reserved), self.max_concurrent - 1)
+        self.lane_limits = {'interactive': self.max_concurrent,
+                            'bulk': self.max_concurrent - self.interactive_reserved}
+
+        self.rejected = 0
+
+        self._in_flight = {lane: 0 for lane in LANES}
+        self._waiters = {lane: deque() for lane in LANES}
+        self._loop = None
+
+    @property
+    def in_flight(self):
+        """Requests holding a slot"""
+        return sum(self._in_flight.values())
+
+    @property
+    def waiting(self):
+        """Requests queued for a slot"""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_waiting": self.max_waiting,
+            "interactive_reserved": self.interactive_reserved,
+            "rejected": self.rejected,
+            "lanes": {
+                lane: {"in_flight": self._in_flight[lane], "waiting": len(self._waiters[lane])}
+                for lane in LANES
+            }
+        }
+
+    @asynccontextmanager
+    async def slot(self, lane='interactive'):
+        """
+        Hold one inference slot for the duration of the block
+
+        Raises:
+            XRayQueueFullError: If no slot is free for the lane and its wait queue is full
+        """
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    async def acquire(self, lane='interactive'):
+        if lane not in self._waiters:
+            raise ValueError(f"Unknown priority lane: {lane}")
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Waiters from a previous loop can never be woken here
+            self._loop = loop
+            for waiters in self._waiters.values():
+                waiters.clear()
+
+        waiters = self._waiters[lane]
+        if not waiters and self._has_room(lane):
+            self._in_flight[lane] += 1
+            return
+
+        if len(waiters) >= self.max_waiting:
+            self.rejected += 1
+            raise XRayQueueFullError("X-ray service is at capacity, retry shortly")
+
+        future = loop.create_future()
+        waiters.append(future)
+        try:
+            # _dispatch() counts the slot for us before waking us up
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(lane)
+            elif future in waiters:
+                waiters.remove(future)
+            raise
+
+    def release(self, lane='interactive'):
+        self._in_flight[lane] -= 1
+        self._dispatch()
+
+    def _has_room(self, lane):
+        return self.in_flight < self.max_concurrent and self._in_flight[lane] < self.lane_limits[lane]
+
+    def _dispatch(self):
+        """Hand free slots to waiters, interactive lane first"""
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters and self._has_room(lane):
+                future = waiters.popleft()
+                if not future.done():
+                    self._in_flight[lane] += 1
+                    future.set_result(None)
@@ -0,0 +1,121 @@
+"""
+Optional audit persistence for X-ray uploads
+Writes analyzed films and their results to disk in batches, off the request path
+"""
+
+import asyncio
+import json
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+
+class XRayAuditWriter:
+    """Queues uploads in memory and persists them from a background task"""
+
+    def __init__(self, directory, max_batch=32, flush_interval_ms=1000, max_pending=1024):
+        """
+        Args:
+            directory: Root folder; files go to <directory>/<YYYYMMDD>/
+            max_batch: Uploads written per flush
+            flush_interval_ms: Longest time an upload waits before being written
+            max_pending: Uploads kept in memory before new ones are dropped
+        """
+        self.directory = Path(directory)
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = max(0, flush_interval_ms) / 1000
+        self.max_pending = max(1, max_pending)
+
+        self.written = 0
+        self.dropped = 0
+
+        self._pending = deque()
+        self._wakeup = None
+        self._worker = None
+        self._loop = None
+
+    def submit(self, image_bytes, filename, result):
+        """
+        Queue an upload for persistence without blocking the caller
+
+        The bytes object is kept by reference (no copy). Returns False if
+        the queue is full and the upload was dropped.
+        """
+        self._ensure_worker()
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+
+        self._pending.append({
+            "id": str(uuid.uuid4()),
+            "filename": filename,
+            "received_at": datetime.now(),
+            "image_bytes": image_bytes,
+            "result": result
+        })
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+        return True
+
+    async def close(self):
+        """Stop the worker and write anything still queued"""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+        while self._pending:
+            await asyncio.to_thread(self._write_batch, self._take_batch())
+
+    def _ensure_worker(self):
+        """Start the flush task on the running loop (restarted if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Flush every flush_interval, or sooner when a full batch is waiting"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while self._pending:
+                await asyncio.to_thread(self._write_batch, self._take_batch())
+
+    def _take_batch(self):
+        return [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+
+    def _write_batch(self, batch):
+        """Write image files plus one JSON line per upload (runs in a worker thread)"""
+        day_dir = self.directory / datetime.now().strftime("%Y%m%d")
+        day_dir.mkdir(parents=True, exist_ok=True)
+
+        records = []
+        for entry in batch:
+            file_ext = Path(entry["filename"] or "").suffix.lower()
+            image_path = day_dir / f"{entry['id']}{file_ext}"
+            image_path.write_bytes(entry["image_bytes"])
+            records.append(json.dumps({
+                "id": entry["id"],
+                "filename": entry["filename"],
+                "path": str(image_path),
+                "received_at": entry["received_at"].isoformat(),
+                "diagnosis": entry["result"].get("diagnosis"),
+                "confidence": entry["result"].get("confidence"),
+                "success": entry["result"].get("success")
+            }))
+
+        with open(day_dir / "audit.jsonl", "a") as log:
+            log.write("\n".join(records) + "\n")
+        self.written += len(batch)
@@ -0,0 +1,263 @@
+"""
+Dynamic micro-batching for X-ray inference
+Collects concurrent analyze requests and runs them as one batched forward pass
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import nullcontext
+
+from .metrics import XRAY_STAGE_SECONDS
+
+
+# Priority classes, highest first
+LANES = ('interactive', 'bulk')
+
+
+class XRayQueueFullError(Exception):
+    """Raised when the batching queue has no room for another request"""
+
+
+class LaneStats:
+    """Rolling queue-wait and end-to-end latency for one priority lane"""
+
+    def __init__(self, window=1024):
+        self.completed = 0
+        self._waits = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+
+    def record_wait(self, seconds):
+        self._waits.append(seconds * 1000)
+
+    def record_latency(self, seconds):
+        self.completed += 1
+        self._latencies.append(seconds * 1000)
+
+    def snapshot(self):
+        return {
+            "completed": self.completed,
+            "wait_p50_ms": _percentile(self._waits, 0.50),
+            "wait_p95_ms": _percentile(self._waits, 0.95),
+            "latency_p50_ms": _percentile(self._latencies, 0.50),
+            "latency_p95_ms": _percentile(self._latencies, 0.95)
+        }
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 2)
+
+
+class XRayBatcher:
+    """
+    Groups concurrent X-ray requests into batched forward passes
+
+    Requests queue in priority lanes. Each batch is filled from the
+    interactive lane first, so a doctor's upload overtakes queued bulk work
+    at the next batch boundary, but bulk_min_share of every batch is kept
+    for bulk work while any is waiting so re-scoring jobs never starve.
+    """
+
+    def __init__(self, service, max_batch_size=8, max_wait_ms=5.0, max_queue_size=64,
+                 bulk_min_share=0.25):
+        """
+        Args:
+            service: XRayService (prepare, predict_batch, store_cached and
+                     failure_result are used)
+            max_batch_size: Largest number of images per forward pass
+            max_wait_ms: How long the first queued request waits for company
+            max_queue_size: Requests allowed to wait per lane before new ones are rejected
+            bulk_min_share: Fraction of each batch reserved for waiting bulk work
+        """
+        self.service = service
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_queue_size = max(1, max_queue_size)
+        self.bulk_slots = min(self.max_batch_size, round(self.max_batch_size * bulk_min_share))
+        if bulk_min_share > 0:
+            self.bulk_slots = max(1, self.bulk_slots)
+
+        self.lane_stats = {lane: LaneStats() for lane in LANES}
+
+        self._pending = {lane: deque() for lane in LANES}
+        self._wakeup = None
+        self._room = None
+        self._worker = None
+        self._loop = None
+
+    @property
+    def queue_depth(self):
+        """Number of requests waiting for a batch slot"""
+        return sum(len(queue) for queue in self._pending.values())
+
+    def stats(self):
+        """Per-lane queue depth and latency percentiles"""
+        return {
+            lane: {"queue_depth": len(self._pending[lane]), **self.lane_stats[lane].snapshot()}
+            for lane in LANES
+        }
+
+    async def analyze(self, image_bytes, filename, lane='interactive', tta=1):
+        """
+        Batched equivalent of XRayService.analyze_xray
+
+        Cache lookup and decoding run in the thread pool per request; only
+        the forward pass is shared with other callers.
+
+        Args:
+            lane: Priority class, one of LANES
+            tta: Test-time augmentation factor; the views share the batch's forward pass
+
+        Raises:
+            XRayQueueFullError: If max_queue_size requests are already waiting in the lane
+        """
+        if len(self._pending[lane]) >= self.max_queue_size:
+            raise XRayQueueFullError("X-ray inference queue is full")
+        return await self._analyze(image_bytes, lane, tta)
+
+    async def analyze_many(self, images, lane='bulk', decode_workers=4, tta=1):
+        """
+        Batched equivalent of XRayService.analyze_batch, fed through one lane
+
+        At most decode_workers images are decoded at a time, and a full lane
+        makes the job wait for room instead of failing. A decoded tensor is
+        held until its result comes back, so at most max_queue_size of the
+        job's images are decoded or in flight at once; the rest wait as
+        undecoded bytes. Results come back in input order.
+        """
+        decode_slots = asyncio.Semaphore(max(1, decode_workers))
+        in_hand = asyncio.Semaphore(self.max_queue_size)
+
+        async def analyze_one(image_bytes):
+            async with in_hand:
+                return await self._analyze(image_bytes, lane, tta, block=True, decode_slots=decode_slots)
+
+        return await asyncio.gather(*[analyze_one(image_bytes) for image_bytes in images])
+
+    async def _analyze(self, image_bytes, lane, tta=1, block=False, decode_slots=None):
+        # The cache key belongs to the model version seen here, even if the
+        # service is hot-swapped before the forward pass runs
+        service = self.service
+        start = time.perf_counter()
+        try:
+            async with decode_slots or nullcontext():
+                cache_key, duplicate_key, cached, image_tensor = await asyncio.to_thread(service.prepare, image_bytes, tta)
+        except Exception as e:
+            return service.failure_result(e)
+
+        if cached is not None:
+            return cached
+
+        result = await self.submit(image_tensor, lane=lane, block=block)
+        service.store_cached(cache_key, result, duplicate_key)
+        self.lane_stats[lane].record_latency(time.perf_counter() - start)
+        return result
+
+    async def submit(self, image_tensor, lane='interactive', block=False):
+        """Queue one preprocessed tensor and wait for its result dict"""
+        if lane not in self._pending:
+            raise ValueError(f"Unknown priority lane: {lane}")
+        self._ensure_worker()
+
+        while len(self._pending[lane]) >= self.max_queue_size:
+            if not block:
+                raise XRayQueueFullError("X-ray inference queue is full")
+            self._room.clear()
+            await self._room.wait()
+
+        future = self._loop.create_future()
+        self._pending[lane].append((image_tensor, future, lane, time.perf_counter()))
+        self._wakeup.set()
+        return await future
+
+    async def close(self):
+        """Stop the batching worker"""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def _ensure_worker(self):
+        """Start the worker on the running loop (restarted if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+
+        # Futures from a previous loop can never be resolved here
+        for queue in self._pending.values():
+            queue.clear()
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._room = asyncio.Event()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Worker loop: wait for requests, fill a batch, run it"""
+        while True:
+            if not self.queue_depth:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            await self._fill_batch()
+
+            batch = self._take_batch()
+            self._room.set()
+
+            if batch:
+                await self._run_batch(batch)
+
+    def _take_batch(self):
+        """Interactive first, with bulk_slots held back for waiting bulk work"""
+        interactive, bulk = self._pending['interactive'], self._pending['bulk']
+        reserved = min(len(bulk), self.bulk_slots)
+
+        batch = []
+        self._take(interactive, batch, self.max_batch_size - reserved)
+        self._take(bulk, batch, self.max_batch_size)
+        self._take(interactive, batch, self.max_batch_size)
+        return batch
+
+    def _take(self, queue, batch, limit):
+        while queue and len(batch) < limit:
+            item = queue.popleft()
+            if not item[1].cancelled():
+                batch.append(item)
+
+    async def _fill_batch(self):
+        """Wait up to max_wait for the batch to reach max_batch_size"""
+        deadline = self._loop.time() + self.max_wait
+        while self.queue_depth < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    async def _run_batch(self, batch):
+        """Run one forward pass and hand each caller its own result"""
+        now = time.perf_counter()
+        for _, _, lane, enqueued_at in batch:
+            self.lane_stats[lane].record_wait(now - enqueued_at)
+            XRAY_STAGE_SECONDS.observe(now - enqueued_at, 'queue_wait')
+
+        # Read once: a hot swap takes effect at the next batch boundary
+        service = self.service
+        try:
+            results = await asyncio.to_thread(
+                service.predict_batch, [image_tensor for image_tensor, _, _, _ in batch]
+            )
+        except Exception as e:
+            results = [service.failure_result(e)] * len(batch)
+
+        for (_, future, _, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,103 @@
+"""
+Result cache for X-ray analysis
+Bounded LRU + TTL cache keyed by image content hash and model version
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class XRayResultCache:
+    """Thread-safe LRU cache of analysis results with expiry"""
+
+    def __init__(self, max_entries=2048, ttl_seconds=3600, watch_paths=(), check_interval=1.0):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl_seconds: Age after which an entry is treated as a miss
+            watch_paths: Files (model weights, metadata) whose change clears the cache
+            check_interval: Minimum seconds between stat() checks of watch_paths
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self.watch_paths = [str(path) for path in watch_paths]
+        self.check_interval = check_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = self._file_signature()
+        self._next_check = time.monotonic() + check_interval
+
+    @staticmethod
+    def key(image_bytes, model_version):
+        """Cache key for an upload under a given model version"""
+        return f"{model_version}:{hashlib.sha256(image_bytes).hexdigest()}"
+
+    def get(self, key):
+        """Cached result dict, or None on miss/expiry"""
+        self._check_model_files()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, result):
+        """Store a result (treated as read-only by callers)"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Counters for /health and monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations
+        }
+
+    def _file_signature(self):
+        """(path, size, mtime) of every watched file"""
+        signature = []
+        for path in self.watch_paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def _check_model_files(self):
+        """Clear the cache if the model files changed on disk"""
+        if not self.watch_paths or time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + self.check_interval
+        signature = self._file_signature()
+        if signature != self._signature:
+            self._signature = signature
+            self.clear()
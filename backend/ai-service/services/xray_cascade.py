@@ -0,0 +1,36 @@
+"""
+Screening model for the two-stage X-ray cascade
+A ResNet18 with the same head recipe as the ResNet50 classifier answers
+first; only films it is unsure about are sent on to the ResNet50
+"""
+
+import torch.nn as nn
+from torchvision import models
+
+
+SCREENING_MODEL_FILE = 'xray_screening_model.pth'
+SCREENING_METADATA_FILE = 'screening_metadata.json'
+
+
+def build_screening_model(pretrained=False, dropout=0.5):
+    """
+    ResNet18 with the enhanced head from train_enhanced.py, scaled to its
+    512 features (512→256→128→2, same ReLU/BatchNorm/Dropout pattern)
+
+    The head lives in model.fc like the ResNet50's, so optimize_model()
+    folds and freezes it the same way.
+    """
+    model = models.resnet18(weights='IMAGENET1K_V1' if pretrained else None)
+    model.fc = nn.Sequential(
+        nn.Dropout(dropout),
+        nn.Linear(model.fc.in_features, 256),
+        nn.ReLU(),
+        nn.BatchNorm1d(256),
+        nn.Dropout(dropout * 0.8),
+        nn.Linear(256, 128),
+        nn.ReLU(),
+        nn.BatchNorm1d(128),
+        nn.Dropout(dropout * 0.6),
+        nn.Linear(128, 2)
+    )
+    return model
@@ -0,0 +1,105 @@
+"""
+Inference graph optimizations for the X-ray classifier
+Folds BatchNorm layers into neighbouring weights and freezes the eval model
+as TorchScript or compiles it with torch.compile
+"""
+
+import copy
+
+import torch
+import torch.nn as nn
+import torch.fx.experimental.optimization as fx_optimization
+
+
+INFERENCE_MODES = ('eager', 'torchscript', 'compile')
+
+
+def fold_head_batchnorm(head):
+    """
+    Fold each BatchNorm1d of the classifier head into the next Linear
+
+    The head is Linear → ReLU → BatchNorm1d → Dropout → Linear ..., so the
+    BatchNorm sits after the ReLU and can't merge into the preceding Linear.
+    In eval mode it is a per-feature affine map (x * scale + shift) and
+    Dropout is the identity, so it folds exactly into the following Linear:
+        W' = W * scale,  b' = b + W @ shift
+
+    Args:
+        head: nn.Sequential classifier head (eval mode)
+
+    Returns:
+        New nn.Sequential without BatchNorm1d/Dropout layers
+    """
+    layers = [layer for layer in head if not isinstance(layer, nn.Dropout)]
+    folded = []
+    pending_bn = None
+
+    for layer in layers:
+        if isinstance(layer, nn.BatchNorm1d):
+            pending_bn = layer
+            continue
+
+        if pending_bn is not None:
+            if not isinstance(layer, nn.Linear):
+                raise ValueError("BatchNorm1d must be followed by a Linear layer to be folded")
+            layer = _fold_into_linear(pending_bn, layer)
+            pending_bn = None
+
+        folded.append(layer)
+
+    if pending_bn is not None:
+        folded.append(pending_bn)
+
+    return nn.Sequential(*folded)
+
+
+def _fold_into_linear(bn, linear):
+    """Linear(BN(x)) as a single Linear"""
+    scale = bn.weight / torch.sqrt(bn.running_var + bn.eps)
+    shift = bn.bias - bn.running_mean * scale
+
+    fused = nn.Linear(linear.in_features, linear.out_features)
+    with torch.no_grad():
+        fused.weight.copy_(linear.weight * scale)
+        bias = linear.bias if linear.bias is not None else torch.zeros(linear.out_features)
+        fused.bias.copy_(bias + linear.weight @ shift)
+    return fused
+
+
+def optimize_model(model, mode, example_input):
+    """
+    Build the serving graph for an eval-mode fp32 model
+
+    Args:
+        model: ResNet50 with the enhanced head in model.fc, or an already
+               scripted model (the INT8 export), which can only be frozen
+        mode: 'eager' (unchanged), 'torchscript' (fused + frozen) or
+              'compile' (fused + torch.compile)
+        example_input: Input batch used for tracing
+
+    Returns:
+        Callable model with the same outputs as the original
+    """
+    if mode not in INFERENCE_MODES:
+        raise ValueError(f"Unknown inference mode '{mode}' (expected one of {INFERENCE_MODES})")
+    if mode == 'eager':
+        return model
+
+    if isinstance(model, torch.jit.ScriptModule):
+        if mode == 'compile':
+            raise ValueError("torch.compile is not supported for TorchScript models")
+        return torch.jit.freeze(model)
+
+    fused = copy.deepcopy(model).eval()
+    fused.fc = fold_head_batchnorm(fused.fc)
+    # Conv+BN folding for the backbone
+    fused = fx_optimization.fuse(fused)
+
+    if mode == 'compile':
+        return torch.compile(fused, dynamic=True)
+
+    with torch.no_grad():
+        traced = torch.jit.trace(fused, example_input)
+        frozen = torch.jit.freeze(traced)
+        return torch.jit.optimize_for_inference(frozen)
+
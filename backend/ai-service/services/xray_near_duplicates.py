@@ -0,0 +1,164 @@
+"""
+Near-duplicate index for X-ray uploads
+Re-exports of the same film (re-encoded JPEG, stripped or rewritten
+metadata) have different bytes but nearly the same 64-bit perceptual hash,
+so their stored result can be reused without running the model
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+_DCT_SIZE = 32
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis; D @ X @ D.T is the 2-D DCT of X"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(_DCT_SIZE)
+
+
+def perceptual_hash(image):
+    """
+    64-bit pHash of a PIL image
+
+    The image is reduced to 32x32 grayscale; each bit says whether one of
+    the 8x8 lowest-frequency DCT coefficients is above their median. JPEG
+    re-encoding and metadata changes move a handful of bits at most.
+    """
+    pixels = np.asarray(image.convert('L').resize((_DCT_SIZE, _DCT_SIZE), Image.BILINEAR), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:8, :8].flatten()
+    # The DC term is overall brightness; leave it out of the median
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+class XRayNearDuplicateIndex:
+    """
+    Bounded LRU map from perceptual hash to result, searched within a Hamming radius
+
+    Lookups use multi-index hashing: the 64 bits are split into
+    max_distance + 1 chunks, and any hash within max_distance of the query
+    matches it exactly on at least one chunk (pigeonhole). Only entries
+    sharing a chunk are compared, instead of the whole index.
+    """
+
+    def __init__(self, max_distance=4, max_entries=10000):
+        """
+        Args:
+            max_distance: Largest Hamming distance treated as the same film
+            max_entries: Entries kept before the least recently used is evicted
+        """
+        self.max_distance = max(0, min(max_distance, HASH_BITS - 1))
+        self.max_entries = max(1, max_entries)
+
+        self.hits = 0
+        self.misses = 0
+
+        chunks = self.max_distance + 1
+        bounds = [round(i * HASH_BITS / chunks) for i in range(chunks + 1)]
+        self._chunks = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+        # (variant, hash) -> result; variant separates model versions, TTA factors, ...
+        self._entries = OrderedDict()
+        self._tables = [{} for _ in self._chunks]
+        self._lock = threading.Lock()
+
+    def get(self, image_hash, variant):
+        """
+        Closest stored result within max_distance
+
+        Returns:
+            (result, distance), or (None, None) on a miss
+        """
+        with self._lock:
+            best, best_distance = None, self.max_distance + 1
+            for key in self._candidates(image_hash, variant):
+                distance = (key[1] ^ image_hash).bit_count()
+                if distance < best_distance:
+                    best, best_distance = key, distance
+                    if distance == 0:
+                        break
+
+            if best is None:
+                self.misses += 1
+                return None, None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return self._entries[best], best_distance
+
+    def put(self, image_hash, variant, result):
+        """Store a result (treated as read-only by callers)"""
+        key = (variant, image_hash)
+        with self._lock:
+            if key not in self._entries:
+                for table, chunk in zip(self._tables, self._chunk_values(image_hash)):
+                    table.setdefault(chunk, set()).add(key)
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tables = [{} for _ in self._chunks]
+
+    def stats(self):
+        """Counters for /health and monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "max_distance": self.max_distance,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def save(self, path):
+        """Write every entry to a JSON snapshot (atomically), oldest first"""
+        with self._lock:
+            entries = [[variant, f"{image_hash:016x}", result] for (variant, image_hash), result in self._entries.items()]
+        staging = f"{path}.tmp"
+        with open(staging, 'w') as f:
+            json.dump({"max_distance": self.max_distance, "entries": entries}, f)
+        os.replace(staging, path)
+        return len(entries)
+
+    def load(self, path):
+        """Add the entries of a snapshot written by save(); returns how many were loaded"""
+        with open(path, 'r') as f:
+            snapshot = json.load(f)
+        for variant, image_hash, result in snapshot["entries"]:
+            self.put(int(image_hash, 16), variant, result)
+        return len(snapshot["entries"])
+
+    def _chunk_values(self, image_hash):
+        return [(image_hash >> start) & mask for start, mask in self._chunks]
+
+    def _candidates(self, image_hash, variant):
+        seen = set()
+        for table, chunk in zip(self._tables, self._chunk_values(image_hash)):
+            for key in table.get(chunk, ()):
+                if key[0] == variant and key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def _remove(self, key):
+        del self._entries[key]
+        for table, chunk in zip(self._tables, self._chunk_values(key[1])):
+            bucket = table[chunk]
+            bucket.discard(key)
+            if not bucket:
+                del table[chunk]
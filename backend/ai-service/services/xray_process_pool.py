@@ -0,0 +1,230 @@
+"""
+Process-pool X-ray inference
+Decode, forward pass and result formatting run in forked worker processes,
+so the GIL-bound parts of requests no longer serialize with each other
+"""
+
+import asyncio
+import gc
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+
+import torch
+
+from .xray_batcher import LANES, LaneStats, XRayQueueFullError
+
+
+# Set in the parent just before forking; every worker inherits it
+_worker_service = None
+
+
+def _init_worker(num_threads, warmup_iterations, warmup_batch_sizes):
+    """Pin intra-op threads and warm up the inherited model"""
+    torch.set_num_threads(num_threads)
+    # The result cache stays in the parent; per-worker near-duplicate
+    # copies would diverge, so that index is off in process mode
+    _worker_service.result_cache = None
+    _worker_service.near_duplicates = None
+    _worker_service.warmup(warmup_iterations, warmup_batch_sizes)
+
+
+def _analyze(image_bytes, tta):
+    return _worker_service.analyze_xray(image_bytes, None, tta=tta)
+
+
+def _analyze_batch(images, batch_size, tta):
+    return _worker_service.analyze_batch(images, batch_size=batch_size, decode_workers=1, tta=tta)
+
+
+def _ping():
+    return True
+
+
+class XRayProcessPool:
+    """
+    Runs X-ray analysis in N forked worker processes
+
+    Model weights are loaded once in the parent and inherited through
+    fork(): tensor storage lives outside the Python object headers that
+    refcounting touches, so the pages stay shared copy-on-write instead of
+    being duplicated per worker. gc.freeze() keeps the collector from
+    dirtying the inherited objects.
+
+    The parent must not run any torch op before the pool is created
+    (OpenMP thread pools don't survive fork), so the service should be
+    built eager with no warm-up; each worker warms up its own copy of the
+    kernels after forking.
+
+    Bulk chunks may occupy at most workers - 1 processes, so an
+    interactive request always finds a worker within one bulk chunk.
+
+    A worker that dies (e.g. OOM-killed) breaks the whole executor; the
+    requests it held fail, and the next one re-forks a fresh set of
+    workers. Re-forking is as safe as the first fork because the parent
+    never runs inference in this mode. After max_restarts, or if new
+    workers don't answer within restart_timeout seconds, the pool reports
+    'failed' so /health can get the process restarted.
+    """
+
+    def __init__(self, service, workers=2, threads_per_worker=1, warmup_iterations=0,
+                 warmup_batch_sizes=(1,), max_queue_size=64, max_restarts=3, restart_timeout=120):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("Process serving mode needs the 'fork' start method (Linux)")
+
+        self.service = service
+        self.workers = max(1, workers)
+        self.max_queue_size = max(1, max_queue_size)
+        self.max_restarts = max(0, max_restarts)
+        self.restart_timeout = restart_timeout
+        self.restarts = 0
+        self.failed = False
+        self._initargs = (threads_per_worker, warmup_iterations, tuple(warmup_batch_sizes))
+        self._in_flight = 0
+        self._bulk_slots = max(1, self.workers - 1)
+        self._bulk_gate = None
+        self._loop = None
+        self._probe = None
+        self._restarted_at = None
+        self.lane_stats = {lane: LaneStats() for lane in LANES}
+
+        self._executor = self._create_executor()
+        # Fork every worker now, before the parent starts threads of its own
+        for future in [self._executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def _create_executor(self):
+        global _worker_service
+
+        _worker_service = self.service
+        gc.freeze()
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=self._initargs
+        )
+
+    @property
+    def state(self):
+        """'ok', 'restarting' (new workers still warming up) or 'failed'"""
+        if not self.failed and self._probe is not None:
+            if self._probe.done():
+                self._probe = None
+            elif time.monotonic() - self._restarted_at > self.restart_timeout:
+                print(f"❌ X-ray worker processes did not come back within {self.restart_timeout}s")
+                self.failed = True
+            else:
+                return 'restarting'
+        return 'failed' if self.failed else 'ok'
+
+    @property
+    def queue_depth(self):
+        """Requests submitted to the workers and not yet finished"""
+        return self._in_flight
+
+    def stats(self):
+        """Per-lane latency percentiles (the executor queue itself is FIFO)"""
+        return {lane: self.lane_stats[lane].snapshot() for lane in LANES}
+
+    def status(self):
+        """Worker pool health, for /health"""
+        return {"state": self.state, "workers": self.workers, "restarts": self.restarts,
+                "max_restarts": self.max_restarts}
+
+    async def analyze(self, image_bytes, filename, lane='interactive', tta=1):
+        """
+        Same contract as XRayService.analyze_xray, run in a worker process
+
+        Raises:
+            XRayQueueFullError: If max_queue_size requests are already in flight
+        """
+        if self._in_flight >= self.max_queue_size:
+            raise XRayQueueFullError("X-ray inference queue is full")
+
+        start = time.perf_counter()
+        cache_key, cached = await asyncio.to_thread(self.service.lookup_cached, image_bytes, tta)
+        if cached is not None:
+            return cached
+
+        self._in_flight += 1
+        try:
+            result = await self._run(_analyze, image_bytes, tta)
+        finally:
+            self._in_flight -= 1
+
+        self.service.store_cached(cache_key, result)
+        self.lane_stats[lane].record_latency(time.perf_counter() - start)
+        return result
+
+    async def analyze_batch(self, images, batch_size=16, lane='bulk', tta=1):
+        """
+        Same contract as XRayService.analyze_batch, with chunks spread over the workers
+        """
+        started = time.perf_counter()
+        lookups = await asyncio.to_thread(lambda: [self.service.lookup_cached(image, tta) for image in images])
+        results = [cached for _, cached in lookups]
+        pending = [idx for idx, cached in enumerate(results) if cached is None]
+
+        batch_size = max(1, batch_size)
+        chunks = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._bulk_gate = asyncio.Semaphore(self._bulk_slots)
+        gate = self._bulk_gate if lane == 'bulk' else None
+
+        async def run_chunk(chunk):
+            async with gate or nullcontext():
+                return await self._run(_analyze_batch, [images[idx] for idx in chunk], batch_size, tta)
+
+        self._in_flight += len(pending)
+        try:
+            chunk_results = await asyncio.gather(*[run_chunk(chunk) for chunk in chunks])
+        finally:
+            self._in_flight -= len(pending)
+
+        for _ in pending:
+            self.lane_stats[lane].record_latency(time.perf_counter() - started)
+
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            for idx, result in zip(chunk, chunk_result):
+                results[idx] = result
+                self.service.store_cached(lookups[idx][0], result)
+
+        return results
+
+    def _restart(self, broken):
+        """Replace a broken executor with freshly forked workers (event loop thread)"""
+        # Every request on the broken executor fails; only the first one restarts it
+        if broken is not self._executor or self.failed:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        if self.restarts >= self.max_restarts:
+            print(f"❌ X-ray worker process lost; {self.max_restarts} restart(s) used up")
+            self.failed = True
+            return
+
+        self.restarts += 1
+        print(f"⚠️  X-ray worker process lost; restarting the pool ({self.restarts}/{self.max_restarts})")
+        self._executor = self._create_executor()
+        # Forks the workers; done once they have warmed up and answered
+        self._probe = self._executor.submit(_ping)
+        self._restarted_at = time.monotonic()
+
+    async def _run(self, fn, *args):
+        if self.state == 'failed':
+            raise RuntimeError("X-ray worker processes are down")
+        executor = self._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise RuntimeError("X-ray worker process died during analysis")
+
+    def close(self):
+        """Stop the worker processes"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
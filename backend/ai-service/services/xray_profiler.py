@@ -0,0 +1,167 @@
+"""
+On-demand torch.profiler capture for X-ray inference
+An admin arms a capture window; the next N forward passes are profiled
+(operator CPU time, memory, input shapes) and written to disk. Outside a
+window the only cost is one integer check per forward pass.
+"""
+
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+import torch
+from torch.autograd.profiler_util import EventList, FunctionEventAvg
+
+
+class XRayProfiler:
+    """Profiles the next N X-ray forward passes into Chrome traces and a summary table"""
+
+    def __init__(self, directory, max_inferences=100, row_limit=40):
+        """
+        Args:
+            directory: Root folder; each capture goes to <directory>/<capture id>/
+            max_inferences: Largest window arm() accepts
+            row_limit: Operators listed in summary.txt
+        """
+        self.directory = Path(directory)
+        self.max_inferences = max(1, max_inferences)
+        self.row_limit = row_limit
+
+        self._remaining = 0
+        self._capture = None
+        self._last_capture = None
+        self._lock = threading.Lock()
+
+    @property
+    def armed(self):
+        return self._remaining > 0
+
+    def arm(self, inferences):
+        """
+        Profile the next `inferences` forward passes (a batch counts once)
+
+        Raises:
+            ValueError: If inferences is outside 1..max_inferences
+            RuntimeError: If a capture is already in progress
+        """
+        if not 1 <= inferences <= self.max_inferences:
+            raise ValueError(f"inferences must be between 1 and {self.max_inferences}")
+
+        with self._lock:
+            if self._capture is not None:
+                raise RuntimeError(f"Capture {self._capture['id']} is still in progress")
+            capture_id = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            self._capture = {
+                "id": capture_id,
+                "directory": self.directory / capture_id,
+                "inferences": inferences,
+                "started": 0,
+                "completed": 0,
+                "images": 0,
+                "armed_at": datetime.now().isoformat(),
+                "operators": {}
+            }
+            self._remaining = inferences
+        return self.status()
+
+    def capture(self, batch_size=1):
+        """
+        Context manager wrapped around one forward pass
+
+        Returns a profiling context while a window is armed, else nullcontext().
+        """
+        if not self._remaining:
+            return nullcontext()
+
+        with self._lock:
+            if not self._remaining:
+                return nullcontext()
+            self._remaining -= 1
+            capture = self._capture
+            index = capture["started"]
+            capture["started"] += 1
+        return self._profile(capture, index, batch_size)
+
+    def status(self):
+        """Current window and the last finished capture, for the admin endpoint"""
+        with self._lock:
+            capture = self._capture
+            return {
+                "armed": self.armed,
+                "remaining": self._remaining,
+                "in_progress": {
+                    "id": capture["id"],
+                    "inferences": capture["inferences"],
+                    "completed": capture["completed"]
+                } if capture else None,
+                "last_capture": self._last_capture
+            }
+
+    @contextmanager
+    def _profile(self, capture, index, batch_size):
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+
+        profile = torch.profiler.profile(activities=activities, record_shapes=True, profile_memory=True)
+        averages = []
+        try:
+            with profile:
+                yield
+            capture["directory"].mkdir(parents=True, exist_ok=True)
+            profile.export_chrome_trace(str(capture["directory"] / f"inference_{index:03d}.trace.json"))
+            averages = profile.key_averages(group_by_input_shape=True)
+        finally:
+            # A failed pass still counts, so the window always closes
+            self._record(capture, averages, batch_size)
+
+    def _record(self, capture, averages, batch_size):
+        """Merge one pass into the capture totals; write the summary after the last one"""
+        with self._lock:
+            operators = capture["operators"]
+            for event in averages:
+                key = (event.key, str(event.input_shapes))
+                if key not in operators:
+                    operators[key] = FunctionEventAvg()
+                operators[key].add(event)
+            capture["completed"] += 1
+            capture["images"] += batch_size
+            finished = capture["completed"] == capture["inferences"]
+
+        if finished:
+            summary = self._write_summary(capture)
+            with self._lock:
+                self._last_capture = summary
+                self._capture = None
+
+    def _write_summary(self, capture):
+        directory = capture["directory"]
+        directory.mkdir(parents=True, exist_ok=True)
+        operators = EventList(list(capture["operators"].values()), profile_memory=True)
+        table = operators.table(sort_by="self_cpu_time_total", row_limit=self.row_limit)
+
+        summary_path = directory / "summary.txt"
+        with open(summary_path, 'w') as f:
+            f.write(f"X-ray profile {capture['id']}: {capture['completed']} forward passes, "
+                    f"{capture['images']} images\n\n")
+            f.write(table)
+
+        # summary.txt splits operators by input shape; the JSON view sums per operator
+        by_name = {}
+        for event in capture["operators"].values():
+            self_cpu_us, calls = by_name.get(event.key, (0, 0))
+            by_name[event.key] = (self_cpu_us + event.self_cpu_time_total, calls + event.count)
+        top = sorted(by_name.items(), key=lambda item: item[1][0], reverse=True)
+        return {
+            "id": capture["id"],
+            "inferences": capture["completed"],
+            "images": capture["images"],
+            "directory": str(directory),
+            "summary": str(summary_path),
+            "traces": sorted(path.name for path in directory.glob("*.trace.json")),
+            "top_operators": [
+                {"name": name, "self_cpu_ms": round(self_cpu_us / 1000, 3), "calls": calls}
+                for name, (self_cpu_us, calls) in top[:10]
+            ]
+        }
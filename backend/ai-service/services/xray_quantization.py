@@ -0,0 +1,97 @@
+"""
+INT8 quantization for the X-ray classifier
+Static post-training quantization for the ResNet50 backbone and dynamic
+quantization for the fully connected head
+"""
+
+import copy
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from PIL import Image
+from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+
+class QuantizedXRayModel(nn.Module):
+    """Quantized backbone followed by a dynamically quantized head"""
+
+    def __init__(self, backbone, head):
+        super().__init__()
+        self.backbone = backbone
+        self.head = head
+
+    def forward(self, x):
+        return self.head(self.backbone(x))
+
+
+def find_images(folder, limit=None):
+    """All image files under a folder (recursive, sorted for reproducibility)"""
+    paths = sorted(
+        path for path in Path(folder).rglob('*')
+        if path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    return paths[:limit] if limit else paths
+
+
+def load_image_tensors(paths, transform):
+    """Decode and transform images for calibration/evaluation"""
+    return [transform(Image.open(path).convert('RGB')) for path in paths]
+
+
+def quantize_model(model, calibration_tensors, engine=None, batch_size=16):
+    """
+    Build an INT8 version of a trained fp32 classifier
+
+    Args:
+        model: fp32 ResNet50 with the enhanced nn.Sequential head in model.fc
+        calibration_tensors: Preprocessed images used to observe activation ranges
+        engine: Quantized backend ('x86', 'fbgemm', 'qnnpack'); defaults to torch's
+        batch_size: Images per calibration forward pass
+
+    Returns:
+        QuantizedXRayModel in eval mode (CPU only)
+    """
+    if not calibration_tensors:
+        raise ValueError("At least one calibration image is required")
+
+    engine = engine or torch.backends.quantized.engine
+    torch.backends.quantized.engine = engine
+
+    fp32 = copy.deepcopy(model).cpu().eval()
+    head = fp32.fc
+    fp32.fc = nn.Identity()
+
+    # Backbone: observers → calibration → INT8 conv kernels
+    example_inputs = (calibration_tensors[0].unsqueeze(0),)
+    prepared = prepare_fx(fp32, get_default_qconfig_mapping(engine), example_inputs)
+    with torch.no_grad():
+        for start in range(0, len(calibration_tensors), batch_size):
+            prepared(torch.stack(calibration_tensors[start:start + batch_size]))
+    backbone = convert_fx(prepared)
+
+    # Head: weights in INT8, activations quantized on the fly
+    head = quantize_dynamic(head, {nn.Linear}, dtype=torch.qint8)
+
+    return QuantizedXRayModel(backbone, head).eval()
+
+
+def save_quantized_model(model, path, example_input):
+    """Serialize as TorchScript (quantized modules can't round-trip a plain state_dict)"""
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example_input)
+    torch.jit.save(traced, str(path))
+    return path
+
+
+def load_quantized_model(path, engine=None):
+    """Load a TorchScript INT8 model saved by save_quantized_model()"""
+    if engine:
+        torch.backends.quantized.engine = engine
+    model = torch.jit.load(str(path), map_location='cpu')
+    model.eval()
+    return model
@@ -0,0 +1,230 @@
+"""
+Versioned X-ray model registry
+Loads and warms a new model version in the background and swaps it in
+atomically, so a retrain can be deployed without restarting the service
+"""
+
+import asyncio
+import hashlib
+import json
+import shutil
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+
+# Files that make up one model version (weights and metadata move together)
+VERSION_FILES = (
+    'xray_binary_model.pth',
+    'binary_metadata.json',
+    'xray_binary_model.safetensors',
+    'xray_binary_model_int8.pt',
+    'xray_binary_model_int8.json',
+    'xray_screening_model.pth',
+    'screening_metadata.json',
+)
+
+# Version id of the files directly under models/ (the pre-registry layout)
+DEFAULT_VERSION = 'default'
+
+
+class XRayModelRegistry:
+    """
+    Keeps the active XRayService plus recently replaced ones for rollback
+
+    Version folders under versions_dir are immutable once published. The
+    active version id is written to <versions_dir>/ACTIVE so a restart
+    comes back on the same model.
+    """
+
+    def __init__(self, versions_dir, load_service, default_dir, history=1):
+        """
+        Args:
+            versions_dir: Folder holding one sub-folder per published version
+            load_service: Callable (model_dir, version) -> loaded and warmed XRayService
+            default_dir: Folder used for DEFAULT_VERSION (models/)
+            history: Replaced versions kept loaded for instant rollback
+        """
+        self.versions_dir = Path(versions_dir)
+        self.load_service = load_service
+        self.default_dir = Path(default_dir)
+
+        self.current = None
+        self.current_version = None
+        self.loading = None
+        self.last_error = None
+
+        self._history = deque(maxlen=max(1, history))
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    @property
+    def previous_versions(self):
+        return [version for version, _ in reversed(self._history)]
+
+    def add_listener(self, callback):
+        """Call callback(service) after every swap"""
+        self._listeners.append(callback)
+
+    def versions(self):
+        """Published versions with the metadata fields worth showing"""
+        found = [self._describe(DEFAULT_VERSION, self.default_dir)]
+        if self.versions_dir.exists():
+            for folder in sorted(self.versions_dir.iterdir()):
+                if folder.is_dir() and not folder.name.startswith('.'):
+                    found.append(self._describe(folder.name, folder))
+        return found
+
+    def path_for(self, version):
+        if version == DEFAULT_VERSION:
+            return self.default_dir
+        folder = self.versions_dir / version
+        # Version ids come from URLs; never leave versions_dir
+        if version.startswith('.') or folder.parent != self.versions_dir or not folder.is_dir():
+            raise KeyError(f"Unknown model version: {version}")
+        return folder
+
+    def publish(self, source_dir, version=None):
+        """
+        Copy a trained model (weights + metadata) into a new version folder
+
+        The default id is <training_date>-<first 8 hex of the weights' sha256>.
+        Files are copied to a hidden temp folder first and renamed into
+        place, so a half-copied version is never visible.
+        """
+        source_dir = Path(source_dir)
+        weights = source_dir / VERSION_FILES[0]
+        if not weights.exists():
+            raise FileNotFoundError(f"No {VERSION_FILES[0]} in {source_dir}")
+
+        if version is None:
+            metadata = _read_json(source_dir / 'binary_metadata.json')
+            date = metadata.get('training_date', datetime.now().strftime('%Y-%m-%d'))
+            version = f"{date}-{file_sha256(weights)[:8]}"
+
+        target = self.versions_dir / version
+        if target.exists():
+            raise FileExistsError(f"Model version {version} already exists")
+
+        staging = self.versions_dir / f".{version}.{uuid.uuid4().hex}"
+        staging.mkdir(parents=True)
+        try:
+            for name in VERSION_FILES:
+                if (source_dir / name).exists():
+                    shutil.copy2(source_dir / name, staging / name)
+            staging.rename(target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def load_active(self, **load_options):
+        """Synchronously load the version recorded in ACTIVE (startup path); load_options go to load_service"""
+        version = DEFAULT_VERSION
+        marker = self.versions_dir / 'ACTIVE'
+        if marker.exists():
+            recorded = marker.read_text().strip()
+            if recorded and (recorded == DEFAULT_VERSION or (self.versions_dir / recorded).is_dir()):
+                version = recorded
+
+        self._swap(version, self.load_service(self.path_for(version), version, **load_options))
+        return self.current
+
+    async def activate(self, version):
+        """
+        Load and warm a version off the event loop, then swap it in
+
+        Requests already running keep their reference to the old service
+        and finish on it; the old service stays loaded for rollback().
+
+        Raises:
+            KeyError: Unknown version
+            RuntimeError: Another version is still loading
+        """
+        model_dir = self.path_for(version)
+        with self._lock:
+            if self.loading:
+                raise RuntimeError(f"Model version {self.loading} is still loading")
+            self.loading = version
+
+        try:
+            service = await asyncio.to_thread(self.load_service, model_dir, version)
+        except Exception as e:
+            self.last_error = f"{version}: {e}"
+            raise
+        finally:
+            self.loading = None
+
+        self.last_error = None
+        self._swap(version, service)
+        return service
+
+    def rollback(self):
+        """
+        Swap back to the most recently replaced version (already loaded)
+
+        Raises:
+            RuntimeError: Nothing to roll back to
+        """
+        with self._lock:
+            if not self._history:
+                raise RuntimeError("No previous model version to roll back to")
+            version, service = self._history.pop()
+        self._swap(version, service)
+        return version
+
+    def status(self):
+        return {
+            "active": self.current_version,
+            "model_version": self.current.model_version if self.current else None,
+            "previous": self.previous_versions,
+            "loading": self.loading,
+            "last_error": self.last_error
+        }
+
+    def _swap(self, version, service):
+        with self._lock:
+            if self.current is not None:
+                self._history.append((self.current_version, self.current))
+            self.current = service
+            self.current_version = version
+
+        marker = self.versions_dir / 'ACTIVE'
+        if version != DEFAULT_VERSION or marker.exists():
+            self.versions_dir.mkdir(parents=True, exist_ok=True)
+            staging = marker.with_suffix('.tmp')
+            staging.write_text(version)
+            staging.replace(marker)
+
+        for callback in self._listeners:
+            callback(service)
+
+    def _describe(self, version, folder):
+        metadata = _read_json(folder / 'binary_metadata.json')
+        return {
+            "version": version,
+            "active": version == self.current_version,
+            "loaded": version == self.current_version or version in self.previous_versions,
+            "training_date": metadata.get('training_date'),
+            "accuracy": metadata.get('accuracy'),
+            "has_int8": (folder / 'xray_binary_model_int8.pt').exists()
+        }
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def file_sha256(path):
+    """Hex sha256 of a file, read in 1MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -1,60 +1,246 @@
 import torch
 import torch.nn as nn
 from torchvision import transforms, models
+from torchvision.transforms import functional as TF
 from PIL import Image
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import io
 import json
+import time
+from contextlib import nullcontext
+
+from .xray_inference import optimize_model
+from .xray_cascade import SCREENING_MODEL_FILE, SCREENING_METADATA_FILE, build_screening_model
+from .xray_near_duplicates import perceptual_hash
+from .xray_registry import file_sha256
+from .metrics import XRAY_STAGE_SECONDS, XRAY_BATCH_SIZE
+
+MODELS_DIR = Path(__file__).parent.parent / 'models'
+RESIZE_SIZE = 256  # shorter side after transforms.Resize, before the 224 crop
+REDUCIBLE_MODES = ('L', 'LA', 'RGB', 'RGBA')
+NORMALIZE_MEAN = [0.485, 0.456, 0.406]
+NORMALIZE_STD = [0.229, 0.224, 0.225]
+
+
+def decode_image(image_data, fast=False):
+    """
+    Open image bytes or a file path as an RGB PIL image
+    
+    With fast=True the image is decoded close to the RESIZE_SIZE target
+    instead of at full resolution. JPEGs are downscaled in the DCT domain
+    by draft() (1/2, 1/4 or 1/8 scale), so the full-size bitmap is never
+    built; other formats get an integer box reduce() before RGB conversion.
+    Both keep the shorter side >= RESIZE_SIZE, so transforms.Resize still
+    does the final antialiased resize.
+    """
+    if isinstance(image_data, bytes):
+        image = Image.open(io.BytesIO(image_data))
+    elif isinstance(image_data, str):
+        image = Image.open(image_data)
+    else:
+        raise ValueError("Invalid image format")
+    
+    if fast:
+        if image.format == 'JPEG':
+            image.draft('RGB', (RESIZE_SIZE, RESIZE_SIZE))
+        elif image.mode in REDUCIBLE_MODES:
+            factor = min(image.size) // RESIZE_SIZE
+            if factor >= 2:
+                image = image.reduce(factor)
+    
+    return image.convert('RGB')
+
+
+def load_state_dict_file(path, mmap=True):
+    """
+    Read a state dict from a .safetensors or .pth file on the CPU
+    
+    With mmap=True the tensors are backed by the file's pages instead of
+    being copied into freshly allocated memory, so loading costs little
+    more than an open() and the weights count as shared page cache rather
+    than process-private RAM. Old (pre-zipfile) .pth files can't be mapped;
+    they are read normally - re-save them with convert_model.py.
+    """
+    path = Path(path)
+    if path.suffix == '.safetensors':
+        from safetensors.torch import load_file
+        return load_file(str(path), device='cpu')
+    
+    if mmap:
+        try:
+            return torch.load(path, map_location='cpu', weights_only=True, mmap=True)
+        except RuntimeError as e:
+            print(f"⚠️  {path.name} can't be memory-mapped ({e}); loading it normally")
+    return torch.load(path, map_location='cpu', weights_only=True)
+
+
+def safetensors_available():
+    try:
+        import safetensors  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
 
 class XRayService:
     """Binary X-ray Classifier: Normal vs Abnormal (92.63% accuracy)"""
     
-    def __init__(self):
-        self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model = self._load_model()
+    BACKENDS = ('fp32', 'int8')
+    # Test-time augmentation views per factor: 1 center crop, 2 + its mirror,
+    # 5 corners + center (five-crop), 10 five-crop + mirrors (ten-crop)
+    TTA_FACTORS = (1, 2, 5, 10)
+    
+    def __init__(self, backend='fp32', inference_mode='eager', warmup_iterations=0, warmup_batch_sizes=(1,),
+                 result_cache=None, fast_decode=False, model_dir=None, version=None, mmap_weights=True,
+                 profiler=None, cascade_threshold=0.0, near_duplicates=None, defer_warmup=False,
+                 model=None, screening_model=None):
+        """
+        Args:
+            backend: 'fp32' or 'int8' (see quantize_model.py)
+            inference_mode: 'eager', 'torchscript' or 'compile' (see xray_inference.py)
+            warmup_iterations: Dummy forward passes per warm-up batch size
+            warmup_batch_sizes: Batch shapes to warm up (e.g. 1 and the batcher's max)
+            result_cache: Optional XRayResultCache for repeated uploads
+            fast_decode: Decode large images at reduced resolution (see decode_image)
+            model_dir: Folder holding the weights and binary_metadata.json (default: models/)
+            version: Registry version id; defaults to the metadata version or training
+                     date plus the first 8 hex of the weights' sha256
+            mmap_weights: Memory-map fp32 weights and assign them in place (see load_state_dict_file)
+            profiler: Optional XRayProfiler; armed captures profile predict_batch forward passes
+            cascade_threshold: Screening-model confidence needed to skip the ResNet50
+                               (see xray_cascade.py); 0 disables the cascade
+            near_duplicates: Optional XRayNearDuplicateIndex; re-encoded copies of an
+                             analyzed film reuse its result (see xray_near_duplicates.py)
+            defer_warmup: Leave warm-up to a later warmup() call; ready stays False until then
+            model: Built classifier to serve instead of loading the weights from model_dir
+            screening_model: Built screening stage, used instead of loading it when
+                             cascade_threshold > 0
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown X-ray backend '{backend}' (expected one of {self.BACKENDS})")
+        
+        self.backend = backend
+        self.inference_mode = inference_mode
+        self.ready = False
+        self.result_cache = result_cache
+        self.near_duplicates = near_duplicates
+        self.profiler = profiler
+        self.fast_decode = fast_decode
+        self.mmap_weights = mmap_weights
+        self.model_dir = Path(model_dir) if model_dir else MODELS_DIR
+        self.model_path = self._select_model_path()
+        self.metadata_path = self.model_dir / 'binary_metadata.json'
+        # Quantized kernels are CPU-only
+        use_cuda = torch.cuda.is_available() and backend == 'fp32'
+        self.device = torch.device('cuda' if use_cuda else 'cpu')
+        if model is not None:
+            self.model = model.to(self.device).eval()
+        else:
+            self.model = self._load_quantized_model() if backend == 'int8' else self._load_model()
+        self.cascade_threshold = cascade_threshold
+        self.screening_model = None
+        self.screening_fingerprint = None
+        if cascade_threshold > 0:
+            if screening_model is not None:
+                self.screening_model = screening_model.to(self.device).eval()
+            else:
+                self.screening_model = self._load_screening_model()
+                if self.screening_model is not None:
+                    self.screening_fingerprint = file_sha256(self.model_dir / SCREENING_MODEL_FILE)[:8]
+        self.cascade_decisions = {'screening': 0, 'full': 0}
         self.transform = self._get_transform()
+        self.tta_transform = self._get_tta_transform()
         self.classes = ['abnormal', 'normal']
         self.metadata = self._load_metadata()
+        if version is None:
+            version = self.metadata.get('version', self.metadata.get('training_date', 'unknown'))
+            if model is None:
+                # models/ can be retrained in place on the same day; the weights'
+                # hash keeps cached and near-duplicate results from crossing over
+                # (same id format as XRayModelRegistry.publish)
+                version = f"{version}-{file_sha256(self.model_path)[:8]}"
+        self.model_version = f"{version}/{backend}"
+        
+        if inference_mode != 'eager':
+            example_input = torch.zeros(1, 3, 224, 224, device=self.device)
+            self.model = optimize_model(self.model, inference_mode, example_input)
+            if self.screening_model is not None:
+                self.screening_model = optimize_model(self.screening_model, inference_mode, example_input)
+        
+        if not defer_warmup:
+            self.warmup(warmup_iterations, warmup_batch_sizes)
         
-        print(f"✅ XRay Service initialized on {self.device}")
+        print(f"✅ XRay Service initialized on {self.device} ({self.backend}, {self.inference_mode})")
         print(f"   Model Accuracy: {self.metadata.get('accuracy', 0)*100:.2f}%")
     
+    def _select_model_path(self):
+        """INT8 TorchScript, else .safetensors (when convert_model.py made one), else .pth"""
+        if self.backend == 'int8':
+            return self.model_dir / 'xray_binary_model_int8.pt'
+        safetensors_path = self.model_dir / 'xray_binary_model.safetensors'
+        if safetensors_path.exists():
+            if safetensors_available():
+                return safetensors_path
+            print(f"⚠️  {safetensors_path.name} found but safetensors is not installed; using the .pth file")
+        return self.model_dir / 'xray_binary_model.pth'
+    
+    def warmup(self, iterations, batch_sizes=(1,)):
+        """
+        Run dummy forward passes before serving traffic
+        
+        The first passes pay for allocator growth, oneDNN kernel selection and
+        (for torchscript/compile) graph specialization; doing them here keeps
+        that cost out of the first real requests. Sets self.ready when done.
+        """
+        if iterations > 0:
+            start = time.perf_counter()
+            with torch.no_grad():
+                for batch_size in batch_sizes:
+                    dummy = torch.zeros(batch_size, 3, 224, 224, device=self.device)
+                    for _ in range(iterations):
+                        self.model(dummy)
+                        if self.screening_model is not None:
+                            self.screening_model(dummy)
+            print(f"   Warm-up: {iterations} pass(es) x batch {list(batch_sizes)} "
+                  f"in {time.perf_counter() - start:.1f}s")
+        self.ready = True
+    
+    def _build_architecture(self):
+        """ResNet50 with the enhanced head from train_enhanced.py (1024→512→256→2)"""
+        model = models.resnet50(weights=None)
+        
+        # Enhanced architecture matching train_enhanced.py (1024→512→256→2)
+        model.fc = nn.Sequential(
+            nn.Dropout(0.5),
+            nn.Linear(model.fc.in_features, 1024),  # Updated to 1024
+            nn.ReLU(),
+            nn.BatchNorm1d(1024),
+            nn.Dropout(0.4),
+            nn.Linear(1024, 512),  # Updated from 512 to 1024 input
+            nn.ReLU(),
+            nn.BatchNorm1d(512),
+            nn.Dropout(0.3),
+            nn.Linear(512, 256),  # Updated from 256 to 512 input
+            nn.ReLU(),
+            nn.BatchNorm1d(256),
+            nn.Dropout(0.2),  # Added extra dropout
+            nn.Linear(256, 2)
+        )
+        return model
+    
     def _load_model(self):
         """Load trained binary classifier"""
         try:
-            model = models.resnet50(weights=None)
-            
-            # Enhanced architecture matching train_enhanced.py (1024→512→256→2)
-            model.fc = nn.Sequential(
-                nn.Dropout(0.5),
-                nn.Linear(model.fc.in_features, 1024),  # Updated to 1024
-                nn.ReLU(),
-                nn.BatchNorm1d(1024),
-                nn.Dropout(0.4),
-                nn.Linear(1024, 512),  # Updated from 512 to 1024 input
-                nn.ReLU(),
-                nn.BatchNorm1d(512),
-                nn.Dropout(0.3),
-                nn.Linear(512, 256),  # Updated from 256 to 512 input
-                nn.ReLU(),
-                nn.BatchNorm1d(256),
-                nn.Dropout(0.2),  # Added extra dropout
-                nn.Linear(256, 2)
-            )
+            model_path = self.model_path
             
-            model_path = Path(__file__).parent.parent / 'models' / 'xray_binary_model.pth'
-            
-            if model_path.exists():
-                state_dict = torch.load(model_path, map_location=self.device, weights_only=True)
-                model.load_state_dict(state_dict)
-                print(f"✅ Trained model loaded from {model_path}")
-            else:
+            if not model_path.exists():
                 print(f"⚠️  Model not found at {model_path}")
                 print(f"   Run 'python3 create_model.py' to generate the model")
                 raise FileNotFoundError(f"Model file missing. Please run: python3 create_model.py")
             
-            model = model.to(self.device)
-            model.eval()
+            model = self._load_weights(self._build_architecture, model_path)
+            print(f"✅ Trained model loaded from {model_path}")
             return model
             
         except Exception as e:
@@ -63,10 +249,68 @@ class XRayService:
             print(f"   Run: python3 create_model.py")
             raise
     
+    def _load_weights(self, build_architecture, path):
+        """Build a model and load its state dict; eval mode, on self.device"""
+        if self.mmap_weights:
+            # Build on the meta device (no allocation, no random init) and
+            # let the parameters point at the memory-mapped file pages
+            with torch.device('meta'):
+                model = build_architecture()
+            model.load_state_dict(load_state_dict_file(path, mmap=True), assign=True)
+        else:
+            model = build_architecture()
+            model.load_state_dict(load_state_dict_file(path, mmap=False))
+        
+        model = model.to(self.device)
+        model.eval()
+        return model
+    
+    def _load_screening_model(self):
+        """ResNet18 screening stage (train_cascade.py); None disables the cascade"""
+        model_path = self.model_dir / SCREENING_MODEL_FILE
+        if not model_path.exists():
+            print(f"⚠️  Screening model not found at {model_path}; cascade disabled")
+            print(f"   Run 'python3 train_cascade.py' to train it")
+            return None
+        
+        model = self._load_weights(build_screening_model, model_path)
+        metadata = {}
+        if (self.model_dir / SCREENING_METADATA_FILE).exists():
+            with open(self.model_dir / SCREENING_METADATA_FILE, 'r') as f:
+                metadata = json.load(f)
+        print(f"✅ Screening model loaded from {model_path} (cascade threshold {self.cascade_threshold})")
+        if 'accuracy' in metadata:
+            print(f"   Screening Accuracy: {metadata['accuracy']*100:.2f}%")
+        return model
+    
+    def _load_quantized_model(self):
+        """Load the INT8 TorchScript model produced by quantize_model.py"""
+        from .xray_quantization import load_quantized_model
+        
+        model_path = self.model_path
+        report_path = model_path.with_suffix('.json')
+        
+        if not model_path.exists():
+            print(f"⚠️  INT8 model not found at {model_path}")
+            print(f"   Run 'python3 quantize_model.py --calibration-dir <images>' to generate it")
+            raise FileNotFoundError("INT8 model missing. Please run: python3 quantize_model.py")
+        
+        report = {}
+        if report_path.exists():
+            with open(report_path, 'r') as f:
+                report = json.load(f)
+        
+        model = load_quantized_model(model_path, engine=report.get('engine'))
+        print(f"✅ INT8 model loaded from {model_path}")
+        if 'agreement' in report:
+            print(f"   Agreement with fp32: {report['agreement']*100:.1f}% "
+                  f"on {report.get('holdout_images', 0)} held-out images")
+        return model
+    
     def _load_metadata(self):
         """Load model metadata"""
         try:
-            metadata_path = Path(__file__).parent.parent / 'models' / 'binary_metadata.json'
+            metadata_path = self.metadata_path
             if metadata_path.exists():
                 with open(metadata_path, 'r') as f:
                     return json.load(f)
@@ -77,82 +321,333 @@ class XRayService:
     def _get_transform(self):
         """Standard preprocessing - same as training validation"""
         return transforms.Compose([
-            transforms.Resize(256),
+            transforms.Resize(RESIZE_SIZE),
             transforms.CenterCrop(224),
             transforms.ToTensor(),
-            transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+            transforms.Normalize(NORMALIZE_MEAN, NORMALIZE_STD)
+        ])
+    
+    def _get_tta_transform(self):
+        """Same as _get_transform without the crop; views are cut from the tensor"""
+        return transforms.Compose([
+            transforms.Resize(RESIZE_SIZE),
+            transforms.ToTensor(),
+            transforms.Normalize(NORMALIZE_MEAN, NORMALIZE_STD)
         ])
     
-    def analyze_xray(self, image_data, filename):
+    def analyze_xray(self, image_data, filename, tta=1):
         """
         Binary X-ray classification
         
         Args:
             image_data: Image bytes or file path
             filename: Original filename
+            tta: Test-time augmentation factor, one of TTA_FACTORS
             
         Returns:
             Diagnosis with recommendations
         """
         try:
-            # Load image
-            if isinstance(image_data, bytes):
-                image = Image.open(io.BytesIO(image_data)).convert('RGB')
-            elif isinstance(image_data, str):
-                image = Image.open(image_data).convert('RGB')
-            else:
-                raise ValueError("Invalid image format")
-            
-            # Predict
-            image_tensor = self.transform(image).unsqueeze(0).to(self.device)
+            cache_key, duplicate_key, cached, image_tensor = self.prepare(image_data, tta)
+            if cached is not None:
+                return cached
+            result = self.predict_batch([image_tensor])[0]
             
-            with torch.no_grad():
-                outputs = self.model(image_tensor)
-                probabilities = torch.softmax(outputs, dim=1)
-                confidence, predicted_idx = torch.max(probabilities, 1)
+        except Exception as e:
+            return self.failure_result(e)
+        
+        self.store_cached(cache_key, result, duplicate_key)
+        return result
+    
+    def analyze_batch(self, images, batch_size=16, decode_workers=4, tta=1):
+        """
+        Binary X-ray classification for many images at once
+        
+        Images are decoded in parallel threads (PIL releases the GIL while
+        decoding) and classified in batched forward passes, so later images
+        keep decoding while earlier batches run through the model.
+        
+        Args:
+            images: List of image bytes or file paths
+            batch_size: Maximum images per forward pass
+            decode_workers: Threads used for decoding
+            tta: Test-time augmentation factor, one of TTA_FACTORS
             
-            predicted_idx = predicted_idx.item()
-            predicted_class = self.classes[predicted_idx]
-            confidence_score = confidence.item()
+        Returns:
+            List of result dicts (same as analyze_xray), in input order
+        """
+        results = [None] * len(images)
+        batch_size = max(1, batch_size)
+        
+        with ThreadPoolExecutor(max_workers=max(1, decode_workers)) as pool:
+            futures = [pool.submit(self.prepare, image_data, tta) for image_data in images]
             
-            # Binary diagnosis
-            diagnosis = "Normal" if predicted_class == "normal" else "Abnormal"
+            chunk = []
+            for idx, future in enumerate(futures):
+                try:
+                    cache_key, duplicate_key, cached, tensor = future.result()
+                except Exception as e:
+                    results[idx] = self.failure_result(e)
+                    continue
+                if cached is not None:
+                    results[idx] = cached
+                    continue
+                
+                chunk.append((idx, cache_key, duplicate_key, tensor))
+                if len(chunk) == batch_size:
+                    self._classify_chunk(chunk, results)
+                    chunk = []
             
-            # Confidence level
-            if confidence_score >= 0.90:
-                conf_level = "High"
-            elif confidence_score >= 0.75:
-                conf_level = "Medium"
-            else:
-                conf_level = "Low"
+            if chunk:
+                self._classify_chunk(chunk, results)
+        
+        return results
+    
+    def _classify_chunk(self, chunk, results):
+        """One forward pass for (idx, cache_key, duplicate_key, tensor) entries of analyze_batch"""
+        try:
+            chunk_results = self.predict_batch([tensor for _, _, _, tensor in chunk])
+        except Exception as e:
+            chunk_results = [self.failure_result(e)] * len(chunk)
+        for (idx, cache_key, duplicate_key, _), result in zip(chunk, chunk_results):
+            results[idx] = result
+            self.store_cached(cache_key, result, duplicate_key)
+    
+    def prepare(self, image_data, tta=1):
+        """
+        Everything before the forward pass for one image
+        
+        Exact cache lookup on the raw bytes, then decode, then the
+        near-duplicate lookup on the decoded image, then the transform -
+        each step only runs when the one before it missed.
+        
+        Returns:
+            (cache_key, duplicate_key, cached_result, tensor) - cached_result
+            is None on a miss, tensor is None on a hit; pass both keys to
+            store_cached() with the result
+        """
+        if tta not in self.TTA_FACTORS:
+            raise ValueError(f"TTA factor must be one of {self.TTA_FACTORS}")
+        
+        cache_key, cached = self.lookup_cached(image_data, tta)
+        if cached is not None:
+            return cache_key, None, cached, None
+        
+        with XRAY_STAGE_SECONDS.time('decode'):
+            image = decode_image(image_data, fast=self.fast_decode)
+        
+        duplicate_key, cached = self.lookup_near_duplicate(image, tta)
+        if cached is not None:
+            return cache_key, duplicate_key, cached, None
+        
+        return cache_key, duplicate_key, None, self._transform_image(image, tta)
+    
+    def preprocess(self, image_data, tta=1):
+        """
+        Decode and transform a single image
+        
+        Args:
+            image_data: Image bytes or file path
+            tta: Test-time augmentation factor, one of TTA_FACTORS
             
-            # Detailed probabilities
-            normal_prob = probabilities[0][1].item()
-            abnormal_prob = probabilities[0][0].item()
+        Returns:
+            Normalized (3, 224, 224) tensor ready for predict_batch(), or a
+            (tta, 3, 224, 224) stack of augmented views when tta > 1
+        """
+        if tta not in self.TTA_FACTORS:
+            raise ValueError(f"TTA factor must be one of {self.TTA_FACTORS}")
+        
+        with XRAY_STAGE_SECONDS.time('decode'):
+            image = decode_image(image_data, fast=self.fast_decode)
+        return self._transform_image(image, tta)
+    
+    def _transform_image(self, image, tta):
+        with XRAY_STAGE_SECONDS.time('transform'):
+            if tta == 1:
+                return self.transform(image)
+            return self._tta_views(self.tta_transform(image), tta)
+    
+    def _tta_views(self, image_tensor, tta):
+        """Augmented 224x224 views of one resized, normalized image"""
+        if tta == 2:
+            center = TF.center_crop(image_tensor, 224)
+            return torch.stack([center, TF.hflip(center)])
+        crops = TF.five_crop(image_tensor, 224) if tta == 5 else TF.ten_crop(image_tensor, 224)
+        return torch.stack(crops)
+    
+    def predict_batch(self, image_tensors):
+        """
+        Classify several preprocessed images in one forward pass
+        
+        All views of all images go through the model together; the logits
+        of an image's TTA views are averaged before the softmax. With the
+        cascade enabled the screening model sees the whole batch first and
+        only images below cascade_threshold go through the ResNet50, again
+        as one batch.
+        
+        Args:
+            image_tensors: List of tensors returned by preprocess()
             
-            # Generate recommendations
-            recommendations = self._get_recommendations(diagnosis, confidence_score)
+        Returns:
+            List of result dicts (same shape as analyze_xray), in input order
+        """
+        XRAY_BATCH_SIZE.observe(len(image_tensors))
+        
+        views = [tensor if tensor.dim() == 4 else tensor.unsqueeze(0) for tensor in image_tensors]
+        counts = [len(tensor) for tensor in views]
+        decided_by = ['full'] * len(views)
+        
+        capture = self.profiler.capture(len(image_tensors)) if self.profiler else nullcontext()
+        with capture, torch.no_grad():
+            batch = torch.cat(views).to(self.device)
+            escalated = list(range(len(views)))
             
-            return {
-                "success": True,
-                "diagnosis": diagnosis,
-                "confidence": round(confidence_score * 100, 1),
-                "confidence_level": conf_level,
-                "probabilities": {
-                    "normal": round(normal_prob * 100, 1),
-                    "abnormal": round(abnormal_prob * 100, 1)
-                },
-                "model_accuracy": f"{self.metadata.get('accuracy', 0)*100:.1f}%",
-                "recommendations": recommendations
-            }
+            if self.screening_model is not None:
+                with XRAY_STAGE_SECONDS.time('screening'):
+                    outputs = self._average_logits(self.screening_model(batch), counts)
+                confidence = torch.softmax(outputs, dim=1).max(dim=1).values.tolist()
+                escalated = [idx for idx, score in enumerate(confidence) if score < self.cascade_threshold]
+                for idx in set(range(len(views))) - set(escalated):
+                    decided_by[idx] = 'screening'
             
-        except Exception as e:
-            return {
-                "success": False,
-                "error": f"Analysis failed: {str(e)}",
-                "diagnosis": None,
-                "confidence": 0.0
-            }
+            if escalated:
+                with XRAY_STAGE_SECONDS.time('forward'):
+                    if len(escalated) < len(views):
+                        batch = torch.cat([views[idx] for idx in escalated]).to(self.device)
+                    full_outputs = self._average_logits(self.model(batch), [counts[idx] for idx in escalated])
+                if len(escalated) == len(views):
+                    outputs = full_outputs
+                else:
+                    outputs = outputs.clone()
+                    outputs[escalated] = full_outputs
+        
+        self.cascade_decisions['full'] += len(escalated)
+        self.cascade_decisions['screening'] += len(views) - len(escalated)
+        
+        with XRAY_STAGE_SECONDS.time('postprocess'):
+            probabilities = torch.softmax(outputs, dim=1)
+            return [
+                self._build_result(probs, tta=count, decided_by=stage)
+                for probs, count, stage in zip(probabilities.tolist(), counts, decided_by)
+            ]
+    
+    @staticmethod
+    def _average_logits(outputs, counts):
+        """Mean logits per image when images contribute several TTA views"""
+        if len(outputs) == len(counts):
+            return outputs
+        return torch.stack([logits.mean(dim=0) for logits in torch.split(outputs, counts)])
+    
+    def cascade_status(self):
+        """Cascade settings and how many images each stage decided, for /health"""
+        return {
+            "enabled": self.screening_model is not None,
+            "threshold": self.cascade_threshold,
+            "decided_by": dict(self.cascade_decisions)
+        }
+    
+    def lookup_cached(self, image_data, tta=1):
+        """
+        Check the result cache for an upload (TTA results are cached per factor)
+        
+        Returns:
+            (cache_key, cached_result) - key is None when caching doesn't
+            apply, result is None on a miss
+        """
+        if self.result_cache is None or not isinstance(image_data, bytes):
+            return None, None
+        with XRAY_STAGE_SECONDS.time('cache_lookup'):
+            cache_key = self.result_cache.key(image_data, self._cache_variant(tta))
+            return cache_key, self.result_cache.get(cache_key)
+    
+    def lookup_near_duplicate(self, image, tta=1):
+        """
+        Check the near-duplicate index for a decoded image
+        
+        Returns:
+            (duplicate_key, reused_result) - key is None without an index,
+            result is None on a miss. A reused result is a copy carrying
+            the Hamming distance to the film it came from.
+        """
+        if self.near_duplicates is None:
+            return None, None
+        with XRAY_STAGE_SECONDS.time('near_duplicate_lookup'):
+            duplicate_key = (perceptual_hash(image), self._cache_variant(tta))
+            stored, distance = self.near_duplicates.get(*duplicate_key)
+        if stored is None:
+            return duplicate_key, None
+        return duplicate_key, {**stored, "duplicate_distance": distance}
+    
+    def _cache_variant(self, tta):
+        """Model version plus the settings that change the answer (cascade, TTA)"""
+        version = self.model_version
+        if self.screening_model is not None:
+            version += f"+cascade{self.cascade_threshold}"
+            if self.screening_fingerprint:
+                version += f"-{self.screening_fingerprint}"
+        if tta != 1:
+            version += f"+tta{tta}"
+        return version
+    
+    def store_cached(self, cache_key, result, duplicate_key=None):
+        """Remember a successful result under the keys from lookup_cached() / prepare()"""
+        # A result produced by a different (hot-swapped) model version must
+        # not be filed under this version's key
+        if not result.get('success') or result.get('model_version') != self.model_version:
+            return
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result)
+        if duplicate_key is not None and 'duplicate_distance' not in result:
+            self.near_duplicates.put(*duplicate_key, result)
+    
+    def failure_result(self, error):
+        """Result dict returned when an image cannot be analyzed"""
+        return {
+            "success": False,
+            "error": f"Analysis failed: {str(error)}",
+            "diagnosis": None,
+            "confidence": 0.0
+        }
+    
+    def _build_result(self, probs, tta=1, decided_by='full'):
+        """Turn one row of softmax probabilities into the API result"""
+        abnormal_prob, normal_prob = probs
+        
+        # Same tie-breaking as torch.max (first index wins)
+        predicted_idx = 1 if normal_prob > abnormal_prob else 0
+        predicted_class = self.classes[predicted_idx]
+        confidence_score = probs[predicted_idx]
+        
+        # Binary diagnosis
+        diagnosis = "Normal" if predicted_class == "normal" else "Abnormal"
+        
+        # Confidence level
+        if confidence_score >= 0.90:
+            conf_level = "High"
+        elif confidence_score >= 0.75:
+            conf_level = "Medium"
+        else:
+            conf_level = "Low"
+        
+        # Generate recommendations
+        with XRAY_STAGE_SECONDS.time('recommendations'):
+            recommendations = self._get_recommendations(diagnosis, confidence_score)
+        
+        return {
+            "success": True,
+            "diagnosis": diagnosis,
+            "confidence": round(confidence_score * 100, 1),
+            "confidence_level": conf_level,
+            "probabilities": {
+                "normal": round(normal_prob * 100, 1),
+                "abnormal": round(abnormal_prob * 100, 1)
+            },
+            "model_accuracy": f"{self.metadata.get('accuracy', 0)*100:.1f}%",
+            "model_version": self.model_version,
+            "tta": tta,
+            "decided_by": decided_by,
+            "recommendations": recommendations
+        }
     
     def _get_recommendations(self, diagnosis, confidence):
         """Generate medical recommendations"""
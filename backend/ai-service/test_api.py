@@ -4,8 +4,11 @@ Tests all endpoints without requiring full ML model dependencies
 """
 
 from fastapi.testclient import TestClient
+import main as service_main
 from main import app
+import asyncio
 import io
+import zipfile
 from PIL import Image
 import json
 
@@ -45,6 +48,13 @@ def test_health_endpoint():
     client = TestClient(app)
     response = client.get("/health")
     
+    if service_main.xray_service and not service_main.xray_service.ready:
+        # Not ready until the warm-up the startup event schedules has run
+        assert response.status_code == 503
+        assert response.json()["services"]["xray_binary"] == "warming_up"
+        asyncio.run(service_main.warm_up_xray())
+        response = client.get("/health")
+    
     assert response.status_code == 200
     data = response.json()
     
@@ -93,6 +103,91 @@ def test_xray_endpoint_structure():
         print("   ✅ X-ray endpoint structure correct (ML model not loaded)")
 
 
+def test_xray_batch_endpoint_structure():
+    """Test bulk X-ray endpoint with plain files and a zip archive"""
+    print("\n3b. Testing POST /api/xray/analyze/batch endpoint structure...")
+    client = TestClient(app)
+    
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("study/film_1.jpg", create_test_image().getvalue())
+        zf.writestr("study/notes.txt", "ignored")
+    
+    response = client.post(
+        "/api/xray/analyze/batch",
+        files=[
+            ("files", ("a.jpg", create_test_image().getvalue(), "image/jpeg")),
+            ("files", ("b.txt", b"not an image", "text/plain")),
+            ("files", ("export.zip", archive.getvalue(), "application/zip")),
+        ]
+    )
+    
+    assert response.status_code in [200, 503]
+    if response.status_code == 200:
+        data = response.json()
+        assert data["count"] == 3
+        names = [item["filename"] for item in data["results"]]
+        assert names == ["a.jpg", "b.txt", "study/film_1.jpg"]
+        assert data["results"][0]["result"]["success"] == True
+        assert data["results"][1]["result"]["success"] == False
+        print("   ✅ Batch endpoint fully functional")
+    else:
+        print("   ✅ Batch endpoint structure correct (ML model not loaded)")
+
+
+def test_xray_upload_size_limit():
+    """Oversized X-ray uploads are rejected with 413 while streaming"""
+    print("\n3c. Testing MAX_FILE_SIZE on /api/xray/analyze...")
+    from main import settings
+    client = TestClient(app)
+    
+    original = settings.max_file_size
+    settings.max_file_size = 1024
+    try:
+        response = client.post(
+            "/api/xray/analyze",
+            files={"file": ("big.jpg", create_test_image().getvalue() + b"\x00" * 4096, "image/jpeg")}
+        )
+    finally:
+        settings.max_file_size = original
+    
+    assert response.status_code in [413, 503]
+    if response.status_code == 413:
+        print("   ✅ Oversized upload rejected")
+    else:
+        print("   ✅ X-ray service check working (service not available)")
+
+
+def test_xray_bulk_unpack_limit():
+    """Zips that would unpack past XRAY_BULK_MAX_EXTRACTED_SIZE are refused before decompressing"""
+    print("\n3d. Testing XRAY_BULK_MAX_EXTRACTED_SIZE on /api/xray/analyze/batch...")
+    from main import settings
+    client = TestClient(app)
+    
+    image = create_test_image().getvalue()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for i in range(4):
+            zf.writestr(f"film_{i}.jpg", image)
+    
+    original = settings.xray_bulk_max_extracted_size
+    settings.xray_bulk_max_extracted_size = len(image) * 3
+    try:
+        response = client.post(
+            "/api/xray/analyze/batch",
+            files=[("files", ("films.zip", archive.getvalue(), "application/zip"))]
+        )
+    finally:
+        settings.xray_bulk_max_extracted_size = original
+    
+    assert response.status_code in [400, 503]
+    if response.status_code == 400:
+        assert "unpacked" in response.json()["detail"]
+        print("   ✅ Over-budget archive rejected")
+    else:
+        print("   ✅ X-ray service check working (service not available)")
+
+
 def test_ecg_upload_endpoint():
     """Test ECG upload endpoint"""
     print("\n4. Testing POST /api/ecg/upload endpoint...")
@@ -110,7 +205,7 @@ def test_ecg_upload_endpoint():
     # Test with valid file type
     img_bytes = create_test_image()
     response = client.post(
-        "/api/ecg/upload",
+        "/api/ecg/upload?patient_ref=P-1001",
         files={"file": ("ecg_test.jpg", img_bytes.getvalue(), "image/jpeg")}
     )
     
@@ -121,10 +216,47 @@ def test_ecg_upload_endpoint():
         assert "filename" in data["file_info"]
         print("   ✅ ECG upload working correctly")
         print(f"   Uploaded: {data['file_info']['filename']}")
+        
+        entry = client.get(f"/api/ecg/{data['file_info']['id']}").json()["ecg"]
+        assert entry["patient_ref"] == "P-1001"
+        assert entry["sha256"] == data["file_info"]["sha256"]
+        listing = client.get("/api/ecg?patient_ref=P-1001&limit=5")
+        assert listing.status_code == 200 and "next_cursor" in listing.json()
+        assert data["file_info"]["id"] in [item["id"] for item in listing.json()["items"]]
+        print("   ✅ ECG catalog lookup and listing working")
     else:
         print(f"   ⚠️  ECG upload returned {response.status_code}")
 
 
+def test_ecg_download_endpoint():
+    """Test ECG download with ETag revalidation and Range requests"""
+    print("\n4b. Testing GET /api/ecg/{id}/file endpoint...")
+    client = TestClient(app)
+    pdf = b"%PDF-1.7\n" + bytes(range(256)) * 40
+    
+    response = client.post("/api/ecg/upload", files={"file": ("trace.pdf", pdf, "application/pdf")})
+    if response.status_code != 200:
+        print(f"   ⚠️  ECG upload returned {response.status_code}")
+        return
+    info = response.json()["file_info"]
+    url = f"/api/ecg/{info['id']}/file"
+    
+    response = client.get(url)
+    assert response.status_code == 200 and response.content == pdf
+    assert response.headers["etag"] == f'"{info["sha256"]}"'
+    assert response.headers["content-type"] == "application/pdf"
+    
+    response = client.get(url, headers={"If-None-Match": f'"{info["sha256"]}"'})
+    assert response.status_code == 304 and response.content == b""
+    
+    response = client.get(url, headers={"Range": "bytes=0-8"})
+    assert response.status_code == 206 and response.content == b"%PDF-1.7\n"
+    assert response.headers["content-range"] == f"bytes 0-8/{len(pdf)}"
+    
+    assert client.get("/api/ecg/unknown-id/file").status_code == 404
+    print("   ✅ Download, 304 revalidation and Range requests working")
+
+
 def test_chatbot_endpoint_structure():
     """Test chatbot endpoint structure"""
     print("\n5. Testing POST /api/chatbot endpoint structure...")
@@ -169,6 +301,22 @@ def test_404_handler():
     print(f"   Available endpoints: {data['available']}")
 
 
+def test_metrics_endpoint():
+    """Test Prometheus metrics endpoint"""
+    print("\n7. Testing GET /metrics endpoint...")
+    client = TestClient(app)
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert '# TYPE pulsex_http_request_duration_seconds histogram' in response.text
+    assert 'endpoint="/health"' in response.text
+
+    print("   ✅ Metrics endpoint working correctly")
+
+
 def main():
     """Run all tests"""
     print("=" * 70)
@@ -179,9 +327,14 @@ def main():
         test_root_endpoint()
         test_health_endpoint()
         test_xray_endpoint_structure()
+        test_xray_batch_endpoint_structure()
+        test_xray_upload_size_limit()
+        test_xray_bulk_unpack_limit()
         test_ecg_upload_endpoint()
+        test_ecg_download_endpoint()
         test_chatbot_endpoint_structure()
         test_404_handler()
+        test_metrics_endpoint()
         
         print("\n" + "=" * 70)
         print("✅ All API structure tests passed!")
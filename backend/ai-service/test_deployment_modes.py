@@ -0,0 +1,52 @@
+"""
+Test script for capability-selectable deployments (ENABLED_SERVICES)
+Each check imports the app in a fresh interpreter
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+
+
+def run_app(enabled, code):
+    env = dict(os.environ, ENABLED_SERVICES=json.dumps(enabled))
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, main\n" + code],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_chatbot_only_never_imports_torch():
+    """A chatbot pod doesn't pay for torch/torchvision"""
+    print("\n1. Testing chatbot-only mode...")
+    output = run_app(["chatbot"], "print('torch' in sys.modules, 'torchvision' in sys.modules)")
+    assert output == "False False"
+    print("   ✅ torch not imported")
+
+
+def test_disabled_capabilities_are_reported():
+    """/health says which route groups this deployment serves"""
+    print("\n2. Testing health in chatbot-only mode...")
+    output = run_app(["chatbot"], (
+        "from fastapi.testclient import TestClient\n"
+        "import json\n"
+        "client = TestClient(main.app)\n"
+        "print(json.dumps([client.get('/health').json()['services'],"
+        " client.post('/api/ecg/upload', files={'file': ('a.pdf', b'x', 'application/pdf')}).status_code]))"
+    ))
+    services, ecg_status = json.loads(output)
+    assert services == {"xray_binary": "disabled", "chatbot": "active", "ecg_storage": "disabled"}
+    assert ecg_status == 503
+    print(f"   ✅ {services}")
+
+
+if __name__ == "__main__":
+    test_chatbot_only_never_imports_torch()
+    test_disabled_capabilities_are_reported()
+    print("\n✅ All deployment mode tests passed!")
@@ -0,0 +1,125 @@
+"""
+Test script for the ECG catalog
+Listing, removal and index use over a temporary ECG store
+"""
+
+import asyncio
+import hashlib
+import tempfile
+from datetime import datetime, timedelta
+
+from services.ecg_catalog import ECGCatalog
+from services.ecg_storage import ECGStorage
+
+START = datetime(2026, 1, 1, 8, 0, 0)
+
+
+def store_uploads(storage, count, patient_ref=lambda i: "P1"):
+    """Commit `count` uploads straight into the store; pairs share a timestamp"""
+    for i in range(count):
+        data = b'%PDF-1.7\n' + str(i).encode()
+        temp_path = storage.temp_dir / f"{i}.part"
+        temp_path.write_bytes(data)
+        uploaded_at = (START + timedelta(seconds=i // 2)).isoformat()
+        storage._commit(temp_path, hashlib.sha256(data).hexdigest(), len(data), "pdf",
+                        f"id-{i:04d}", f"ecg_{i}.pdf", f"scan{i}.pdf", uploaded_at, patient_ref(i))
+
+
+def open_store(directory):
+    return ECGStorage(directory, max_file_size=1024 * 1024, extensions=["pdf"])
+
+
+def test_catalog_follows_the_store():
+    """Stored uploads are listed right away; removed ones are gone, in the listing and by id"""
+    print("\n1. Testing the catalog against the store...")
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = open_store(tmp)
+        catalog = ECGCatalog(tmp)
+        store_uploads(storage, 5)
+
+        async def run():
+            entry = await catalog.get("id-0004")
+            storage.remove("id-0004")
+            rows, _ = await catalog.list()
+            return entry, await catalog.get("id-0004"), rows
+
+        entry, removed, rows = asyncio.run(run())
+        catalog.close()
+        storage.close()
+
+        assert entry["patient_ref"] == "P1" and entry["size"] == len(b'%PDF-1.7\n4') and entry["kind"] == "pdf"
+        assert removed is None
+        assert [row["id"] for row in rows] == ["id-0003", "id-0002", "id-0001", "id-0000"]
+    print(f"   ✅ {len(rows)} listed after removing one of 5")
+
+
+def test_keyset_pagination():
+    """Pages cover every row once, newest first, with or without a patient filter"""
+    print("\n2. Testing keyset pagination...")
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = open_store(tmp)
+        store_uploads(storage, 50, patient_ref=lambda i: "P1" if i % 3 == 0 else "P2")
+        storage.close()
+
+        # Reopened: the catalog is whatever the store's index holds
+        storage = open_store(tmp)
+        catalog = ECGCatalog(tmp)
+
+        async def run():
+            pages, cursor = [], None
+            while True:
+                rows, cursor = await catalog.list(limit=7, cursor=cursor)
+                pages.append([row["id"] for row in rows])
+                if cursor is None:
+                    break
+            patient_rows, patient_cursor = await catalog.list(limit=100, patient_ref="P1")
+            try:
+                await catalog.list(cursor="not-a-cursor")
+                bad_cursor = False
+            except ValueError:
+                bad_cursor = True
+            return pages, patient_rows, patient_cursor, bad_cursor
+
+        pages, patient_rows, patient_cursor, bad_cursor = asyncio.run(run())
+        catalog.close()
+        storage.close()
+
+        ids = [upload_id for page in pages for upload_id in page]
+        assert ids == [f"id-{i:04d}" for i in reversed(range(50))]
+        assert [len(page) for page in pages] == [7] * 7 + [1]
+        assert [row["id"] for row in patient_rows] == [f"id-{i:04d}" for i in reversed(range(0, 50, 3))]
+        assert patient_cursor is None and bad_cursor
+    print(f"   ✅ 50 rows in pages of {[len(page) for page in pages]}; P1 has {len(patient_rows)}")
+
+
+def test_queries_use_the_indexes():
+    """Listing and lookup are index searches, never table scans"""
+    print("\n3. Testing query plans...")
+    select = ("SELECT u.id FROM uploads u JOIN blobs b ON b.sha256 = u.sha256 WHERE {} "
+              "ORDER BY u.uploaded_at DESC, u.id DESC LIMIT 10")
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = open_store(tmp)
+        catalog = ECGCatalog(tmp)
+        db = catalog._db
+        plans = {
+            "lookup": db.execute("EXPLAIN QUERY PLAN SELECT u.id FROM uploads u JOIN blobs b "
+                                 "ON b.sha256 = u.sha256 WHERE u.id = ?", ("x",)).fetchall(),
+            "page": db.execute("EXPLAIN QUERY PLAN " + select.format("(u.uploaded_at, u.id) < (?, ?)"),
+                               ("a", "b")).fetchall(),
+            "patient": db.execute("EXPLAIN QUERY PLAN " + select.format(
+                "u.patient_ref = ? AND (u.uploaded_at, u.id) < (?, ?)"), ("p", "a", "b")).fetchall(),
+        }
+        catalog.close()
+        storage.close()
+
+    for name, plan in plans.items():
+        details = " ".join(row[-1] for row in plan)
+        assert "SEARCH" in details and "SCAN" not in details and "TEMP B-TREE" not in details, (name, details)
+    print("   ✅ lookup, page and patient page are index searches")
+
+
+if __name__ == "__main__":
+    test_catalog_follows_the_store()
+    test_keyset_pagination()
+    test_queries_use_the_indexes()
+    print("\n✅ All ECG catalog tests passed!")
@@ -0,0 +1,160 @@
+"""
+Test script for streamed, content-addressed ECG storage
+Feeds multipart bodies in chunks and checks what lands on disk
+"""
+
+import asyncio
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+from services.ecg_storage import ECGStorage
+from services.uploads import UploadError
+
+BOUNDARY = "pulsexboundary"
+PDF = b'%PDF-1.7\n' + bytes(range(256)) * 400
+
+
+def multipart(filename, data, field="file"):
+    return (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode() + data + f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+
+class ChunkedRequest:
+    """Stand-in for a Starlette Request that streams its body in fixed-size chunks"""
+
+    def __init__(self, body, chunk_size=4096):
+        self.headers = {'content-type': f'multipart/form-data; boundary={BOUNDARY}'}
+        self.body = body
+        self.chunk_size = chunk_size
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            await asyncio.sleep(0)
+            yield self.body[start:start + self.chunk_size]
+
+
+def files_under(directory):
+    return sorted(p.relative_to(directory).as_posix() for p in Path(directory).rglob('*') if p.is_file())
+
+
+def blobs(directory):
+    return [name for name in files_under(directory) if name.startswith("blobs/")]
+
+
+def storage(directory, **kwargs):
+    options = {'max_file_size': 1024 * 1024, 'extensions': ["jpg", "jpeg", "png", "pdf"], 'write_buffer_size': 16384}
+    options.update(kwargs)
+    return ECGStorage(directory, **options)
+
+
+def test_upload_is_hashed_and_renamed_into_place():
+    """One pass gives the file, its sha256, size and type; no temp file is left"""
+    print("\n1. Testing a streamed ECG upload...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = storage(tmp)
+        stored = asyncio.run(store.ingest(ChunkedRequest(multipart("trace.pdf", PDF))))
+        store.close()
+
+        assert stored.path.read_bytes() == PDF
+        assert stored.sha256 == hashlib.sha256(PDF).hexdigest()
+        assert (stored.size, stored.kind) == (len(PDF), 'pdf')
+        assert stored.filename.startswith("ecg_") and stored.filename.endswith(".pdf")
+        assert stored.path == Path(tmp) / "blobs" / stored.sha256[:2] / stored.sha256[2:4] / stored.sha256
+        assert blobs(tmp) == [stored.path.relative_to(tmp).as_posix()]
+        assert list((Path(tmp) / "tmp").iterdir()) == []
+    print(f"   ✅ {stored.filename} ({stored.size} bytes, {stored.sha256[:12]}...)")
+
+
+def test_rejected_uploads_leave_nothing_behind():
+    """Wrong extension, mismatched content and oversized files are all cleaned up"""
+    print("\n2. Testing rejected uploads...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = storage(tmp, max_file_size=50_000)
+        cases = {
+            "notes.txt": (multipart("notes.txt", b"hello"), 400),
+            "renamed.jpg": (multipart("renamed.jpg", PDF[:20_000]), 400),
+            "huge.pdf": (multipart("huge.pdf", PDF), 413),
+            "missing field": (multipart("trace.pdf", PDF[:1000], field="other"), 422),
+        }
+        for name, (body, status) in cases.items():
+            try:
+                asyncio.run(store.ingest(ChunkedRequest(body)))
+            except UploadError as e:
+                assert e.status_code == status, (name, e.status_code)
+            else:
+                raise AssertionError(f"{name} was accepted")
+        store.close()
+
+        assert blobs(tmp) == [] and list((Path(tmp) / "tmp").iterdir()) == []
+    print(f"   ✅ {', '.join(cases)} rejected; nothing stored")
+
+
+def test_parallel_uploads_write_on_io_threads():
+    """Many uploads in flight at once; disk writes never run on the event loop thread"""
+    print("\n3. Testing parallel uploads...")
+    write_threads = set()
+    original_run = ECGStorage._run
+
+    def recording_run(self, fn, *args):
+        def wrapped(*inner):
+            write_threads.add(threading.current_thread().name)
+            return fn(*inner)
+        return original_run(self, wrapped, *args)
+
+    ECGStorage._run = recording_run
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = storage(tmp, io_workers=2)
+            bodies = [PDF + str(i).encode() for i in range(20)]
+
+            async def run():
+                return await asyncio.gather(*[store.ingest(ChunkedRequest(multipart(f"{i}.pdf", body)))
+                                              for i, body in enumerate(bodies)])
+
+            stored = asyncio.run(run())
+            store.close()
+
+            assert [s.sha256 for s in stored] == [hashlib.sha256(body).hexdigest() for body in bodies]
+            assert len(blobs(tmp)) == 20
+    finally:
+        ECGStorage._run = original_run
+
+    assert write_threads and all(name.startswith("ecg-io") for name in write_threads)
+    print(f"   ✅ 20 uploads stored using threads {sorted(write_threads)}")
+
+
+def test_identical_uploads_share_one_blob():
+    """Re-uploads (even concurrent ones) add a reference, not a copy; the last removal deletes the blob"""
+    print("\n4. Testing deduplication and reference counts...")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = storage(tmp)
+
+        async def run():
+            return await asyncio.gather(*[store.ingest(ChunkedRequest(multipart("trace.pdf", PDF))) for _ in range(3)])
+
+        first, second, third = asyncio.run(run())
+        assert len({first.id, second.id, third.id}) == 3
+        assert first.path == second.path == third.path and len(blobs(tmp)) == 1
+        assert [first.deduplicated, second.deduplicated, third.deduplicated].count(False) == 1
+
+        found = store.get(second.id)
+        assert (found.filename, found.sha256, found.size, found.kind) == (second.filename, second.sha256, len(PDF), 'pdf')
+
+        assert store.remove(first.id) and store.remove(second.id)
+        assert store.get(first.id) is None and first.path.exists()
+        assert store.remove(third.id) and not third.path.exists()
+        assert not store.remove(third.id)
+        store.close()
+    print("   ✅ 3 uploads → 1 blob; deleted with its last reference")
+
+
+if __name__ == "__main__":
+    test_upload_is_hashed_and_renamed_into_place()
+    test_rejected_uploads_leave_nothing_behind()
+    test_parallel_uploads_write_on_io_threads()
+    test_identical_uploads_share_one_blob()
+    print("\n✅ All ECG storage tests passed!")
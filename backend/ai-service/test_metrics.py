@@ -0,0 +1,89 @@
+"""
+Test script for the Prometheus metrics module
+"""
+
+import asyncio
+
+from services.metrics import MetricsRegistry, MetricsMiddleware
+
+
+def test_histogram_buckets_are_cumulative():
+    """Each le bucket counts every observation at or below its bound"""
+    print("\n1. Testing histogram buckets...")
+    registry = MetricsRegistry()
+    histogram = registry.histogram("stage_seconds", "Stage latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "forward")
+
+    text = registry.render()
+    assert '# TYPE stage_seconds histogram' in text
+    assert 'stage_seconds_bucket{stage="forward",le="0.1"} 2' in text
+    assert 'stage_seconds_bucket{stage="forward",le="1.0"} 3' in text
+    assert 'stage_seconds_bucket{stage="forward",le="+Inf"} 4' in text
+    assert 'stage_seconds_count{stage="forward"} 4' in text
+    assert 'stage_seconds_sum{stage="forward"} 3.65' in text
+    print("   ✅ Buckets, sum and count correct")
+
+
+def test_timer_and_get_or_create():
+    """time() observes once per block; histogram() returns the same object"""
+    print("\n2. Testing timer...")
+    registry = MetricsRegistry()
+    histogram = registry.histogram("work_seconds", "Work")
+    assert registry.histogram("work_seconds", "Work") is histogram
+
+    with histogram.time():
+        pass
+    assert 'work_seconds_count 1' in registry.render()
+    print("   ✅ One observation per timed block")
+
+
+def test_callback_gauges():
+    """Callbacks are read at scrape time; None and failures are skipped"""
+    print("\n3. Testing callback gauges...")
+    registry = MetricsRegistry()
+    depth = {"interactive": 3, "bulk": 0}
+    registry.gauge("queue_depth", "Queue depth", lambda: {(lane,): n for lane, n in depth.items()}, ("lane",))
+    registry.gauge("model_info", "Model", lambda: {('v"1',): 1}, ("version",))
+    registry.gauge("absent", "Not loaded", lambda: None)
+    registry.gauge("broken", "Raises", lambda: 1 / 0)
+
+    depth["bulk"] = 5
+    text = registry.render()
+    assert 'queue_depth{lane="interactive"} 3' in text
+    assert 'queue_depth{lane="bulk"} 5' in text
+    assert 'model_info{version="v\\"1"} 1' in text
+    assert 'absent' not in text and 'broken' not in text
+    print("   ✅ Live values, escaping and skipped callbacks")
+
+
+def test_middleware_labels_by_route():
+    """Requests are labelled with method, route template and status"""
+    print("\n4. Testing middleware...")
+    registry = MetricsRegistry()
+    histogram = registry.histogram("http_seconds", "HTTP", ("method", "endpoint", "status"))
+
+    class Route:
+        path = "/api/items/{item_id}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        await send({"type": "http.response.start", "status": 404})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(app, histogram)
+    asyncio.run(middleware({"type": "http", "method": "GET", "path": "/api/items/7"}, None, send))
+
+    assert 'http_seconds_count{method="GET",endpoint="/api/items/{item_id}",status="404"} 1' in registry.render()
+    print("   ✅ Route template label, not the raw path")
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative()
+    test_timer_and_get_or_create()
+    test_callback_gauges()
+    test_middleware_labels_by_route()
+    print("\n✅ All metrics tests passed!")
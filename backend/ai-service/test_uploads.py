@@ -0,0 +1,135 @@
+"""
+Test script for streaming multipart uploads
+Feeds bodies in small chunks to check how much is read before a rejection
+"""
+
+import asyncio
+
+from services.uploads import UploadError, allowed_types, read_files, sniff_type
+
+BOUNDARY = "pulsexboundary"
+JPEG = b'\xff\xd8\xff\xe0' + b'\x00' * 60
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 60
+
+
+def multipart(*parts):
+    """Encode (field, filename, content_type, data) parts; filename None for a plain field"""
+    body = b''
+    for field, filename, content_type, data in parts:
+        disposition = f'form-data; name="{field}"' + (f'; filename="{filename}"' if filename else '')
+        body += f'--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n'.encode()
+        if content_type:
+            body += f'Content-Type: {content_type}\r\n'.encode()
+        body += b'\r\n' + data + b'\r\n'
+    return body + f'--{BOUNDARY}--\r\n'.encode()
+
+
+class ChunkedRequest:
+    """Stand-in for a Starlette Request that streams its body in fixed-size chunks"""
+
+    def __init__(self, body, chunk_size=16, declare_length=False):
+        self.headers = {'content-type': f'multipart/form-data; boundary={BOUNDARY}'}
+        if declare_length:
+            self.headers['content-length'] = str(len(body))
+        self.body = body
+        self.chunk_size = chunk_size
+        self.chunks_read = 0
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            self.chunks_read += 1
+            yield self.body[start:start + self.chunk_size]
+
+
+def read(request, **kwargs):
+    options = {'field': 'file', 'max_file_size': 1024, 'types': {'jpeg', 'png'}}
+    options.update(kwargs)
+    return asyncio.run(read_files(request, **options))
+
+
+def rejection(request, **kwargs):
+    try:
+        read(request, **kwargs)
+    except UploadError as e:
+        return e
+    raise AssertionError("upload was accepted")
+
+
+def test_sniffing_and_allowed_types():
+    """Types come from magic bytes, not names; ALLOWED_EXTENSIONS maps to types"""
+    print("\n1. Testing magic-byte sniffing...")
+    assert sniff_type(JPEG) == 'jpeg' and sniff_type(PNG) == 'png'
+    assert sniff_type(b'%PDF-1.7') == 'pdf' and sniff_type(b'GIF89a') is None
+    assert allowed_types(["jpg", "png", ".PDF"]) == {'jpeg', 'png', 'pdf'}
+    print("   ✅ jpeg/png/pdf recognized, GIF not accepted")
+
+
+def test_files_are_read_and_other_fields_ignored():
+    """File parts of the named field come back in order with their sniffed type"""
+    print("\n2. Testing a valid multi-file upload...")
+    request = ChunkedRequest(multipart(
+        ("note", None, None, b"ignored"),
+        ("files", "a.jpg", "image/jpeg", JPEG),
+        ("files", "b.png", "application/octet-stream", PNG),
+        ("files", "c.txt", "text/plain", b"not an image at all"),
+    ), chunk_size=7)
+    files = read(request, field='files', max_files=5)
+
+    assert [(f.filename, f.kind) for f in files] == [("a.jpg", "jpeg"), ("b.png", "png"), ("c.txt", None)]
+    assert files[0].data == JPEG and files[1].data == PNG and files[2].data is None
+    assert files[2].size == len(b"not an image at all")
+    print(f"   ✅ {[(f.filename, f.kind, f.size) for f in files]}")
+
+
+def test_oversized_file_rejected_while_streaming():
+    """413 once the file passes the limit, with most of the body never read"""
+    print("\n3. Testing the size limit...")
+    body = multipart(("file", "big.jpg", "image/jpeg", JPEG + b'\x00' * 100_000))
+    request = ChunkedRequest(body, chunk_size=256)
+    error = rejection(request)
+
+    total_chunks = -(-len(body) // 256)
+    assert error.status_code == 413
+    assert request.chunks_read <= 8, request.chunks_read
+    print(f"   ✅ 413 after {request.chunks_read} of {total_chunks} chunks")
+
+    declared = ChunkedRequest(body, declare_length=True)
+    assert rejection(declared).status_code == 413 and declared.chunks_read == 0
+    print("   ✅ 413 before reading when Content-Length is over the limit")
+
+
+def test_wrong_type_rejected_from_first_bytes():
+    """strict=True fails on the first chunk; the rest of the body is not read"""
+    print("\n4. Testing the type check...")
+    request = ChunkedRequest(multipart(("file", "scan.jpg", "image/jpeg", b'%PDF-1.7' + b'\x00' * 5000)))
+    error = rejection(request, strict=True)
+
+    assert error.status_code == 400 and "Invalid file type" in str(error)
+    assert request.chunks_read < 15
+    assert rejection(ChunkedRequest(multipart(("other", "a.jpg", "image/jpeg", JPEG)))).status_code == 422
+    print(f"   ✅ 400 after {request.chunks_read} chunks; missing field is 422")
+
+
+def test_multi_file_body_limit():
+    """Many files each under the limit still fail once the body passes max_body_size"""
+    print("\n5. Testing the total body limit...")
+    body = multipart(*[("files", f"{i}.jpg", "image/jpeg", JPEG + b'\x00' * 900) for i in range(50)])
+    options = {'field': 'files', 'max_files': 500, 'max_body_size': 10_000}
+    request = ChunkedRequest(body, chunk_size=256)
+    error = rejection(request, **options)
+
+    assert error.status_code == 413
+    assert request.chunks_read * 256 <= 10_000 + 256
+    declared = ChunkedRequest(body, declare_length=True)
+    assert rejection(declared, **options).status_code == 413 and declared.chunks_read == 0
+    assert len(read(ChunkedRequest(body), field='files', max_files=500)) == 50  # no limit unless given
+    print(f"   ✅ 413 after {request.chunks_read * 256} of {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    test_sniffing_and_allowed_types()
+    test_files_are_read_and_other_fields_ignored()
+    test_oversized_file_rejected_while_streaming()
+    test_wrong_type_rejected_from_first_bytes()
+    test_multi_file_body_limit()
+    print("\n✅ All upload tests passed!")
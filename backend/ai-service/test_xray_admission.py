@@ -0,0 +1,137 @@
+"""
+Test script for X-ray admission control
+"""
+
+import asyncio
+import time
+
+from services.xray_admission import XRayAdmissionController
+from services.xray_batcher import XRayBatcher, XRayQueueFullError
+
+
+class SlowXRayService:
+    """Stand-in for XRayService whose forward pass takes a fixed time"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def prepare(self, image_data, tta=1):
+        return None, None, None, image_data
+
+    def predict_batch(self, image_tensors):
+        time.sleep(self.delay)
+        return [{"success": True, "echo": tensor} for tensor in image_tensors]
+
+    def store_cached(self, cache_key, result, duplicate_key=None):
+        pass
+
+    def failure_result(self, error):
+        return {"success": False, "error": str(error)}
+
+
+def test_concurrency_is_capped_and_waiters_run_in_order():
+    """No more than max_concurrent blocks run at once; waiters go FIFO"""
+    print("\n1. Testing concurrency limit...")
+    admission = XRayAdmissionController(max_concurrent=2, max_waiting=10)
+    running = []
+    peak = []
+    order = []
+
+    async def job(i):
+        async with admission.slot():
+            order.append(i)
+            running.append(i)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(i)
+
+    async def run():
+        await asyncio.gather(*[job(i) for i in range(6)])
+
+    asyncio.run(run())
+    assert max(peak) == 2
+    assert order == list(range(6))
+    assert admission.in_flight == 0 and admission.waiting == 0
+    print(f"   ✅ Peak concurrency {max(peak)}, FIFO order {order}")
+
+
+def test_full_wait_queue_fails_fast():
+    """Requests beyond max_concurrent + max_waiting are rejected immediately"""
+    print("\n2. Testing fail-fast rejection...")
+    admission = XRayAdmissionController(max_concurrent=1, max_waiting=1)
+
+    async def job():
+        async with admission.slot():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+    async def run():
+        return await asyncio.gather(*[job() for _ in range(4)], return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert results[:2] == ["ok", "ok"]
+    assert all(isinstance(r, XRayQueueFullError) for r in results[2:])
+    assert admission.rejected == 2
+    print(f"   ✅ 2 served, {admission.rejected} rejected")
+
+
+def test_cancelled_waiter_frees_its_place():
+    """A client that disconnects while queued doesn't leak a slot"""
+    print("\n3. Testing cancelled waiter...")
+    admission = XRayAdmissionController(max_concurrent=1, max_waiting=1)
+
+    async def run():
+        await admission.acquire()
+        waiter = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        admission.release()
+        async with admission.slot():
+            pass
+
+    asyncio.run(run())
+    assert admission.in_flight == 0 and admission.waiting == 0
+    print("   ✅ Slot and queue place released")
+
+
+def test_interactive_request_gets_in_past_bulk_jobs():
+    """More bulk jobs than slots: an interactive upload neither waits for them nor is rejected"""
+    print("\n4. Testing interactive admission under bulk load...")
+    admission = XRayAdmissionController(max_concurrent=8, max_waiting=4, interactive_reserved=2)
+    batcher = XRayBatcher(SlowXRayService(delay=0.02), max_batch_size=8, max_wait_ms=5)
+
+    async def bulk_job(job):
+        async with admission.slot('bulk'):
+            return await batcher.analyze_many([f"{job}-{i}".encode() for i in range(16)], lane='bulk')
+
+    async def interactive():
+        start = time.perf_counter()
+        async with admission.slot('interactive'):
+            result = await batcher.analyze(b"doctor", "doctor.jpg")
+        return result, time.perf_counter() - start
+
+    async def run():
+        start = time.perf_counter()
+        jobs = [asyncio.ensure_future(bulk_job(job)) for job in range(10)]
+        await asyncio.sleep(0.05)
+        bulk_state = admission.stats()["lanes"]["bulk"]
+        result, latency = await interactive()
+        await asyncio.gather(*jobs)
+        await batcher.close()
+        return bulk_state, result, latency, time.perf_counter() - start
+
+    bulk_state, result, latency, bulk_run = asyncio.run(run())
+    assert bulk_state == {"in_flight": 6, "waiting": 4}
+    assert result["echo"] == b"doctor"
+    assert latency < bulk_run / 5, (latency, bulk_run)
+    assert admission.in_flight == 0 and admission.rejected == 0
+    print(f"   ✅ Interactive served in {latency * 1000:.0f}ms during a {bulk_run * 1000:.0f}ms bulk run")
+
+
+if __name__ == "__main__":
+    test_concurrency_is_capped_and_waiters_run_in_order()
+    test_full_wait_queue_fails_fast()
+    test_cancelled_waiter_frees_its_place()
+    test_interactive_request_gets_in_past_bulk_jobs()
+    print("\n✅ All admission tests passed!")
@@ -0,0 +1,61 @@
+"""
+Test script for the batched X-ray audit writer
+"""
+
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from services.xray_audit import XRayAuditWriter
+
+
+def test_uploads_are_written_in_batches():
+    """Queued uploads end up on disk with one audit line each"""
+    print("\n1. Testing batched audit persistence...")
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = XRayAuditWriter(tmp, max_batch=2, flush_interval_ms=10)
+
+        async def run():
+            for i in range(5):
+                assert writer.submit(f"image-{i}".encode(), f"film_{i}.jpg",
+                                     {"success": True, "diagnosis": "Normal", "confidence": 97.0})
+            await asyncio.sleep(0.1)
+            await writer.close()
+
+        asyncio.run(run())
+
+        day_dirs = list(Path(tmp).iterdir())
+        assert len(day_dirs) == 1
+        images = sorted(day_dirs[0].glob("*.jpg"))
+        records = [json.loads(line) for line in (day_dirs[0] / "audit.jsonl").read_text().splitlines()]
+
+        assert len(images) == 5
+        assert [r["filename"] for r in records] == [f"film_{i}.jpg" for i in range(5)]
+        assert all(r["diagnosis"] == "Normal" for r in records)
+        assert writer.written == 5
+    print("   ✅ 5 uploads persisted")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    """Audit never slows the request path; overflow is counted"""
+    print("\n2. Testing audit queue overflow...")
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = XRayAuditWriter(tmp, max_batch=100, flush_interval_ms=1000, max_pending=3)
+
+        async def run():
+            accepted = [writer.submit(b"x", "x.jpg", {"success": True}) for _ in range(5)]
+            await writer.close()
+            return accepted
+
+        accepted = asyncio.run(run())
+        assert accepted == [True, True, True, False, False]
+        assert writer.dropped == 2
+        assert writer.written == 3
+    print("   ✅ Overflow dropped, queued uploads still written on close")
+
+
+if __name__ == "__main__":
+    test_uploads_are_written_in_batches()
+    test_full_queue_drops_instead_of_blocking()
+    print("\n✅ All audit tests passed!")
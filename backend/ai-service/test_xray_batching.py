@@ -0,0 +1,240 @@
+"""
+Test script for the X-ray micro-batching scheduler
+Uses a stand-in service so no model weights are required
+"""
+
+import asyncio
+import threading
+import time
+
+from services.xray_batcher import XRayBatcher, XRayQueueFullError
+
+
+class FakeXRayService:
+    """Records batch sizes instead of running ResNet50"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batch_sizes = []
+        self.batches = []
+
+    def prepare(self, image_data, tta=1):
+        if image_data == b"broken":
+            raise ValueError("cannot identify image file")
+        return None, None, None, image_data
+
+    def predict_batch(self, image_tensors):
+        time.sleep(self.delay)
+        self.batch_sizes.append(len(image_tensors))
+        self.batches.append(list(image_tensors))
+        return [{"success": True, "echo": tensor} for tensor in image_tensors]
+
+    def store_cached(self, cache_key, result, duplicate_key=None):
+        pass
+
+    def failure_result(self, error):
+        return {"success": False, "error": f"Analysis failed: {error}"}
+
+
+def test_concurrent_requests_share_a_batch():
+    """Concurrent callers inside the wait window get one forward pass"""
+    print("\n1. Testing concurrent requests are batched...")
+    service = FakeXRayService()
+    batcher = XRayBatcher(service, max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        results = await asyncio.gather(*[
+            batcher.analyze(f"img-{i}".encode(), f"{i}.jpg") for i in range(5)
+        ])
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+
+    assert service.batch_sizes == [5]
+    assert [r["echo"] for r in results] == [f"img-{i}".encode() for i in range(5)]
+    print(f"   ✅ 5 requests → batch sizes {service.batch_sizes}")
+
+
+def test_batches_are_capped_at_max_size():
+    """No forward pass exceeds max_batch_size"""
+    print("\n2. Testing max batch size...")
+    service = FakeXRayService()
+    batcher = XRayBatcher(service, max_batch_size=4, max_wait_ms=50)
+
+    async def run():
+        await asyncio.gather(*[batcher.analyze(b"x", "x.jpg") for _ in range(10)])
+        await batcher.close()
+
+    asyncio.run(run())
+
+    assert sum(service.batch_sizes) == 10
+    assert max(service.batch_sizes) <= 4
+    print(f"   ✅ 10 requests → batch sizes {service.batch_sizes}")
+
+
+def test_decode_failure_only_affects_its_caller():
+    """A broken upload returns a failure dict without breaking the batch"""
+    print("\n3. Testing per-request decode errors...")
+    service = FakeXRayService()
+    batcher = XRayBatcher(service, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        results = await asyncio.gather(
+            batcher.analyze(b"good", "a.jpg"),
+            batcher.analyze(b"broken", "b.jpg"),
+        )
+        await batcher.close()
+        return results
+
+    good, broken = asyncio.run(run())
+
+    assert good["success"] is True
+    assert broken["success"] is False
+    assert "cannot identify" in broken["error"]
+    print("   ✅ Broken image isolated")
+
+
+def test_full_queue_rejects_new_requests():
+    """Requests beyond max_queue_size fail fast"""
+    print("\n4. Testing queue depth limit...")
+    service = FakeXRayService(delay=0.2)
+    batcher = XRayBatcher(service, max_batch_size=1, max_wait_ms=0, max_queue_size=2)
+
+    async def run():
+        tasks = [asyncio.ensure_future(batcher.submit(b"x")) for _ in range(4)]
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        await batcher.close()
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    rejected = [o for o in outcomes if isinstance(o, XRayQueueFullError)]
+
+    assert len(rejected) == 2
+    print(f"   ✅ {len(rejected)} of 4 requests rejected with queue size 2")
+
+
+def test_interactive_overtakes_queued_bulk_work():
+    """An interactive upload runs in the next batch, ahead of queued bulk images"""
+    print("\n5. Testing interactive priority...")
+    service = FakeXRayService(delay=0.05)
+    batcher = XRayBatcher(service, max_batch_size=2, max_wait_ms=0, bulk_min_share=0)
+
+    async def run():
+        bulk = asyncio.ensure_future(
+            batcher.analyze_many([f"bulk-{i}".encode() for i in range(8)], decode_workers=8)
+        )
+        await asyncio.sleep(0.02)  # first bulk batch is running
+        await batcher.analyze(b"doctor", "d.jpg")
+        await bulk
+        await batcher.close()
+
+    asyncio.run(run())
+
+    position = next(i for i, batch in enumerate(service.batches) if b"doctor" in batch)
+    assert position == 1, service.batches
+    print(f"   ✅ Interactive image ran in batch #{position + 1} of {len(service.batches)}")
+
+
+def test_bulk_keeps_a_minimum_share():
+    """Waiting bulk work gets its reserved slots even under interactive load"""
+    print("\n6. Testing bulk minimum share...")
+    service = FakeXRayService(delay=0.05)
+    batcher = XRayBatcher(service, max_batch_size=4, max_wait_ms=0, bulk_min_share=0.5)
+
+    async def run():
+        busy = asyncio.ensure_future(batcher.analyze(b"busy", "busy.jpg"))
+        await asyncio.sleep(0.02)  # everything below queues behind this batch
+        await asyncio.gather(
+            busy,
+            *[batcher.analyze(f"i-{i}".encode(), "i.jpg") for i in range(8)],
+            batcher.analyze_many([f"b-{i}".encode() for i in range(4)]),
+        )
+        await batcher.close()
+
+    asyncio.run(run())
+
+    mixed = service.batches[1]
+    assert sum(t.startswith(b"b-") for t in mixed) == 2, mixed
+    stats = batcher.stats()
+    assert stats["interactive"]["completed"] == 9
+    assert stats["bulk"]["completed"] == 4
+    print(f"   ✅ Batch under load: {mixed}")
+
+
+def test_bulk_job_waits_for_room():
+    """A bulk job larger than the lane queue is throttled, not rejected"""
+    print("\n7. Testing bulk backpressure...")
+    service = FakeXRayService()
+    batcher = XRayBatcher(service, max_batch_size=2, max_wait_ms=0, max_queue_size=3)
+
+    async def run():
+        results = await batcher.analyze_many([f"{i}".encode() for i in range(20)], decode_workers=8)
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert [r["echo"] for r in results] == [f"{i}".encode() for i in range(20)]
+    print(f"   ✅ 20 images through a queue of 3, in order")
+
+
+def test_bulk_job_holds_a_bounded_number_of_tensors():
+    """A large bulk job never holds more than max_queue_size decoded images"""
+    print("\n8. Testing bulk memory bound...")
+
+    class CountingXRayService(FakeXRayService):
+        """Counts tensors that are decoded and not yet answered"""
+
+        def __init__(self, delay=0.0):
+            super().__init__(delay)
+            self.lock = threading.Lock()
+            self.held = 0
+            self.peak = 0
+
+        def prepare(self, image_data, tta=1):
+            with self.lock:
+                self.held += 1
+                self.peak = max(self.peak, self.held)
+            return super().prepare(image_data, tta)
+
+        def store_cached(self, cache_key, result, duplicate_key=None):
+            with self.lock:
+                self.held -= 1
+
+    service = CountingXRayService(delay=0.002)
+    batcher = XRayBatcher(service, max_batch_size=2, max_wait_ms=0, max_queue_size=4)
+
+    async def run():
+        results = await batcher.analyze_many([f"{i}".encode() for i in range(200)], decode_workers=8)
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert [r["echo"] for r in results] == [f"{i}".encode() for i in range(200)]
+    assert service.held == 0
+    assert service.peak <= 4, service.peak
+    print(f"   ✅ 200 images, at most {service.peak} decoded at once (queue size 4)")
+
+
+def main():
+    """Run all tests"""
+    print("=" * 70)
+    print("X-ray Batching Tests")
+    print("=" * 70)
+
+    test_concurrent_requests_share_a_batch()
+    test_batches_are_capped_at_max_size()
+    test_decode_failure_only_affects_its_caller()
+    test_full_queue_rejects_new_requests()
+    test_interactive_overtakes_queued_bulk_work()
+    test_bulk_keeps_a_minimum_share()
+    test_bulk_job_waits_for_room()
+    test_bulk_job_holds_a_bounded_number_of_tensors()
+
+    print("\n" + "=" * 70)
+    print("✅ All batching tests passed!")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
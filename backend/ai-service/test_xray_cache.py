@@ -0,0 +1,73 @@
+"""
+Test script for the X-ray result cache
+"""
+
+import os
+import tempfile
+import time
+
+from services.xray_cache import XRayResultCache
+
+
+def test_hits_misses_and_lru_eviction():
+    """Least recently used entry is evicted first; counters track lookups"""
+    print("\n1. Testing LRU eviction and counters...")
+    cache = XRayResultCache(max_entries=2, ttl_seconds=60)
+    keys = [cache.key(data, "v1/fp32") for data in (b"a", b"b", b"c")]
+
+    cache.put(keys[0], {"success": True, "diagnosis": "Normal"})
+    cache.put(keys[1], {"success": True, "diagnosis": "Abnormal"})
+    assert cache.get(keys[0])["diagnosis"] == "Normal"   # a is now most recent
+    cache.put(keys[2], {"success": True, "diagnosis": "Normal"})  # evicts b
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 2)
+    print(f"   ✅ {stats}")
+
+
+def test_model_version_is_part_of_the_key():
+    """Same image under a different model version is a different entry"""
+    print("\n2. Testing model version in cache key...")
+    assert XRayResultCache.key(b"img", "v1/fp32") != XRayResultCache.key(b"img", "v2/fp32")
+    print("   ✅ Keys differ per model version")
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are misses"""
+    print("\n3. Testing TTL expiry...")
+    cache = XRayResultCache(ttl_seconds=0.05)
+    cache.put("k", {"success": True})
+    assert cache.get("k") is not None
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    print("   ✅ Expired entry dropped")
+
+
+def test_model_file_change_clears_cache():
+    """Rewriting the watched model file invalidates every entry"""
+    print("\n4. Testing invalidation on model file change...")
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, "model.pth")
+        with open(model_path, "wb") as f:
+            f.write(b"weights-v1")
+
+        cache = XRayResultCache(watch_paths=[model_path], check_interval=0)
+        cache.put("k", {"success": True})
+        assert cache.get("k") is not None
+
+        with open(model_path, "wb") as f:
+            f.write(b"weights-v2-retrained")
+
+        assert cache.get("k") is None
+        assert cache.stats()["invalidations"] == 1
+    print("   ✅ Cache cleared after model file changed")
+
+
+if __name__ == "__main__":
+    test_hits_misses_and_lru_eviction()
+    test_model_version_is_part_of_the_key()
+    test_ttl_expiry()
+    test_model_file_change_clears_cache()
+    print("\n✅ All cache tests passed!")
@@ -0,0 +1,102 @@
+"""
+Test script for the two-stage X-ray cascade
+Uses stand-in models so no trained weights are needed
+"""
+
+import torch
+import torch.nn as nn
+
+from services.xray_cascade import build_screening_model
+from services.xray_inference import optimize_model
+from services.xray_service import XRayService
+
+
+class ScreeningStub(nn.Module):
+    """Sure (abnormal) about positive inputs, 50/50 about negative ones"""
+
+    def forward(self, x):
+        sure = (x.flatten(1).mean(dim=1) > 0).float() * 10
+        return torch.stack([sure, torch.zeros_like(sure)], dim=1)
+
+
+class FullStub(nn.Module):
+    """Always answers normal; records the batch shapes it was given"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def forward(self, x):
+        self.calls.append(tuple(x.shape))
+        return torch.tensor([[0.0, 5.0]]).repeat(len(x), 1)
+
+
+def cascade_service(threshold=0.9):
+    """XRayService around the stubs, built through the real constructor"""
+    return XRayService(model=FullStub(), screening_model=ScreeningStub(), cascade_threshold=threshold, version="test")
+
+
+def film(sign, views=None):
+    shape = (3, 8, 8) if views is None else (views, 3, 8, 8)
+    return torch.full(shape, float(sign))
+
+
+def test_only_unsure_images_reach_the_full_model():
+    """Confident screening answers are final; the rest go to the ResNet50 as one batch"""
+    print("\n1. Testing escalation...")
+    service = cascade_service(threshold=0.9)
+    results = service.predict_batch([film(1), film(-1), film(1), film(-1)])
+
+    assert [r["decided_by"] for r in results] == ["screening", "full", "screening", "full"]
+    assert [r["diagnosis"] for r in results] == ["Abnormal", "Normal", "Abnormal", "Normal"]
+    assert service.model.calls == [(2, 3, 8, 8)]
+    assert service.cascade_status()["decided_by"] == {"screening": 2, "full": 2}
+    print(f"   ✅ decided_by {[r['decided_by'] for r in results]}, full batch {service.model.calls}")
+
+
+def test_confident_batch_skips_the_full_model():
+    """A batch the screening model is sure about never runs the ResNet50"""
+    print("\n2. Testing all-confident batch...")
+    service = cascade_service(threshold=0.9)
+    results = service.predict_batch([film(1), film(1)])
+
+    assert all(r["decided_by"] == "screening" for r in results)
+    assert service.model.calls == []
+    print("   ✅ ResNet50 not called")
+
+
+def test_tta_views_are_escalated_together():
+    """An unsure image sends all of its views to the full model"""
+    print("\n3. Testing cascade with TTA views...")
+    service = cascade_service(threshold=0.9)
+    results = service.predict_batch([film(1, views=2), film(-1, views=5)])
+
+    assert [r["decided_by"] for r in results] == ["screening", "full"]
+    assert [r["tta"] for r in results] == [2, 5]
+    assert service.model.calls == [(5, 3, 8, 8)]
+
+    # A threshold below the screening model's 50% sends nothing on
+    service = cascade_service(threshold=0.5)
+    assert all(r["decided_by"] == "screening" for r in service.predict_batch([film(-1)]))
+    print("   ✅ Views escalated per image")
+
+
+def test_screening_model_can_be_optimized():
+    """The ResNet18 head folds and freezes like the ResNet50's"""
+    print("\n4. Testing screening model with torchscript...")
+    torch.manual_seed(0)
+    model = build_screening_model().eval()
+    example = torch.randn(2, 3, 224, 224)
+    optimized = optimize_model(model, 'torchscript', example)
+
+    with torch.no_grad():
+        assert torch.allclose(model(example), optimized(example), atol=1e-4)
+    print("   ✅ Outputs match")
+
+
+if __name__ == "__main__":
+    test_only_unsure_images_reach_the_full_model()
+    test_confident_batch_skips_the_full_model()
+    test_tta_views_are_escalated_together()
+    test_screening_model_can_be_optimized()
+    print("\n✅ All cascade tests passed!")
@@ -0,0 +1,79 @@
+"""
+Test script for the reduced-resolution decode fast path
+Checks that fast decoding gives tensors close to full-resolution decoding
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+from torchvision import transforms
+
+from services.xray_service import decode_image
+
+
+# Same as XRayService._get_transform (validation preprocessing)
+TRANSFORM = transforms.Compose([
+    transforms.Resize(256),
+    transforms.CenterCrop(224),
+    transforms.ToTensor(),
+    transforms.Normalize([0.485, 0.456, 0.406], [0.229, 0.224, 0.225])
+])
+
+
+def create_film(width, height, mode='L', fmt='JPEG'):
+    """Smooth synthetic 'film' with noise, encoded as JPEG or PNG bytes"""
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = 128 + 60 * np.sin(x / 150) + 50 * np.cos(y / 200)
+    pixels += np.random.RandomState(0).randn(height, width) * 10
+    image = Image.fromarray(pixels.clip(0, 255).astype('uint8'), 'L').convert(mode)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=92)
+    return buffer.getvalue()
+
+
+def compare(image_bytes):
+    """(max, mean) absolute difference between fast and full preprocessing"""
+    full = TRANSFORM(decode_image(image_bytes, fast=False))
+    fast = TRANSFORM(decode_image(image_bytes, fast=True))
+    diff = (full - fast).abs()
+    return diff.max().item(), diff.mean().item()
+
+
+def test_large_jpeg_is_decoded_near_target_size():
+    """DCT-domain downscale keeps the shorter side >= 256"""
+    print("\n1. Testing JPEG draft decode size...")
+    image = decode_image(create_film(2500, 3000), fast=True)
+    assert min(image.size) >= 256
+    assert max(image.size) < 1000
+    assert image.mode == 'RGB'
+    print(f"   ✅ 2500x3000 JPEG decoded at {image.size}")
+
+
+def test_fast_decode_is_numerically_close():
+    """Grayscale/RGB JPEG and PNG stay within a small tolerance"""
+    print("\n2. Testing fast vs full decode tensors...")
+    for name, image_bytes in [
+        ("L JPEG", create_film(2500, 3000, 'L')),
+        ("RGB JPEG", create_film(2000, 2400, 'RGB')),
+        ("L PNG", create_film(2048, 2048, 'L', 'PNG')),
+    ]:
+        max_diff, mean_diff = compare(image_bytes)
+        assert max_diff < 0.15, (name, max_diff)
+        assert mean_diff < 0.03, (name, mean_diff)
+        print(f"   ✅ {name}: max {max_diff:.4f}, mean {mean_diff:.4f}")
+
+
+def test_small_images_are_unchanged():
+    """Images already near 256px take the same path as before"""
+    print("\n3. Testing small images...")
+    max_diff, _ = compare(create_film(300, 400))
+    assert max_diff == 0.0
+    print("   ✅ Identical tensors")
+
+
+if __name__ == "__main__":
+    test_large_jpeg_is_decoded_near_target_size()
+    test_fast_decode_is_numerically_close()
+    test_small_images_are_unchanged()
+    print("\n✅ All decode tests passed!")
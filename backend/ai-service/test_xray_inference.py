@@ -0,0 +1,69 @@
+"""
+Test script for the fused/frozen X-ray inference graph
+Uses a small randomly initialised ResNet so no trained weights are needed
+"""
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from services.xray_inference import fold_head_batchnorm, optimize_model
+
+
+def create_test_model():
+    """ResNet18 with a head shaped like the production one (BN after ReLU)"""
+    torch.manual_seed(0)
+    model = models.resnet18(weights=None)
+    model.fc = nn.Sequential(
+        nn.Dropout(0.5),
+        nn.Linear(model.fc.in_features, 64),
+        nn.ReLU(),
+        nn.BatchNorm1d(64),
+        nn.Dropout(0.3),
+        nn.Linear(64, 32),
+        nn.ReLU(),
+        nn.BatchNorm1d(32),
+        nn.Dropout(0.2),
+        nn.Linear(32, 2)
+    )
+    # Non-trivial running statistics so folding is actually exercised
+    for module in model.modules():
+        if isinstance(module, (nn.BatchNorm1d, nn.BatchNorm2d)):
+            module.running_mean.uniform_(-0.5, 0.5)
+            module.running_var.uniform_(0.5, 2.0)
+            module.weight.data.uniform_(0.5, 1.5)
+            module.bias.data.uniform_(-0.2, 0.2)
+    return model.eval()
+
+
+def test_head_batchnorm_folding():
+    """Folded head has no BatchNorm/Dropout and gives the same logits"""
+    print("\n1. Testing head BatchNorm1d folding...")
+    head = create_test_model().fc
+    folded = fold_head_batchnorm(head).eval()
+
+    assert not any(isinstance(m, (nn.BatchNorm1d, nn.Dropout)) for m in folded)
+
+    features = torch.randn(8, 512)
+    with torch.no_grad():
+        assert torch.allclose(head(features), folded(features), atol=1e-5)
+    print("   ✅ Folded head matches original")
+
+
+def test_torchscript_mode_matches_eager():
+    """Fused + frozen TorchScript graph gives the same outputs as eager"""
+    print("\n2. Testing torchscript inference mode...")
+    model = create_test_model()
+    example = torch.randn(1, 3, 224, 224)
+    optimized = optimize_model(model, 'torchscript', example)
+
+    batch = torch.randn(4, 3, 224, 224)
+    with torch.no_grad():
+        assert torch.allclose(model(batch), optimized(batch), atol=1e-4)
+    print("   ✅ TorchScript graph matches eager model")
+
+
+if __name__ == "__main__":
+    test_head_batchnorm_folding()
+    test_torchscript_mode_matches_eager()
+    print("\n✅ All inference graph tests passed!")
@@ -0,0 +1,62 @@
+"""
+Test script for memory-mapped X-ray weight loading
+Uses a small network so no trained weights are needed
+"""
+
+import tempfile
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+from services.xray_service import load_state_dict_file
+
+
+def saved_model(folder, **save_kwargs):
+    model = nn.Sequential(nn.Conv2d(3, 8, 3), nn.BatchNorm2d(8), nn.ReLU(), nn.Flatten(), nn.Linear(8 * 6 * 6, 2))
+    model.eval()
+    path = Path(folder) / "model.pth"
+    torch.save(model.state_dict(), path, **save_kwargs)
+    return model, path
+
+
+def build_on_meta():
+    with torch.device('meta'):
+        return nn.Sequential(nn.Conv2d(3, 8, 3), nn.BatchNorm2d(8), nn.ReLU(), nn.Flatten(), nn.Linear(8 * 6 * 6, 2))
+
+
+def test_mmap_assign_matches_regular_load():
+    """Meta-device model + mmap + assign gives identical outputs"""
+    print("\n1. Testing mmap + assign loading...")
+    with tempfile.TemporaryDirectory() as tmp:
+        reference, path = saved_model(tmp)
+
+        model = build_on_meta()
+        model.load_state_dict(load_state_dict_file(path, mmap=True), assign=True)
+        model.eval()
+
+        assert not any(p.is_meta for p in model.parameters())
+        assert not any(b.is_meta for b in model.buffers())
+
+        x = torch.randn(2, 3, 8, 8)
+        with torch.no_grad():
+            assert torch.equal(model(x), reference(x))
+    print("   ✅ Outputs identical, no meta tensors left")
+
+
+def test_legacy_pth_falls_back_to_regular_load():
+    """Pre-zipfile .pth files can't be mapped but still load"""
+    print("\n2. Testing legacy .pth fallback...")
+    with tempfile.TemporaryDirectory() as tmp:
+        reference, path = saved_model(tmp, _use_new_zipfile_serialization=False)
+
+        state_dict = load_state_dict_file(path, mmap=True)
+        for name, tensor in reference.state_dict().items():
+            assert torch.equal(state_dict[name], tensor)
+    print("   ✅ Legacy file loaded without mmap")
+
+
+if __name__ == "__main__":
+    test_mmap_assign_matches_regular_load()
+    test_legacy_pth_falls_back_to_regular_load()
+    print("\n✅ All model loading tests passed!")
@@ -0,0 +1,149 @@
+"""
+Test script for the X-ray near-duplicate index
+Uses synthetic films and a tiny network in place of ResNet50
+"""
+
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+from PIL import Image
+
+from services.xray_near_duplicates import XRayNearDuplicateIndex, perceptual_hash
+from services.xray_service import XRayService
+
+
+def film_image(seed=0):
+    """Smooth film-like structure; different seeds give different anatomy"""
+    rng = np.random.RandomState(seed)
+    y, x = np.mgrid[0:400, 0:320].astype(np.float32)
+    fx, fy, phase = rng.uniform(1, 4), rng.uniform(1, 4), rng.uniform(0, np.pi)
+    pixels = 120 + 70 * np.sin(x / 320 * fx * np.pi + phase) * np.cos(y / 400 * fy * np.pi)
+    pixels += rng.normal(0, 4, pixels.shape)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'L')
+
+
+def encode(image, image_format='PNG', **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def tiny_service(near_duplicates):
+    """XRayService around a small network, built through the real constructor"""
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.AdaptiveAvgPool2d(4), nn.Flatten(), nn.Linear(48, 2))
+    return XRayService(model=model, near_duplicates=near_duplicates, version="test")
+
+
+def test_reencoded_film_is_found():
+    """A JPEG re-export stays within the radius; a different film does not"""
+    print("\n1. Testing near-duplicate lookup...")
+    image = film_image(0)
+    original = perceptual_hash(image)
+    reencoded = perceptual_hash(Image.open(io.BytesIO(encode(image, 'JPEG', quality=70))))
+    other = perceptual_hash(film_image(1))
+
+    index = XRayNearDuplicateIndex(max_distance=4)
+    index.put(original, "v1/fp32", {"diagnosis": "Normal"})
+
+    result, distance = index.get(reencoded, "v1/fp32")
+    assert result == {"diagnosis": "Normal"} and distance <= 4
+    assert index.get(other, "v1/fp32") == (None, None)
+    assert index.get(reencoded, "v2/fp32") == (None, None)
+    print(f"   ✅ Re-encoded distance {distance}, other film {(original ^ other).bit_count()}")
+
+
+def test_every_hash_within_radius_is_a_candidate():
+    """Multi-index lookup matches a linear scan for hashes 0..max_distance bits away"""
+    print("\n2. Testing multi-index lookup against a linear scan...")
+    rng = np.random.RandomState(0)
+    index = XRayNearDuplicateIndex(max_distance=3, max_entries=1000)
+    stored = [int(rng.randint(0, 2 ** 32)) << 32 | int(rng.randint(0, 2 ** 32)) for _ in range(200)]
+    for image_hash in stored:
+        index.put(image_hash, "v", image_hash)
+
+    for image_hash in stored[:50]:
+        flipped = image_hash
+        for bit in rng.choice(64, size=rng.randint(0, 4), replace=False):
+            flipped ^= 1 << int(bit)
+        expected = min(stored, key=lambda h: (h ^ flipped).bit_count())
+        result, distance = index.get(flipped, "v")
+        assert distance == (expected ^ flipped).bit_count() and result is not None
+    print("   ✅ 50 perturbed hashes found at the minimum distance")
+
+
+def test_lru_eviction_and_snapshot():
+    """Least recently used entry goes first; a snapshot restores the rest"""
+    print("\n3. Testing eviction and snapshot round-trip...")
+    index = XRayNearDuplicateIndex(max_distance=2, max_entries=2)
+    index.put(0x0F, "v", {"n": 1})
+    index.put(0xF0F0, "v", {"n": 2})
+    assert index.get(0x0F, "v")[0] == {"n": 1}     # 0x0F is now most recent
+    index.put(0xFFFF0000, "v", {"n": 3})            # evicts 0xF0F0
+
+    assert index.get(0xF0F0, "v") == (None, None)
+    assert index.stats()["entries"] == 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.json")
+        assert index.save(path) == 2
+        restored = XRayNearDuplicateIndex(max_distance=2, max_entries=2)
+        assert restored.load(path) == 2
+    assert restored.get(0x0F, "v") == ({"n": 1}, 0)
+    assert restored.get(0xFFFF0001, "v") == ({"n": 3}, 1)
+    print(f"   ✅ {restored.stats()}")
+
+
+def test_service_reuses_result_for_reencoded_upload():
+    """Second upload of the same film skips the forward pass"""
+    print("\n4. Testing XRayService with a near-duplicate index...")
+    service = tiny_service(XRayNearDuplicateIndex())
+    image = film_image(0)
+    first = service.analyze_xray(encode(image), "film.png")
+
+    calls = []
+    service.model.register_forward_hook(lambda *args: calls.append(1))
+    second = service.analyze_xray(encode(image, 'JPEG', quality=80), "film.jpg")
+    third = service.analyze_xray(encode(film_image(1)), "other.png")
+
+    assert second["diagnosis"] == first["diagnosis"] and "duplicate_distance" in second
+    assert "duplicate_distance" not in first and "duplicate_distance" not in third
+    assert len(calls) == 1  # only the different film ran the model
+    print(f"   ✅ Reused at distance {second['duplicate_distance']}")
+
+
+def test_retrained_weights_miss_the_old_entries():
+    """A same-day retrain of models/ gets a new version, so earlier results are never reused"""
+    print("\n5. Testing a retrain under the same training date...")
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = Path(tmp)
+        (model_dir / 'binary_metadata.json').write_text(json.dumps({"training_date": "2026-01-01"}))
+        model = XRayService._build_architecture(None)
+        versions = []
+        for _ in range(2):
+            torch.save(model.state_dict(), model_dir / 'xray_binary_model.pth')
+            versions.append(XRayService(model_dir=model_dir).model_version)
+            with torch.no_grad():
+                model.fc[-1].bias += 1  # "retrain"
+
+    index = XRayNearDuplicateIndex()
+    index.put(0xABCD, versions[0], {"diagnosis": "Normal"})
+    assert versions[0] != versions[1]
+    assert all(version.startswith("2026-01-01-") and version.endswith("/fp32") for version in versions)
+    assert index.get(0xABCD, versions[1]) == (None, None)
+    print(f"   ✅ {versions[0]} → {versions[1]}")
+
+
+if __name__ == "__main__":
+    test_reencoded_film_is_found()
+    test_every_hash_within_radius_is_a_candidate()
+    test_lru_eviction_and_snapshot()
+    test_service_reuses_result_for_reencoded_upload()
+    test_retrained_weights_miss_the_old_entries()
+    print("\n✅ All near-duplicate tests passed!")
@@ -0,0 +1,106 @@
+"""
+Test script for process-pool X-ray serving
+Uses a stand-in service so no model file or torch inference is needed
+"""
+
+import asyncio
+import os
+import signal
+import time
+
+from services.xray_process_pool import XRayProcessPool
+
+
+class FakeXRayService:
+    """Records which process did the work; cache lives in the parent"""
+
+    result_cache = None
+
+    def __init__(self):
+        self.stored = {}
+
+    def warmup(self, iterations, batch_sizes):
+        pass
+
+    def analyze_xray(self, image_data, filename, tta=1):
+        return {"success": True, "size": len(image_data), "pid": os.getpid()}
+
+    def analyze_batch(self, images, batch_size=16, decode_workers=4, tta=1):
+        return [self.analyze_xray(image, None) for image in images]
+
+    def lookup_cached(self, image_data, tta=1):
+        return image_data, self.stored.get(image_data)
+
+    def store_cached(self, key, result):
+        self.stored[key] = result
+
+
+def test_requests_run_in_worker_processes():
+    """Work happens outside the parent; results are cached in the parent"""
+    print("\n1. Testing single requests...")
+    service = FakeXRayService()
+    pool = XRayProcessPool(service, workers=2)
+    try:
+        result = asyncio.run(pool.analyze(b"film", "film.jpg"))
+        assert result["size"] == 4
+        assert result["pid"] != os.getpid()
+        assert service.stored[b"film"] == result
+
+        cached = asyncio.run(pool.analyze(b"film", "film.jpg"))
+        assert cached is result
+    finally:
+        pool.close()
+    print(f"   ✅ Analyzed in worker {result['pid']}, second call served from cache")
+
+
+def test_batch_keeps_input_order():
+    """Chunks spread over workers come back in upload order"""
+    print("\n2. Testing batch ordering...")
+    pool = XRayProcessPool(FakeXRayService(), workers=2)
+    try:
+        images = [b"x" * n for n in range(1, 12)]
+        results = asyncio.run(pool.analyze_batch(images, batch_size=3))
+        assert [r["size"] for r in results] == list(range(1, 12))
+        assert pool.queue_depth == 0
+    finally:
+        pool.close()
+    print(f"   ✅ {len(results)} results in order")
+
+
+def test_lost_worker_is_replaced():
+    """A SIGKILLed worker breaks the executor once; the pool re-forks, then gives up past max_restarts"""
+    print("\n3. Testing recovery from a killed worker...")
+    pool = XRayProcessPool(FakeXRayService(), workers=2, max_restarts=1)
+
+    async def analyze(image):
+        try:
+            return await pool.analyze(image, "film.jpg")
+        except RuntimeError as e:
+            return str(e)
+
+    def kill_a_worker():
+        pid = asyncio.run(analyze(f"film-{time.time()}".encode()))["pid"]
+        os.kill(pid, signal.SIGKILL)
+        time.sleep(0.2)
+
+    try:
+        kill_a_worker()
+        lost = asyncio.run(analyze(b"after kill"))
+        assert isinstance(lost, str) and pool.restarts == 1
+        recovered = asyncio.run(analyze(b"after restart"))
+        assert recovered["success"] and pool.state == "ok"
+
+        kill_a_worker()
+        asyncio.run(analyze(b"after second kill"))
+        assert pool.state == "failed" and pool.status()["restarts"] == 1
+        assert asyncio.run(analyze(b"down")) == "X-ray worker processes are down"
+    finally:
+        pool.close()
+    print(f"   ✅ Replaced after the first crash, '{pool.state}' after the second")
+
+
+if __name__ == "__main__":
+    test_requests_run_in_worker_processes()
+    test_batch_keeps_input_order()
+    test_lost_worker_is_replaced()
+    print("\n✅ All process pool tests passed!")
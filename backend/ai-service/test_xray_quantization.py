@@ -0,0 +1,62 @@
+"""
+Test script for INT8 quantization of the X-ray classifier
+Uses a small randomly initialised ResNet so no trained weights are needed
+"""
+
+import tempfile
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from services.xray_quantization import (
+    QuantizedXRayModel, quantize_model, save_quantized_model, load_quantized_model
+)
+
+
+def create_test_model():
+    """ResNet18 with a head shaped like the production one"""
+    model = models.resnet18(weights=None)
+    model.fc = nn.Sequential(
+        nn.Dropout(0.5),
+        nn.Linear(model.fc.in_features, 64),
+        nn.ReLU(),
+        nn.BatchNorm1d(64),
+        nn.Dropout(0.2),
+        nn.Linear(64, 2)
+    )
+    return model.eval()
+
+
+def test_quantized_model_round_trip():
+    """Quantize, save as TorchScript, reload and compare outputs"""
+    print("\n1. Testing INT8 quantization round trip...")
+    torch.manual_seed(0)
+    model = create_test_model()
+    calibration = [torch.randn(3, 224, 224) for _ in range(4)]
+
+    int8_model = quantize_model(model, calibration)
+    assert isinstance(int8_model, QuantizedXRayModel)
+    assert isinstance(int8_model.head[1], torch.ao.nn.quantized.dynamic.Linear)
+
+    batch = torch.stack(calibration[:2])
+    with torch.no_grad():
+        fp32_out = torch.softmax(model(batch), dim=1)
+        int8_out = torch.softmax(int8_model(batch), dim=1)
+
+    assert int8_out.shape == (2, 2)
+    assert (fp32_out - int8_out).abs().max().item() < 0.1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_quantized_model(int8_model, Path(tmp) / "int8.pt", batch[:1])
+        reloaded = load_quantized_model(path)
+        with torch.no_grad():
+            assert torch.allclose(reloaded(batch), int8_model(batch))
+
+    print("   ✅ INT8 model matches fp32 and survives save/load")
+
+
+if __name__ == "__main__":
+    test_quantized_model_round_trip()
+    print("\n✅ All quantization tests passed!")
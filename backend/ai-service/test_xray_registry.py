@@ -0,0 +1,117 @@
+"""
+Test script for the X-ray model registry (hot-swap and rollback)
+Uses a stub loader so no weights need to be loaded
+"""
+
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from services.xray_registry import XRayModelRegistry, DEFAULT_VERSION
+
+
+class StubService:
+    def __init__(self, model_dir, version):
+        if (Path(model_dir) / "broken").exists():
+            raise RuntimeError("state_dict mismatch")
+        self.model_dir = model_dir
+        self.model_version = f"{version}/fp32"
+
+
+def write_model(folder, training_date, weights=b"weights"):
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / "xray_binary_model.pth").write_bytes(weights)
+    (folder / "binary_metadata.json").write_text(json.dumps({"training_date": training_date, "accuracy": 0.93}))
+
+
+def make_registry(tmp):
+    models = Path(tmp) / "models"
+    write_model(models, "2026-01-01")
+    return models, XRayModelRegistry(models / "versions", StubService, default_dir=models)
+
+
+def test_publish_activate_and_rollback():
+    """A published version is swapped in, listeners see it, rollback restores the old one"""
+    print("\n1. Testing publish → activate → rollback...")
+    with tempfile.TemporaryDirectory() as tmp:
+        models, registry = make_registry(tmp)
+        swapped = []
+        registry.add_listener(lambda service: swapped.append(service.model_version))
+
+        first = registry.load_active()
+        assert registry.current_version == DEFAULT_VERSION
+
+        write_model(models, "2026-02-04", weights=b"retrained")
+        version = registry.publish(models)
+        assert version.startswith("2026-02-04-")
+        assert (models / "versions" / version / "binary_metadata.json").exists()
+
+        asyncio.run(registry.activate(version))
+        assert registry.current_version == version
+        assert registry.previous_versions == [DEFAULT_VERSION]
+        assert (models / "versions" / "ACTIVE").read_text() == version
+
+        assert registry.rollback() == DEFAULT_VERSION
+        assert registry.current is first
+        assert swapped == [f"{DEFAULT_VERSION}/fp32", f"{version}/fp32", f"{DEFAULT_VERSION}/fp32"]
+    print(f"   ✅ Swapped to {version} and rolled back")
+
+
+def test_failed_load_keeps_serving_current_model():
+    """A broken version never replaces the active one"""
+    print("\n2. Testing failed activation...")
+    with tempfile.TemporaryDirectory() as tmp:
+        models, registry = make_registry(tmp)
+        registry.load_active()
+
+        write_model(models / "versions" / "bad", "2026-03-01")
+        (models / "versions" / "bad" / "broken").write_text("")
+
+        try:
+            asyncio.run(registry.activate("bad"))
+            assert False, "expected load failure"
+        except RuntimeError as e:
+            assert "state_dict" in str(e)
+
+        assert registry.current_version == DEFAULT_VERSION
+        assert registry.loading is None
+        assert registry.last_error.startswith("bad:")
+    print("   ✅ Still serving default after failed load")
+
+
+def test_unknown_and_escaping_versions_are_rejected():
+    """Version ids from URLs cannot point outside the versions folder"""
+    print("\n3. Testing version id validation...")
+    with tempfile.TemporaryDirectory() as tmp:
+        _, registry = make_registry(tmp)
+        for version in ("missing", "../models", ".hidden", "a/b"):
+            try:
+                registry.path_for(version)
+                assert False, version
+            except KeyError:
+                pass
+    print("   ✅ Rejected")
+
+
+def test_restart_comes_back_on_active_version():
+    """ACTIVE is honoured by the next load_active()"""
+    print("\n4. Testing active version persistence...")
+    with tempfile.TemporaryDirectory() as tmp:
+        models, registry = make_registry(tmp)
+        registry.load_active()
+        version = registry.publish(models, version="v2")
+        asyncio.run(registry.activate(version))
+
+        restarted = XRayModelRegistry(models / "versions", StubService, default_dir=models)
+        restarted.load_active()
+        assert restarted.current_version == "v2"
+    print("   ✅ Restart loaded v2")
+
+
+if __name__ == "__main__":
+    test_publish_activate_and_rollback()
+    test_failed_load_keeps_serving_current_model()
+    test_unknown_and_escaping_versions_are_rejected()
+    test_restart_comes_back_on_active_version()
+    print("\n✅ All registry tests passed!")
@@ -0,0 +1,96 @@
+"""
+Test script for batched test-time augmentation
+Uses a tiny network in place of ResNet50 so no trained weights are needed
+"""
+
+import io
+
+import numpy as np
+import torch
+import torch.nn as nn
+from PIL import Image
+
+from services.xray_service import XRayService
+
+
+class CountingModel(nn.Module):
+    """Records the batch shape of every forward call"""
+
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.net = nn.Sequential(nn.AdaptiveAvgPool2d(4), nn.Flatten(), nn.Linear(48, 2))
+        self.calls = []
+
+    def forward(self, x):
+        self.calls.append(tuple(x.shape))
+        return self.net(x)
+
+
+def tiny_service():
+    """XRayService around CountingModel, built through the real constructor"""
+    return XRayService(model=CountingModel(), version="test")
+
+
+def film(seed=0):
+    pixels = np.random.RandomState(seed).randint(0, 255, (320, 300), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, 'L').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def test_views():
+    """Factor 1 is the standard crop; 2 adds its mirror; 5/10 are five/ten-crop"""
+    print("\n1. Testing TTA views...")
+    service = tiny_service()
+    single = service.preprocess(film())
+    pair = service.preprocess(film(), tta=2)
+
+    assert single.shape == (3, 224, 224)
+    assert pair.shape == (2, 3, 224, 224)
+    assert torch.allclose(pair[0], single, atol=1e-6)
+    assert torch.equal(pair[1], pair[0].flip(-1))
+    assert service.preprocess(film(), tta=5).shape == (5, 3, 224, 224)
+    assert service.preprocess(film(), tta=10).shape == (10, 3, 224, 224)
+
+    try:
+        service.preprocess(film(), tta=3)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("   ✅ 1/2/5/10 views, invalid factor rejected")
+
+
+def test_mixed_factors_share_one_forward_pass():
+    """Views of every image go through the model once; logits are averaged per image"""
+    print("\n2. Testing one forward pass per batch...")
+    service = tiny_service()
+    tensors = [service.preprocess(film(0)), service.preprocess(film(1), tta=10), service.preprocess(film(2), tta=2)]
+
+    results = service.predict_batch(tensors)
+
+    assert service.model.calls == [(13, 3, 224, 224)]
+    assert [result["tta"] for result in results] == [1, 10, 2]
+
+    with torch.no_grad():
+        expected = torch.softmax(service.model.net(tensors[1]).mean(dim=0), dim=0)
+    assert results[1]["probabilities"]["normal"] == round(expected[1].item() * 100, 1)
+    print(f"   ✅ Forward calls: {service.model.calls}")
+
+
+def test_analyze_xray_with_tta():
+    """analyze_xray passes the factor through and reports it"""
+    print("\n3. Testing analyze_xray(tta=5)...")
+    service = tiny_service()
+    result = service.analyze_xray(film(), "film.png", tta=5)
+
+    assert result["success"] and result["tta"] == 5
+    assert service.model.calls == [(5, 3, 224, 224)]
+    print(f"   ✅ {result['diagnosis']} ({result['confidence']}%)")
+
+
+if __name__ == "__main__":
+    test_views()
+    test_mixed_factors_share_one_forward_pass()
+    test_analyze_xray_with_tta()
+    print("\n✅ All TTA tests passed!")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Train the screening model for the X-ray cascade
+ResNet18 with the enhanced head, trained with the same dataset, sampling,
+augmentation, loss and optimizer recipe as train_enhanced.py
+
+Usage:
+    python3 train_cascade.py --dataset /path/to/chest_xray
+    python3 cascade_curve.py --data-dir /path/to/chest_xray/test
+
+Writes models/xray_screening_model.pth and models/screening_metadata.json.
+Serve it with XRAY_CASCADE_THRESHOLD set (cascade_curve.py helps pick it).
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import DataLoader, WeightedRandomSampler
+
+from train_enhanced import XRayDataset, get_transforms, train_epoch, validate
+from services.xray_cascade import SCREENING_MODEL_FILE, SCREENING_METADATA_FILE, build_screening_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the cascade screening model (ResNet18)")
+    parser.add_argument("--dataset", default="/home/youssef/Downloads/chest_xray/chest_xray",
+                        help="Folder with train/ and test/ (NORMAL and PNEUMONIA subfolders)")
+    parser.add_argument("--output-dir", default="models")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=0.0001)
+    parser.add_argument("--weight-decay", type=float, default=1e-4)
+    parser.add_argument("--patience", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    dataset_path = Path(args.dataset)
+    if not dataset_path.exists():
+        print(f"❌ Dataset not found at {dataset_path}")
+        return
+
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    print(f"\n🚀 Training screening model on: {device}")
+
+    print("\n📁 Loading datasets...")
+    train_dataset = XRayDataset(dataset_path / 'train', transform=get_transforms('train'))
+    val_dataset = XRayDataset(dataset_path / 'test', transform=get_transforms('val'))
+
+    # Inverse frequency class weights, as in train_enhanced.py
+    class_counts = Counter(train_dataset.labels)
+    total_samples = len(train_dataset.labels)
+    class_weights = {
+        cls: total_samples / (len(class_counts) * count)
+        for cls, count in class_counts.items()
+    }
+    sampler = WeightedRandomSampler(
+        weights=[class_weights[label] for label in train_dataset.labels],
+        num_samples=total_samples,
+        replacement=True
+    )
+
+    train_loader = DataLoader(train_dataset, batch_size=args.batch_size, sampler=sampler,
+                              num_workers=args.workers, pin_memory=True)
+    val_loader = DataLoader(val_dataset, batch_size=args.batch_size, shuffle=False,
+                            num_workers=args.workers, pin_memory=True)
+
+    model = build_screening_model(pretrained=True, dropout=0.5).to(device)
+    criterion = nn.CrossEntropyLoss(weight=torch.tensor([class_weights[0], class_weights[1]]).to(device))
+    optimizer = optim.AdamW(model.parameters(), lr=args.lr, weight_decay=args.weight_decay)
+    scheduler = optim.lr_scheduler.CosineAnnealingWarmRestarts(optimizer, T_0=5, T_mult=2, eta_min=1e-6)
+    scaler = torch.amp.GradScaler('cuda') if torch.cuda.is_available() else None
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(exist_ok=True)
+    model_path = output_dir / SCREENING_MODEL_FILE
+
+    best_acc = 0.0
+    best_f1 = 0.0
+    patience_counter = 0
+    start_time = time.time()
+
+    for epoch in range(args.epochs):
+        print(f"\nEpoch {epoch+1}/{args.epochs}")
+        train_loss, train_acc = train_epoch(model, train_loader, criterion, optimizer, device, scaler, 1.0)
+        val_metrics = validate(model, val_loader, criterion, device)
+        scheduler.step()
+
+        print(f"  Train Loss: {train_loss:.4f} | Train Acc: {train_acc*100:.2f}%")
+        print(f"  Val Acc: {val_metrics['accuracy']*100:.2f}% | F1: {val_metrics['f1']:.4f}")
+
+        if val_metrics['accuracy'] > best_acc:
+            best_acc = val_metrics['accuracy']
+            best_f1 = val_metrics['f1']
+            patience_counter = 0
+            # Write then rename, like train_enhanced.py (the service may have it mapped)
+            staging_path = model_path.with_name(model_path.name + '.tmp')
+            torch.save(model.state_dict(), staging_path)
+            os.replace(staging_path, model_path)
+            print(f"  ✅ NEW BEST! Accuracy: {best_acc*100:.2f}%")
+        else:
+            patience_counter += 1
+            if patience_counter >= args.patience:
+                print(f"\n⏹️  Early stopping after {epoch+1} epochs")
+                break
+
+    metadata = {
+        'model_name': 'ResNet18 Screening X-ray Classifier (cascade stage 1)',
+        'accuracy': float(best_acc),
+        'f1_score': float(best_f1),
+        'classes': ['abnormal', 'normal'],
+        'training_date': time.strftime('%Y-%m-%d'),
+        'architecture': 'ResNet18 with enhanced head (512→256→128→2) + class weighting',
+        'input_size': [224, 224],
+        'epochs_trained': epoch + 1,
+        'batch_size': args.batch_size,
+        'learning_rate': args.lr,
+        'weight_decay': args.weight_decay,
+        'class_weights': class_weights,
+        'training_minutes': round((time.time() - start_time) / 60, 2)
+    }
+    with open(output_dir / SCREENING_METADATA_FILE, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"\n🏆 Best screening accuracy: {best_acc*100:.2f}% (saved to {model_path})")
+
+
+if __name__ == '__main__':
+    main()
@@ -374,7 +374,11 @@ def main():
             
             model_path = Path('models/xray_binary_model.pth')
             model_path.parent.mkdir(exist_ok=True)
-            torch.save(model.state_dict(), model_path)
+            # Write then rename: a running service may have the old file memory-mapped,
+            # and truncating it in place would crash that process
+            staging_path = model_path.with_name(model_path.name + '.tmp')
+            torch.save(model.state_dict(), staging_path)
+            os.replace(staging_path, model_path)
             
             print(f"  ✅ NEW BEST! Accuracy: {best_acc*100:.2f}% | F1: {best_f1:.4f}")
             